@@ -1,7 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from typing import Optional
-import os
 
 
 class Settings(BaseSettings):
@@ -10,9 +9,61 @@ class Settings(BaseSettings):
     DATABASE_URL: str = Field(default="sqlite:///./db.sqlite3")
     MEDIA_DIR: str = Field(default="./media")
     OPENAI_API_KEY: Optional[str] = None  # compatible with Python 3.9
+    DEBUG: bool = False  # prints a startup-time profile
+    CREATE_TABLES_ON_STARTUP: bool = False  # otherwise run `python -m app.db.manage create-tables`
+    SEED_ON_STARTUP: bool = False  # otherwise run `python -m app.db.manage seed`
+    DB_PROFILE: str = "balanced"  # storage tuning profile, see app/db/profiles.py
+    DB_POOL_SIZE: Optional[int] = None  # overrides the profile's pool size (Postgres)
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DATABASE_REPLICA_URLS: str = ""  # comma-separated read replica URLs (Postgres)
+    SQLITE_READ_POOL: bool = True  # serve reads from a read-only WAL connection pool on SQLite
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # reads this soon after a client's write go to the primary
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_TIMEOUT_SECONDS: float = 1.0  # a replica that does not answer the lag probe in time is treated as stale
+    REPORT_AUTO_HIDE_THRESHOLD: int = 5  # unresolved reports that send an approved listing back to pending; 0 disables
+    ADMIN_PAGE_SIZE: int = 100  # default page of the admin list endpoints (next page via X-Next-Cursor)
+    ADMIN_PAGE_MAX: int = 1000
+    ADMIN_EXPORT_CHUNK_SIZE: int = 1000  # rows per keyset chunk of ?format=csv exports
+    ADMIN_BULK_MAX_IDS: int = 1000  # listings per PATCH /admin/listings/bulk
+    DELETE_BATCH_SIZE: int = 5000  # max rows removed per transaction by bulk deletes
+    BULK_IMPORT_BATCH_SIZE: int = 1000  # listings per executemany transaction in POST /listings/bulk
+    BULK_IMPORT_MAX_ERRORS: int = 1000  # per-row errors reported before only counting
+    SEARCH_FUZZY_MIN_RESULTS: int = 5  # fall back to trigram matching when exact keyword search finds fewer
+    SEARCH_FUZZY_THRESHOLD: float = 0.5  # minimum trigram similarity of a misspelled word
+    SEARCH_FUZZY_CANDIDATES: int = 500  # ranked matches considered before category/price filters
+    SEARCH_BATCH_MAX_QUESTIONS: int = 20  # questions accepted by POST /search/nl/batch
+    SEARCH_PRICE_BUCKETS: str = "0,25,50,100,250,500,1000"  # lower edges of the faceted-search price histogram
+    TYPEAHEAD_CACHE_SIZE: int = 1024  # memoised /search/suggest answers (least recently used evicted)
+    SEMANTIC_INDEX_DIR: str = "./semantic_index"  # memory-mapped embeddings for POST /search/nl with mode=semantic
+    SEMANTIC_DIM: int = 128  # latent dimensions of the offline embedding model
+    SEMANTIC_HASH_DIM: int = 32768  # hashed TF-IDF feature buckets
+    SEMANTIC_CANDIDATES: int = 500  # nearest listings considered before category/price filters
+    SEMANTIC_MIN_SCORE: float = 0.1  # minimum cosine similarity of a semantic match
+    SIMILAR_K: int = 10  # precomputed neighbors per listing for GET /listings/{id}/similar
+    SIMILAR_CATEGORY_WEIGHT: float = 0.15  # score bonus for a neighbor in the same category
+    SIMILAR_PRICE_WEIGHT: float = 0.1  # weight of price proximity, exp(-|log(p1/p2)|)
+    SIMILAR_BATCH_SIZE: int = 1024  # listings scored per NumPy block
+    SIMILAR_REFRESH_SECONDS: float = 0  # background refresh interval of the similar-listings table; 0 (default) disables
+    CHAT_EXPORT_CHUNK_SIZE: int = 1000  # messages fetched per round-trip by history exports
+    CHAT_RETENTION_DAYS: int = 0  # move messages older than this into the archive; 0 disables
+    CHAT_RETENTION_INTERVAL_SECONDS: int = 3600
+    CHAT_ARCHIVE_SEGMENT_SIZE: int = 1000  # messages per compressed archive segment
+    CHAT_ARCHIVE_CODEC: str = "gzip"  # "gzip" or "zstd" (needs the zstandard package)
+    CHAT_WS_MAX_BATCH: int = 100  # max messages coalesced into one WebSocket batch frame
+    CHAT_WS_PING_INTERVAL_SECONDS: float = 20.0
+    CHAT_WS_IDLE_TIMEOUT_SECONDS: float = 60.0  # sockets silent for longer are closed
+    LISTING_FEED_BUFFER: int = 1000  # recent GET /listings/stream events kept for Last-Event-ID resume
+    LISTING_FEED_QUEUE: int = 256  # events a slow stream may fall behind before it is dropped
+    LISTING_FEED_HEARTBEAT_SECONDS: float = 15.0
+    LISTING_FEED_MAX_SECONDS: float = 300.0  # streams end after this; clients reconnect with Last-Event-ID
+    LISTING_FEED_RETRY_MS: int = 3000  # EventSource reconnect delay sent to clients
+    METRICS_ENABLED: bool = True  # request/query metrics exported on GET /metrics
+    SLOW_QUERY_MS: float = 200.0  # statements slower than this are logged on "app.db.slow"; 0 disables
+    QUERY_PROFILER: bool = False  # debug/test: per-request query ledger, X-Query-* headers, GET /debug/queries
+    QUERY_PROFILER_N1_THRESHOLD: int = 3  # same statement shape this often in one request is flagged as N+1
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
 settings = Settings()
-os.makedirs(settings.MEDIA_DIR, exist_ok=True)
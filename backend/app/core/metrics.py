@@ -0,0 +1,218 @@
+"""
+In-process Prometheus-style metrics.
+
+A tiny registry (counters, histograms) rendered in the Prometheus text
+exposition format on GET /metrics, without a client-library dependency.
+
+- MetricsMiddleware records per-route latency histograms and status counts,
+  labelled by the route template (/listings/{listing_id}) rather than the
+  raw path, so cardinality stays bounded.
+- install_query_hooks(engine) adds cursor execute/error listeners that
+  count statements and DB time, attribute them to the current request, and
+  log statements slower than SLOW_QUERY_MS on the "app.db.slow" logger.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+slow_log = logging.getLogger("app.db.slow")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_fmt_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # per label set: [bucket counts..., +Inf count], sum
+        self.values: Dict[LabelKey, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            counts, total = self.values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self.values[labels] = (counts, total + value)
+
+    def count(self, *labels: str) -> int:
+        entry = self.values.get(labels)
+        return entry[0][-1] if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self.values.items()):
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                le = 'le="%s"' % (bound if isinstance(bound, str) else f"{bound:g}")
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {n}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {counts[-1]}")
+        return lines
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP responses by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request.", ("route",), COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL per request.", ("route",))
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed.")
+DB_QUERY_TIME = Histogram("db_query_duration_seconds", "SQL statement latency.")
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS.")
+LLM_LATENCY = Histogram("nl_search_llm_duration_seconds", "OpenAI call latency in nl_to_query.")
+LLM_CALLS = Counter("nl_search_llm_calls_total", "OpenAI calls from nl_to_query by outcome.", ("outcome",))
+NL_FALLBACKS = Counter("nl_search_fallback_total", "nl_to_query requests answered by the heuristic parser.", ("reason",))
+
+REGISTRY = [HTTP_REQUESTS, HTTP_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, DB_QUERIES, DB_QUERY_TIME,
+            DB_SLOW_QUERIES, LLM_LATENCY, LLM_CALLS, NL_FALLBACKS]
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "ledger")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.ledger = None  # QueryLedger when the query profiler is on (app/core/query_profiler.py)
+
+
+# Set by MetricsMiddleware; query hooks add to the object it holds. The object
+# is shared by reference, so statements issued from run_sync greenlets and
+# threadpool workers (which see a copy of the context) still count.
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("_query_start")
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    DB_QUERIES.inc()
+    DB_QUERY_TIME.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.ledger is not None:
+            stats.ledger.record(statement, elapsed)
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc()
+        slow_log.warning("slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:2000])
+
+
+def _handle_error(context):
+    # failed statements never reach after_cursor_execute; drop their start time
+    if context.statement is None or context.connection is None:
+        return
+    stack = context.connection.info.get("_query_start")
+    if stack:
+        stack.pop()
+
+
+def install_query_hooks(sync_engine):
+    """Attach query counting / slow-query logging to a (sync or async's .sync_engine) Engine."""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")  # set by Starlette's router
+    template, regex = getattr(route, "path_format", None), getattr(route, "path_regex", None)
+    if template is None or regex is None:
+        return "unmatched"
+    # Depending on the FastAPI version the template of an included-router route is
+    # relative to the router ("/{listing_id}"); the router prefix is then the part
+    # of the path in front of the shortest suffix the route's own regex matches.
+    path = scope.get("path", "")
+    for start, char in enumerate(path):
+        if char == "/" and regex.match(path[start:]):
+            return path[:start] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Records latency, status and per-request DB usage for every HTTP request."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            current_request.reset(token)
+            route = _route_label(scope)
+            if route != "/metrics":
+                method = scope["method"]
+                HTTP_REQUESTS.inc(method, route, str(status))
+                HTTP_LATENCY.observe(time.perf_counter() - start, method, route)
+                REQUEST_QUERIES.observe(stats.queries, route)
+                REQUEST_DB_TIME.observe(stats.db_seconds, route)
+
+
+def render(gauges: Optional[Dict[str, float]] = None) -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, value in (gauges or {}).items():
+        lines.extend([f"# TYPE {name} gauge", f"{name} {value:g}"])
+    return "\n".join(lines) + "\n"
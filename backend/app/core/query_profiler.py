@@ -0,0 +1,125 @@
+"""
+Per-request query ledger (debug / test mode, QUERY_PROFILER=true).
+
+Every SQL statement a request issues is recorded by the cursor hooks in
+app/core/metrics.py. Statements are normalised to a "shape" (literals and
+IN-lists collapsed); a shape repeated QUERY_PROFILER_N1_THRESHOLD times or
+more within one request is flagged as a likely N+1 pattern.
+
+Each response carries X-Query-Count, X-Query-Time-Ms and X-Query-N-Plus-One
+headers (counted up to the moment headers are sent), and the complete
+ledgers of recent requests are served by GET /debug/queries. Tests use the
+`assert_max_queries` fixture in tests/conftest.py.
+"""
+import logging
+import re
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.metrics import RequestStats, current_request, _route_label
+
+logger = logging.getLogger("app.db.profiler")
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise SQL so that executions differing only in values compare equal."""
+    shape = _SPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _LITERAL.sub("?", shape)
+
+
+class QueryLedger:
+    def __init__(self):
+        self.entries: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, seconds: float):
+        self.entries.append((statement, seconds))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s for _, s in self.entries)
+
+    def n_plus_one(self, threshold: Optional[int] = None) -> Dict[str, int]:
+        """Statement shapes executed at least `threshold` times, with their counts."""
+        threshold = threshold or settings.QUERY_PROFILER_N1_THRESHOLD
+        counts = Counter(statement_shape(s) for s, _ in self.entries)
+        return {shape: n for shape, n in counts.most_common() if n >= threshold}
+
+    def report(self) -> str:
+        lines = [f"{len(self)} queries, {self.total_seconds * 1000:.1f} ms"]
+        lines += [f"  {seconds * 1000:7.2f} ms  {_SPACE.sub(' ', s)[:200]}" for s, seconds in self.entries]
+        for shape, n in self.n_plus_one().items():
+            lines.append(f"  N+1? x{n}: {shape[:200]}")
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        return {
+            "queries": len(self),
+            "db_ms": round(self.total_seconds * 1000, 3),
+            "n_plus_one": [{"shape": shape, "count": n} for shape, n in self.n_plus_one().items()],
+            "statements": [{"sql": _SPACE.sub(" ", s), "ms": round(seconds * 1000, 3)} for s, seconds in self.entries],
+        }
+
+
+# Most recent request ledgers, newest last (served by GET /debug/queries)
+recent: Deque[dict] = deque(maxlen=100)
+
+
+class QueryProfilerMiddleware:
+    """Attaches a QueryLedger to each HTTP request when QUERY_PROFILER is on."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_PROFILER or scope["path"].startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+
+        # Share the metrics middleware's per-request stats when present
+        stats = current_request.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request.set(stats)
+        ledger = stats.ledger = QueryLedger()
+        status = 500
+        start = time.perf_counter()
+
+        async def _send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Query-Count", str(len(ledger)))
+                headers.append("X-Query-Time-Ms", f"{ledger.total_seconds * 1000:.1f}")
+                headers.append("X-Query-N-Plus-One", str(len(ledger.n_plus_one())))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            stats.ledger = None
+            if token is not None:
+                current_request.reset(token)
+            entry = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": _route_label(scope),
+                "status": status,
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+                **ledger.as_dict(),
+            }
+            recent.append(entry)
+            if entry["n_plus_one"]:
+                logger.warning("possible N+1 in %s %s:\n%s", entry["method"], entry["path"], ledger.report())
@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from functools import lru_cache
 from typing import Any
 
 ALGORITHM = "HS256"
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def pwd_context():
+    # passlib (and bcrypt) load on first use, not at import
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def create_access_token(subject: str, secret_key: str, expires_minutes: int) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
@@ -13,10 +18,10 @@ def create_access_token(subject: str, secret_key: str, expires_minutes: int) ->
     return jwt.encode(to_encode, secret_key, algorithm=ALGORITHM)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return pwd_context().verify(plain, hashed)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def decode_token(token: str, secret_key: str) -> str:
     try:
@@ -0,0 +1,40 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.metrics import install_query_hooks
+from app.db.profiles import engine_kwargs, install_sqlite_pragmas
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+async_engine = create_async_engine(to_async_url(settings.DATABASE_URL), echo=False, **engine_kwargs(settings.DATABASE_URL, is_async=True))
+install_sqlite_pragmas(async_engine.sync_engine)
+install_query_hooks(async_engine.sync_engine)
+
+async def get_async_session():
+    # expire_on_commit=False: attributes stay readable after commit without an implicit (sync) reload
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+_DONE = object()
+
+async def iterate_sync(session: AsyncSession, factory, *args):
+    """
+    Drive a sync generator built on the session's underlying sync Session as an
+    async iterator, so sync streaming helpers (chat export, archive reads) can
+    be shared by async routes. Each step runs through `run_sync`.
+    """
+    gen = await session.run_sync(factory, *args)
+    while True:
+        item = await session.run_sync(lambda _: next(gen, _DONE))
+        if item is _DONE:
+            return
+        yield item
@@ -0,0 +1,36 @@
+"""
+Database maintenance commands, kept out of application startup.
+
+    python -m app.db.manage create-tables   # create missing tables and indexes (idempotent)
+    python -m app.db.manage seed            # create tables, then load the demo data
+
+CREATE_TABLES_ON_STARTUP / SEED_ON_STARTUP run the same steps on boot for
+throwaway environments.
+"""
+import argparse
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.db.manage", description="Campus Marketplace database commands")
+    parser.add_argument("command", choices=["create-tables", "seed"])
+    args = parser.parse_args(argv)
+
+    import app.models  # noqa: F401  registers every table on SQLModel.metadata
+    from app.db.session import create_db_and_tables, engine
+    create_db_and_tables()
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy import text
+        from app.services.fuzzy_search import PG_TRGM_DDL
+        with engine.begin() as conn:
+            for ddl in PG_TRGM_DDL:
+                conn.execute(text(ddl))
+    print("Tables ready.")
+    if args.command == "seed":
+        from app.db.seed_data import run
+        run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Named storage tuning profiles, selected with DB_PROFILE.
+
+SQLite settings are applied as PRAGMAs on every new connection; Postgres
+settings become pool arguments and a per-connection statement_timeout.
+
+  - legacy:     driver defaults (rollback journal, default pool)
+  - balanced:   WAL + synchronous=NORMAL, moderate cache/mmap, pool 10+20
+  - throughput: WAL + synchronous=NORMAL, large cache/mmap, pool 20+40
+  - durable:    WAL + synchronous=FULL, small pool with frequent recycling
+"""
+
+from typing import Any, Dict
+from sqlalchemy import event
+from app.core.config import settings
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "legacy": {
+        "sqlite_pragmas": {},
+        "pool": {},
+        "statement_timeout_ms": None,
+    },
+    "balanced": {
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -20000,  # KiB (negative = size, not pages): ~20 MB
+            "mmap_size": 134217728,  # 128 MB
+            "busy_timeout": 5000,
+            "temp_store": "MEMORY",
+        },
+        "pool": {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+        "statement_timeout_ms": 15000,
+    },
+    "throughput": {
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64000,
+            "mmap_size": 536870912,  # 512 MB
+            "busy_timeout": 10000,
+            "temp_store": "MEMORY",
+        },
+        "pool": {"pool_size": 20, "max_overflow": 40, "pool_pre_ping": True, "pool_recycle": 1800},
+        "statement_timeout_ms": 30000,
+    },
+    "durable": {
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "busy_timeout": 10000,
+        },
+        "pool": {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True, "pool_recycle": 900},
+        "statement_timeout_ms": 10000,
+    },
+}
+
+
+def get_profile(name: str = None) -> Dict[str, Any]:
+    name = name or settings.DB_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}; expected one of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def engine_kwargs(url: str, profile: str = None, is_async: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine under a profile."""
+    p = get_profile(profile)
+    if url.startswith("sqlite"):
+        return {"connect_args": {} if is_async else {"check_same_thread": False}}
+
+    pool = dict(p["pool"])
+    if settings.DB_POOL_SIZE is not None:
+        pool["pool_size"] = settings.DB_POOL_SIZE
+    if settings.DB_MAX_OVERFLOW is not None:
+        pool["max_overflow"] = settings.DB_MAX_OVERFLOW
+    connect_args: Dict[str, Any] = {}
+    timeout = p["statement_timeout_ms"]
+    if timeout and url.startswith("postgres"):
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+    return {**pool, "connect_args": connect_args}
+
+
+def install_sqlite_pragmas(sync_engine, profile: str = None, readonly: bool = False):
+    """Apply the profile's PRAGMAs on every new SQLite connection of `sync_engine`."""
+    if sync_engine.dialect.name != "sqlite":
+        return
+    pragmas = dict(get_profile(profile)["sqlite_pragmas"])
+    if readonly:
+        # journal_mode is a write to the database header; read-only connections inherit it.
+        pragmas.pop("journal_mode", None)
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f"PRAGMA {key}={value}")
+        cursor.close()
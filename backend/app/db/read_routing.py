@@ -0,0 +1,165 @@
+"""
+Read/write session routing.
+
+Writes always go through the primary (`get_async_session`). Read-heavy
+endpoints depend on `get_read_session`, which picks a replica engine:
+
+  - Postgres: one async engine per URL in DATABASE_REPLICA_URLS, chosen
+    round-robin. Replication lag is sampled at most every
+    REPLICA_LAG_CHECK_SECONDS and replicas lagging more than
+    REPLICA_MAX_LAG_SECONDS are skipped. Replicas are probed concurrently;
+    one that does not connect and answer within
+    REPLICA_LAG_CHECK_TIMEOUT_SECONDS counts as stale until the next check.
+  - SQLite (no replica URLs): a read-only (`mode=ro`) connection pool on the
+    same database file, with the file switched to WAL so readers never block
+    on the writer.
+
+Read-your-writes: every successful non-GET request gets a write fence (an
+`X-Write-Fence` header and `rw_fence` cookie holding the write time), except
+endpoints marked `@read_only` (POST only for the request body, e.g. search). Reads
+carrying a fence younger than READ_YOUR_WRITES_SECONDS are served by the
+primary, so a user always sees their own changes even if replicas lag.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import MutableHeaders
+from app.core.config import settings
+from app.core.metrics import install_query_hooks
+from app.db.async_session import async_engine, to_async_url
+from app.db.profiles import engine_kwargs, install_sqlite_pragmas
+
+FENCE_HEADER = "X-Write-Fence"
+FENCE_COOKIE = "rw_fence"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+_PG_LAG_SQL = text("SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)")
+
+
+def _sqlite_file(url: str) -> Optional[str]:
+    if not url.startswith("sqlite") or ":memory:" in url or url.rstrip("/").endswith(":"):
+        return None
+    return os.path.abspath(url.split(":///", 1)[1].split("?", 1)[0])
+
+
+def _enable_wal(sync_engine):
+    # journal_mode=WAL is persistent in the database file, so setting it once is enough.
+    with sync_engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+
+class ReadRouter:
+    def __init__(self, replicas: List[AsyncEngine]):
+        self.replicas = replicas
+        self._cycle = itertools.cycle(range(len(replicas))) if replicas else None
+        self._lag = [0.0] * len(replicas)
+        self._lag_checked_at = 0.0
+
+    async def _refresh_lag(self):
+        now = time.monotonic()
+        if now - self._lag_checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+            return
+        self._lag_checked_at = now
+        checked = [i for i, engine in enumerate(self.replicas) if engine.dialect.name == "postgresql"]
+        lags = await asyncio.gather(*(self._probe(self.replicas[i]) for i in checked))
+        for i, lag in zip(checked, lags):
+            self._lag[i] = lag
+
+    @staticmethod
+    async def _probe(engine: AsyncEngine) -> float:
+        """Replication lag of one replica in seconds; inf if it fails or does not answer in time."""
+        async def _query():
+            async with engine.connect() as conn:
+                return float((await conn.execute(_PG_LAG_SQL)).scalar() or 0)
+        try:
+            return await asyncio.wait_for(_query(), settings.REPLICA_LAG_CHECK_TIMEOUT_SECONDS)
+        except Exception:
+            return float("inf")
+
+    async def pick(self) -> Optional[AsyncEngine]:
+        """Next replica within the lag budget, or None to fall back to the primary."""
+        if not self.replicas:
+            return None
+        await self._refresh_lag()
+        for _ in range(len(self.replicas)):
+            i = next(self._cycle)
+            if self._lag[i] <= settings.REPLICA_MAX_LAG_SECONDS:
+                return self.replicas[i]
+        return None
+
+
+def build_read_router() -> ReadRouter:
+    urls = [u.strip() for u in settings.DATABASE_REPLICA_URLS.split(",") if u.strip()]
+    if urls:
+        replicas = [create_async_engine(to_async_url(u), **engine_kwargs(u, is_async=True)) for u in urls]
+        for replica in replicas:
+            install_query_hooks(replica.sync_engine)
+        return ReadRouter(replicas)
+    path = _sqlite_file(settings.DATABASE_URL)
+    if path and settings.SQLITE_READ_POOL:
+        from app.db.session import engine
+        _enable_wal(engine)
+        replica = create_async_engine(f"sqlite+aiosqlite:///file:{path}?mode=ro&uri=true")
+        install_sqlite_pragmas(replica.sync_engine, readonly=True)
+        install_query_hooks(replica.sync_engine)
+        return ReadRouter([replica])
+    return ReadRouter([])
+
+
+_router: Optional[ReadRouter] = None
+
+def get_read_router() -> ReadRouter:
+    global _router
+    if _router is None:
+        _router = build_read_router()
+    return _router
+
+
+def has_recent_write(request: Request) -> bool:
+    fence = request.headers.get(FENCE_HEADER) or request.cookies.get(FENCE_COOKIE)
+    try:
+        return fence is not None and time.time() - float(fence) < settings.READ_YOUR_WRITES_SECONDS
+    except ValueError:
+        return False
+
+
+async def get_read_session(request: Request):
+    engine = None
+    if not has_recent_write(request):
+        engine = await get_read_router().pick()
+    async with AsyncSession(engine or async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+def read_only(endpoint):
+    """Mark a non-GET endpoint that never writes, so calling it does not set a write fence."""
+    endpoint.read_only = True
+    return endpoint
+
+
+class WriteFenceMiddleware:
+    """Stamps successful writes with a fence so follow-up reads stick to the primary."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def _send(message):
+            # routing has filled in scope["endpoint"] by the time the response starts
+            if message["type"] == "http.response.start" and message["status"] < 400 and not getattr(scope.get("endpoint"), "read_only", False):
+                fence = f"{time.time():.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(FENCE_HEADER, fence)
+                headers.append("Set-Cookie", f"{FENCE_COOKIE}={fence}; Max-Age={int(settings.READ_YOUR_WRITES_SECONDS) + 1}; Path=/; SameSite=Lax")
+            await send(message)
+
+        await self.app(scope, receive, _send)
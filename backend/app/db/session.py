@@ -1,12 +1,61 @@
+from sqlalchemy import inspect, text
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.config import settings
+from app.core.metrics import install_query_hooks
+from app.db.profiles import engine_kwargs, install_sqlite_pragmas
 
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(settings.DATABASE_URL, echo=False, connect_args=connect_args)
+engine = create_engine(settings.DATABASE_URL, echo=False, **engine_kwargs(settings.DATABASE_URL))
+install_sqlite_pragmas(engine)
+install_query_hooks(engine)
 
 def get_session():
     with Session(engine) as session:
         yield session
 
+# Columns added to existing tables after their creation -> statement filling them in
+_BACKFILL = {
+    ("listing", "report_count"): "UPDATE listing SET report_count = "
+                                 "(SELECT count(*) FROM report WHERE report.listing_id = listing.id AND NOT report.resolved)",
+}
+
+# Unique indexes added to existing tables -> statements removing rows that would violate them
+_DEDUPE = {
+    "ix_searchalert_saved_search_id_listing_id": (
+        "DELETE FROM searchalert WHERE id NOT IN "
+        "(SELECT min(id) FROM searchalert GROUP BY saved_search_id, listing_id)",
+    ),
+    # later duplicates of an open report are resolved (kept as history) and the counts recomputed
+    "ux_report_listing_id_reporter_id_open": (
+        "UPDATE report SET resolved = true WHERE NOT resolved AND reporter_id IS NOT NULL AND id NOT IN "
+        "(SELECT min(id) FROM report WHERE NOT resolved AND reporter_id IS NOT NULL GROUP BY listing_id, reporter_id)",
+        _BACKFILL[("listing", "report_count")],
+    ),
+}
+
+def _add_column(conn, table, column):
+    preparer = conn.dialect.identifier_preparer
+    ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column.type.compile(conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    conn.execute(text(ddl))
+    if (table.name, column.name) in _BACKFILL:
+        conn.execute(text(_BACKFILL[table.name, column.name]))
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all only builds missing tables; bring existing ones up to date with newer columns and indexes
+    with engine.begin() as conn:
+        existing = inspect(conn)
+        for table in SQLModel.metadata.sorted_tables:
+            present = {c["name"] for c in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    _add_column(conn, table, column)
+            indexes = {i["name"] for i in existing.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    for statement in _DEDUPE.get(index.name, ()):
+                        conn.execute(text(statement))
+                    index.create(conn, checkfirst=True)
@@ -0,0 +1,202 @@
+"""
+Synthetic dataset generator for scale testing.
+
+Generates N users, M listings spread over every Category, chat rooms and
+messages with realistic text and price distributions. Seller activity, listing
+popularity (which listings get chat rooms) and room activity (which rooms get
+messages) follow Zipf-like skews, so a few power sellers and hot listings
+dominate like they do on a real campus. Output is fully determined by --seed.
+
+Rows are written with executemany bulk inserts in --batch-size chunks:
+    python -m app.db.synth_data --users 10000 --listings 1000000 --rooms 50000 --messages 500000 --seed 7
+    python -m app.db.synth_data --database-url sqlite:///./scale.sqlite3 --listings 100000
+"""
+
+import argparse
+import bisect
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, create_engine
+from app.models import User, Listing, Category, ChatRoom, Message
+from app.models.listing import ListingStatus
+
+# Fixed anchor so the same seed always produces the same timestamps.
+EPOCH = datetime(2025, 1, 1)
+
+FIRST_NAMES = ["Alex", "Sam", "Priya", "Wei", "Maria", "Jordan", "Aisha", "Diego", "Mei", "Noah", "Fatima", "Liam", "Ana", "Kenji", "Zoe", "Omar"]
+LAST_NAMES = ["Nguyen", "Patel", "Garcia", "Kim", "Smith", "Chen", "Lopez", "Singh", "Brown", "Ali", "Tanaka", "Rossi"]
+CONDITIONS = ["Like new", "Gently used", "Used", "Brand new, unopened", "Good condition", "Some wear"]
+LOCATIONS = ["Student Union", "Engineering Building", "MLK Library", "Dorm Exchange", "Clark Hall", "Sports Complex", "Science Hall", "Quad Central"]
+COURSES = ["cmpe202", "cmpe273", "cs146", "cs157a", "math42", "math71", "phys50", "chem1a", "bio30", "econ1a", "engl1b", "ee98"]
+
+# category -> (nouns, adjectives, median price, price spread (lognormal sigma))
+CATALOG: Dict[Category, tuple] = {
+    Category.textbooks: (["Textbook", "Lab Manual", "Study Guide", "Workbook", "Reader"], ["Intro to", "Advanced", "Applied", "Essentials of"], 40.0, 0.5),
+    Category.gadgets: (["Laptop", "Headphones", "Calculator", "Monitor", "Keyboard", "Tablet", "Speaker", "Mouse"], ["Wireless", "Gaming", "Portable", "4K", "Mechanical"], 120.0, 0.9),
+    Category.essentials: (["Desk Lamp", "Kettle", "Mini Fridge", "Fan", "Microwave", "Blanket", "Organizer"], ["LED", "Compact", "Quiet", "Dorm-size"], 30.0, 0.6),
+    Category.furniture: (["Desk", "Chair", "Bookshelf", "Futon", "Dresser", "Side Table"], ["Oak", "Ergonomic", "Folding", "IKEA", "White"], 60.0, 0.7),
+    Category.clothing: (["Hoodie", "Jacket", "Sneakers", "Jeans", "Sweater", "Cap"], ["University", "Vintage", "Winter", "Running"], 25.0, 0.6),
+    Category.sports: (["Bike", "Yoga Mat", "Tennis Racket", "Dumbbells", "Skateboard", "Basketball"], ["Mountain", "Adjustable", "Pro", "Non-slip"], 45.0, 0.9),
+    Category.none: (["Item", "Bundle", "Misc Lot", "Ticket"], ["Assorted", "Random", "Moving-out"], 15.0, 0.8),
+}
+MESSAGES = [
+    "Hi, is this still available?", "Would you take ${price}?", "Can I pick it up at {loc}?", "What condition is it in?",
+    "Sounds good, see you then!", "Sorry, it's already sold.", "Yes, still available.", "Can you do a bit lower?",
+    "I can meet tomorrow after class.", "Does it come with the charger?", "Thanks!", "Is the price negotiable?",
+]
+
+
+def zipf_picker(rng: random.Random, n: int, s: float = 1.1):
+    """Return a function drawing indexes in [0, n) with P(i) proportional to 1/(i+1)^s."""
+    cumulative = list(itertools.accumulate(1.0 / (i + 1) ** s for i in range(n)))
+    total = cumulative[-1]
+    return lambda: bisect.bisect_left(cumulative, rng.random() * total)
+
+
+def _insert_chunks(engine: Engine, table, rows, batch_size: int) -> int:
+    count = 0
+    for chunk in _chunked(rows, batch_size):
+        with engine.begin() as conn:
+            conn.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def _chunked(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _new_ids(engine: Engine, table, before: int) -> List[int]:
+    with engine.connect() as conn:
+        return list(conn.execute(select(table.c.id).where(table.c.id > before).order_by(table.c.id)).scalars())
+
+
+def _max_id(engine: Engine, table) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+
+
+def generate(engine: Engine, users: int, listings: int, rooms: int, messages: int, seed: int = 0, batch_size: int = 10000) -> Dict[str, int]:
+    from app.core.security import get_password_hash
+
+    rng = random.Random(seed)
+    SQLModel.metadata.create_all(engine)
+    user_t, listing_t, room_t, message_t = User.__table__, Listing.__table__, ChatRoom.__table__, Message.__table__
+    # bcrypt is slow on purpose; every synthetic account shares one hash of "password123".
+    password = get_password_hash("password123")
+
+    before = _max_id(engine, user_t)
+    user_rows = (
+        {
+            "email": f"synth{seed}.user{i}@univ.edu",
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "role": "admin" if i == 0 else ("buyer,seller" if rng.random() < 0.35 else "buyer"),
+            "hashed_password": password,
+        }
+        for i in range(users)
+    )
+    _insert_chunks(engine, user_t, user_rows, batch_size)
+    user_ids = _new_ids(engine, user_t, before)
+    if not user_ids:
+        return {"users": 0, "listings": 0, "rooms": 0, "messages": 0}
+
+    categories = list(CATALOG)
+    sellers = user_ids[:]
+    rng.shuffle(sellers)
+    pick_seller = zipf_picker(rng, len(sellers), s=1.05)
+
+    def listing_row(i: int) -> dict:
+        category = categories[i % len(categories)] if rng.random() < 0.3 else rng.choice(categories)
+        nouns, adjectives, median, sigma = CATALOG[category]
+        noun = rng.choice(nouns)
+        title = f"{rng.choice(adjectives)} {noun}"
+        if category == Category.textbooks:
+            title = f"{rng.choice(COURSES).upper()} {title}"
+        price = round(max(1.0, rng.lognormvariate(math.log(median), sigma)), 2)
+        status_roll = rng.random()
+        return {
+            "title": title,
+            "description": f"{rng.choice(CONDITIONS)} {noun.lower()}. Pickup near {rng.choice(LOCATIONS)}.",
+            "price": price,
+            "photo_url": None,
+            "location": rng.choice(LOCATIONS),
+            "category": category.name,
+            "status": (ListingStatus.approved if status_roll < 0.8 else ListingStatus.pending if status_roll < 0.95 else ListingStatus.rejected).name,
+            "is_sold": rng.random() < 0.1,
+            "created_at": EPOCH + timedelta(seconds=rng.randrange(365 * 86400)),
+            "seller_id": sellers[pick_seller()],
+        }
+
+    before = _max_id(engine, listing_t)
+    _insert_chunks(engine, listing_t, (listing_row(i) for i in range(listings)), batch_size)
+    listing_ids = _new_ids(engine, listing_t, before) if rooms else []
+
+    room_ids: List[int] = []
+    if listing_ids and rooms:
+        with engine.connect() as conn:
+            seller_of = dict(conn.execute(select(listing_t.c.id, listing_t.c.seller_id).where(listing_t.c.id >= listing_ids[0])).all())
+        pick_listing = zipf_picker(rng, len(listing_ids), s=1.2)
+        # Shuffle which listings are "hot" so popularity is not correlated with insert order.
+        hot_order = listing_ids[:]
+        rng.shuffle(hot_order)
+
+        def room_row(_):
+            listing_id = hot_order[pick_listing()]
+            created = EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+            return {"buyer_id": rng.choice(user_ids), "seller_id": seller_of[listing_id], "listing_id": listing_id,
+                    "created_at": created, "updated_at": created, "last_message": None}
+
+        before = _max_id(engine, room_t)
+        _insert_chunks(engine, room_t, (room_row(i) for i in range(rooms)), batch_size)
+        room_ids = _new_ids(engine, room_t, before)
+
+    if room_ids and messages:
+        with engine.connect() as conn:
+            room_info = {r.id: r for r in conn.execute(select(room_t.c.id, room_t.c.buyer_id, room_t.c.seller_id, room_t.c.created_at).where(room_t.c.id >= room_ids[0]))}
+        pick_room = zipf_picker(rng, len(room_ids), s=1.1)
+
+        def message_row(_):
+            room = room_info[room_ids[pick_room()]]
+            text = rng.choice(MESSAGES).format(price=rng.randrange(5, 200), loc=rng.choice(LOCATIONS))
+            return {"room_id": room.id, "sender_id": rng.choice((room.buyer_id, room.seller_id)), "content": text,
+                    "sent_at": room.created_at + timedelta(seconds=rng.randrange(30 * 86400))}
+
+        _insert_chunks(engine, message_t, (message_row(i) for i in range(messages)), batch_size)
+
+    return {"users": len(user_ids), "listings": listings, "rooms": len(room_ids), "messages": messages if room_ids else 0}
+
+
+def main():
+    from app.core.config import settings
+    from app.db.profiles import engine_kwargs, install_sqlite_pragmas
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic marketplace dataset")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--listings", type=int, default=10000)
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, **engine_kwargs(args.database_url))
+    install_sqlite_pragmas(engine)
+    start = time.perf_counter()
+    counts = generate(engine, args.users, args.listings, args.rooms, args.messages, seed=args.seed, batch_size=args.batch_size)
+    print(f"Generated {counts} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
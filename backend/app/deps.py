@@ -3,14 +3,15 @@ from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.core.security import decode_token
 from app.models.user import User, Role
-from app.db.session import get_session
-from sqlmodel import Session, select
+from app.db.async_session import get_async_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)) -> User:
     email = decode_token(token, settings.SECRET_KEY)
-    user = session.exec(select(User).where(User.email == email)).first()
+    user = (await session.exec(select(User).where(User.email == email))).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
@@ -1,44 +1,134 @@
-from fastapi import FastAPI, Depends, WebSocket, WebSocketDisconnect
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from typing import Optional
+from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.db.session import create_db_and_tables
-from app.db.seed_data import run as seed_db
-from app.routers import auth, users, listings, chat, admin, search
+from app.core import metrics, query_profiler
+from app.db.read_routing import WriteFenceMiddleware
+from app.routers import auth, users, listings, chat, admin, search, saved_searches, reports
 from app.services.chat_manager import manager
+from app.services import percolator, similar_listings
+from app.db.async_session import get_async_session
+from app.deps import get_current_user
+from app.services.chat_archive import run_retention_loop
+
+logger = logging.getLogger(__name__)
+
+# uvicorn only configures its own loggers; give the app's ("app.*") a stderr
+# handler unless the host already set up logging.
+if not logging.getLogger().handlers and not logging.getLogger("app").handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+    logging.getLogger("app").addHandler(_handler)
+    logging.getLogger("app").setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
 
 app = FastAPI(title="Campus Marketplace API", version="0.1.0")
 
+app.add_middleware(query_profiler.QueryProfilerMiddleware)
+app.add_middleware(WriteFenceMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Write-Fence", "X-Next-Cursor"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Static file serving for uploaded images (local dev)
-app.mount("/media", StaticFiles(directory=settings.MEDIA_DIR), name="media")
+# check_dir=False: the directory is created by the first upload, not at import
+app.mount("/media", StaticFiles(directory=settings.MEDIA_DIR, check_dir=False), name="media")
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(listings.router, prefix="/listings", tags=["Listings"])
 app.include_router(chat.router, prefix="/chat", tags=["Chat"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(search.router, prefix="/search", tags=["Search"])
+app.include_router(saved_searches.router, prefix="/saved-searches", tags=["Saved searches"])
+
+_import_seconds = time.perf_counter() - _import_started
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition: HTTP/DB/LLM metrics plus live chat gauges"""
+    gauges = {f"chat_{name}": value for name, value in manager.gauges().items()}
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/queries", include_in_schema=False)
+def get_query_ledgers(limit: int = 20):
+    """Query ledgers of the most recent requests (QUERY_PROFILER mode only), newest first"""
+    if not settings.QUERY_PROFILER:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return list(reversed(query_profiler.recent))[:limit]
 
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
-    seed_db()
+    # Schema creation and seeding are explicit (python -m app.db.manage ...) so
+    # workers and test clients boot without touching the database.
+    profile = [("import app.main", _import_seconds)]
+    if settings.CREATE_TABLES_ON_STARTUP or settings.SEED_ON_STARTUP:
+        started = time.perf_counter()
+        from app.db.session import create_db_and_tables
+        create_db_and_tables()
+        profile.append(("create tables", time.perf_counter() - started))
+    if settings.SEED_ON_STARTUP:
+        started = time.perf_counter()
+        from app.db.seed_data import run as seed_db
+        seed_db()
+        profile.append(("seed", time.perf_counter() - started))
+    if settings.CHAT_RETENTION_DAYS > 0:
+        asyncio.get_running_loop().create_task(run_retention_loop())
+    if settings.SIMILAR_REFRESH_SECONDS > 0:
+        asyncio.get_running_loop().create_task(similar_listings.run_refresh_loop())
+    if settings.DEBUG:
+        total = sum(seconds for _, seconds in profile)
+        logger.info("Startup profile: %s (total %.1f ms)", ", ".join(f"{step} {seconds * 1000:.1f} ms" for step, seconds in profile), total * 1000)
 
 # WebSocket endpoint for chat
+# Protocol details (resume_after, batch, encoding) are documented in app/services/chat_manager.py
 @app.websocket("/ws/chat/{room_id}")
-async def websocket_endpoint(websocket: WebSocket, room_id: str):
-    await manager.connect(room_id, websocket)
+async def websocket_endpoint(websocket: WebSocket, room_id: str, resume_after: Optional[int] = None, batch: bool = False, encoding: str = "json",
+                             token: Optional[str] = None, session: AsyncSession = Depends(get_async_session)):
+    user_id = None
+    if token is not None:
+        try:
+            user_id = (await get_current_user(token, session)).id
+        except HTTPException:
+            await websocket.close(code=1008)
+            return
+    await session.close()  # do not hold a connection for the socket's lifetime
+    conn = await manager.connect(room_id, websocket, encoding=encoding, batch=batch, resume_after=resume_after, user_id=user_id)
+    try:
+        while True:
+            data = await conn.receive()
+            await manager.handle(room_id, conn, data)
+    except WebSocketDisconnect:
+        await manager.disconnect(room_id, conn)
+
+# Saved-search alerts for the token's user, pushed as {"type": "alert", "alert": {...}}
+# as matching listings are approved (see app/services/percolator.py)
+@app.websocket("/ws/alerts")
+async def alerts_websocket(websocket: WebSocket, token: str, session: AsyncSession = Depends(get_async_session)):
+    try:
+        user = await get_current_user(token, session)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await session.close()  # do not hold a connection for the socket's lifetime
+    await websocket.accept()
+    percolator.hub.connect(user.id, websocket)
     try:
         while True:
-            data = await websocket.receive_json()
-            await manager.broadcast(room_id, data)
+            await websocket.receive_text()  # keepalives; nothing else is expected
     except WebSocketDisconnect:
-        manager.disconnect(room_id, websocket)
+        percolator.hub.disconnect(user.id, websocket)
@@ -1,7 +1,10 @@
 from app.models.user import User, Role
 from app.models.listing import Listing, Category
 from app.models.message import Message
+from app.models.message_archive import MessageArchive
 from app.models.chat_room import ChatRoom
 from app.models.report import Report
+from app.models.listing_neighbor import ListingNeighbor
+from app.models.saved_search import SavedSearch, SearchAlert
 
-__all__ = ["User", "Role", "Listing", "Category", "Message", "ChatRoom", "Report"]
+__all__ = ["User", "Role", "Listing", "Category", "Message", "MessageArchive", "ChatRoom", "Report", "ListingNeighbor", "SavedSearch", "SearchAlert"]
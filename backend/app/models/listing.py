@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index
 from typing import Optional, List
 from enum import Enum
 from datetime import datetime
@@ -18,6 +18,11 @@ class ListingStatus(str, Enum):
     rejected = "rejected"
 
 class Listing(SQLModel, table=True):
+    # Keyset pagination of the admin lists: newest first, optionally per status
+    __table_args__ = (
+        Index("ix_listing_created_at_id", "created_at", "id"),
+        Index("ix_listing_status_created_at_id", "status", "created_at", "id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str
@@ -27,6 +32,8 @@ class Listing(SQLModel, table=True):
     category: Category = Field(default=Category.none)
     status: ListingStatus = Field(default=ListingStatus.pending)
     is_sold: bool = Field(default=False)
+    # Unresolved reports, kept in step by POST /reports and report resolution
+    report_count: int = Field(default=0, index=True, sa_column_kwargs={"server_default": "0"})
     created_at: datetime = Field(default_factory=datetime.utcnow)
     seller_id: int = Field(foreign_key="user.id")
     seller: "User" = Relationship(back_populates="listings")
@@ -0,0 +1,10 @@
+from sqlmodel import SQLModel, Field
+
+class ListingNeighbor(SQLModel, table=True):
+    """One precomputed "similar listing": row `rank` (0 = best) of `listing_id`'s top-k."""
+    # No foreign keys: rows are derived data, rewritten by the neighbor job after
+    # listing deletes, and reads join back to `listing` anyway.
+    listing_id: int = Field(primary_key=True)
+    rank: int = Field(primary_key=True)
+    neighbor_id: int = Field(index=True)
+    score: float
@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field, Column, LargeBinary
+from typing import Optional
+from datetime import datetime
+
+class MessageArchive(SQLModel, table=True):
+    """A compressed segment of old chat messages moved out of the hot `message` table."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    room_id: int = Field(foreign_key="chatroom.id", index=True)
+    first_message_id: int
+    last_message_id: int = Field(index=True)
+    first_sent_at: datetime
+    last_sent_at: datetime
+    message_count: int
+    codec: str = Field(default="gzip")  # "gzip" or "zstd"
+    payload: bytes = Field(sa_column=Column(LargeBinary, nullable=False))  # compressed NDJSON
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,11 +1,22 @@
-from sqlmodel import SQLModel, Field
+from sqlalchemy import text
+from sqlmodel import SQLModel, Field, Index
 from typing import Optional
 from datetime import datetime
 
 class Report(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_report_created_at_id", "created_at", "id"),  # admin list, newest first
+        Index("ix_report_listing_id_resolved", "listing_id", "resolved"),  # unresolved reports per listing
+        # one open report per (listing, reporter); closes the race in POST /reports
+        Index("ux_report_listing_id_reporter_id_open", "listing_id", "reporter_id", unique=True,
+              sqlite_where=text("NOT resolved"), postgresql_where=text("NOT resolved")),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
-    listing_id: int
-    reporter_id: int
+    # SQLite does not enforce these ON DELETE actions (foreign_keys is off, and report
+    # tables predating them have no FKs), so the delete routes clean up reports themselves.
+    listing_id: int = Field(foreign_key="listing.id", ondelete="CASCADE")
+    # Reports outlive their reporter's account as moderation history
+    reporter_id: Optional[int] = Field(default=None, foreign_key="user.id", ondelete="SET NULL", index=True)
     reason: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     resolved: bool = Field(default=False)
@@ -0,0 +1,24 @@
+from sqlmodel import SQLModel, Field, Column, JSON, Index
+from typing import Optional
+from datetime import datetime
+
+class SavedSearch(SQLModel, table=True):
+    """A buyer's standing query, stored as parsed `nl_to_query` filters."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    question: str
+    filters: dict = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class SearchAlert(SQLModel, table=True):
+    """A listing that matched a saved search; the user's alerts inbox."""
+    __table_args__ = (
+        # one alert per (saved search, listing); concurrent percolations skip conflicts
+        Index("ix_searchalert_saved_search_id_listing_id", "saved_search_id", "listing_id", unique=True),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    saved_search_id: int
+    listing_id: int = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    read: bool = Field(default=False)
@@ -1,22 +1,32 @@
+from collections import Counter
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
-from sqlalchemy import func
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Callable, List, Literal, Optional
+from sqlalchemy import delete, func, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.async_session import get_async_session
+from app.db.read_routing import get_read_session
 from app.deps import require_role
 from app.models.user import Role, User
 from app.models.report import Report
+from app.models.saved_search import SavedSearch, SearchAlert
 from app.models.listing import Listing, ListingStatus
-from app.schemas.report import ReportPublic
+from app.schemas.report import ReportPublic, ReportedListing
 from app.schemas.user import UserPublic
 from app.schemas.listing import ListingPublic
-from app.schemas.admin import AdminSummary, ListingStatusUpdate
+from app.schemas.admin import AdminSummary, ListingStatusUpdate, BulkListingAction, BulkListingOutcome, BulkListingResult
+from app.core.config import settings
+from app.services.bulk_delete import delete_where, delete_by_id
+from app.services import listing_events, percolator
+from app.services.pagination import keyset_page, iter_csv
 
 router = APIRouter()
 
 
-def _scalar_count(session: Session, stmt):
-    result = session.exec(stmt).one()
+async def _scalar_count(session: AsyncSession, stmt):
+    result = (await session.exec(stmt)).one()
     if isinstance(result, tuple):
         return result[0] or 0
     return result or 0
@@ -38,15 +48,15 @@ def _to_listing_public(listing: Listing) -> ListingPublic:
 
 
 @router.get("/summary", response_model=AdminSummary)
-def get_summary(session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    total_users = _scalar_count(session, select(func.count()).select_from(User))
-    total_sellers = _scalar_count(session, select(func.count()).select_from(User).where(User.role == Role.seller))
-    total_admins = _scalar_count(session, select(func.count()).select_from(User).where(User.role == Role.admin))
-    total_listings = _scalar_count(session, select(func.count()).select_from(Listing))
-    pending_listings = _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.status == ListingStatus.pending))
-    approved_listings = _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.status == ListingStatus.approved))
-    rejected_listings = _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.status == ListingStatus.rejected))
-    sold_items = _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.is_sold == True))
+async def get_summary(session: AsyncSession = Depends(get_read_session), user=Depends(require_role(Role.admin))):
+    total_users = await _scalar_count(session, select(func.count()).select_from(User))
+    total_sellers = await _scalar_count(session, select(func.count()).select_from(User).where(User.role == Role.seller))
+    total_admins = await _scalar_count(session, select(func.count()).select_from(User).where(User.role == Role.admin))
+    total_listings = await _scalar_count(session, select(func.count()).select_from(Listing))
+    pending_listings = await _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.status == ListingStatus.pending))
+    approved_listings = await _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.status == ListingStatus.approved))
+    rejected_listings = await _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.status == ListingStatus.rejected))
+    sold_items = await _scalar_count(session, select(func.count()).select_from(Listing).where(Listing.is_sold == True))
 
     return AdminSummary(
         total_users=total_users,
@@ -61,8 +71,37 @@ def get_summary(session: Session = Depends(__import__("app.db.session", fromlist
     )
 
 
+Format = Literal["json", "csv"]
+LISTING_CSV = ("id", "title", "description", "price", "category", "status", "is_sold", "photo_url", "location", "seller_id", "created_at")
+
+
+def _listing_csv_row(l: Listing):
+    return (l.id, l.title, l.description, l.price, l.category.value, l.status.value, l.is_sold, l.photo_url, l.location, l.seller_id, l.created_at.isoformat())
+
+
+def _page_limit(limit: Optional[int]) -> int:
+    return min(limit or settings.ADMIN_PAGE_SIZE, settings.ADMIN_PAGE_MAX)
+
+
+async def _paginate(session: AsyncSession, response: Response, stmt, keys, cursor: Optional[str], limit: Optional[int], fmt: str,
+                    to_public: Callable, filename: str, header, to_row: Callable, descending: bool = True):
+    """
+    A keyset page of `stmt` (next cursor in X-Next-Cursor), or with
+    format=csv a streamed export of every matching row.
+    """
+    if fmt == "csv":
+        return StreamingResponse(iter_csv(session, stmt, keys, header, to_row, descending), media_type="text/csv",
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    rows, next_cursor = await keyset_page(session, stmt, keys, cursor, _page_limit(limit), descending)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [to_public(r) for r in rows]
+
+
 @router.get("/listings", response_model=List[ListingPublic])
-def list_all_listings(status: Optional[str] = None, seller_id: Optional[int] = None, q: Optional[str] = None, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
+async def list_all_listings(response: Response, status: Optional[str] = None, seller_id: Optional[int] = None, q: Optional[str] = None,
+                            cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1), fmt: Format = Query("json", alias="format"),
+                            session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
     stmt = select(Listing)
     if status:
         if status not in [s.value for s in ListingStatus]:
@@ -73,13 +112,61 @@ def list_all_listings(status: Optional[str] = None, seller_id: Optional[int] = N
     if q:
         like = f"%{q.lower()}%"
         stmt = stmt.where((Listing.title.ilike(like)) | (Listing.description.ilike(like)))
-    listings = session.exec(stmt.order_by(Listing.created_at.desc())).all()
-    return [_to_listing_public(l) for l in listings]
+    return await _paginate(session, response, stmt, (Listing.created_at, Listing.id), cursor, limit, fmt,
+                           _to_listing_public, "listings.csv", LISTING_CSV, _listing_csv_row)
+
+
+# action -> (column values, "already in that state" test on (status, is_sold))
+_BULK_ACTIONS = {
+    "approve": ({"status": ListingStatus.approved}, lambda status, sold: status == ListingStatus.approved),
+    "reject": ({"status": ListingStatus.rejected}, lambda status, sold: status == ListingStatus.rejected),
+    "sold": ({"is_sold": True}, lambda status, sold: sold),
+}
+
+
+@router.patch("/listings/bulk", response_model=BulkListingResult)
+async def bulk_moderate_listings(payload: BulkListingAction, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    """
+    Apply one action to many listings with a single set-based UPDATE (or
+    DELETE) and one transaction, instead of a request per listing. Each id
+    is reported as updated, unchanged (already in that state), deleted or
+    not_found. Search indexes, feeds and alerts are refreshed by one event.
+    """
+    ids = list(dict.fromkeys(payload.ids))
+    if len(ids) > settings.ADMIN_BULK_MAX_IDS:
+        raise HTTPException(422, f"At most {settings.ADMIN_BULK_MAX_IDS} ids per request")
+    current = {i: (status, sold) for i, status, sold in (await session.exec(
+        select(Listing.id, Listing.status, Listing.is_sold).where(Listing.id.in_(ids))
+    )).all()}
+
+    if payload.action == "delete":
+        changed, outcome = list(current), "deleted"
+        if changed:
+            await session.exec(delete(Report).where(Report.listing_id.in_(changed)))
+            await session.exec(delete(Listing).where(Listing.id.in_(changed)))
+            await session.commit()
+            listing_events.publish("delete", ids=changed)
+    else:
+        values, already = _BULK_ACTIONS[payload.action]
+        changed, outcome = [i for i, (status, sold) in current.items() if not already(status, sold)], "updated"
+        if changed:
+            await session.exec(update(Listing).where(Listing.id.in_(changed)).values(**values))
+            await session.commit()
+            listings = (await session.exec(select(Listing).where(Listing.id.in_(changed)))).all()
+            listing_events.publish("upsert", listings)
+            await percolator.percolate(session, listings)
+
+    changed = set(changed)
+    results = [
+        BulkListingOutcome(id=i, outcome=outcome if i in changed else "unchanged" if i in current else "not_found")
+        for i in ids
+    ]
+    return BulkListingResult(action=payload.action, counts=dict(Counter(r.outcome for r in results)), results=results)
 
 
 @router.patch("/listings/{listing_id}", response_model=ListingPublic)
-def update_listing_status(listing_id: int, payload: ListingStatusUpdate, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    listing = session.get(Listing, listing_id)
+async def update_listing_status(listing_id: int, payload: ListingStatusUpdate, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    listing = await session.get(Listing, listing_id)
     if not listing:
         raise HTTPException(404, "Listing not found")
     data = payload.model_dump(exclude_unset=True)
@@ -88,64 +175,100 @@ def update_listing_status(listing_id: int, payload: ListingStatusUpdate, session
     if "is_sold" in data and data["is_sold"] is not None:
         listing.is_sold = data["is_sold"]
     session.add(listing)
-    session.commit()
-    session.refresh(listing)
+    await session.commit()
+    await session.refresh(listing)
+    listing_events.publish("upsert", [listing])
+    await percolator.percolate(session, [listing])
     return _to_listing_public(listing)
 
 
 @router.delete("/listings/{listing_id}", response_model=dict)
-def delete_listing(listing_id: int, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    listing = session.get(Listing, listing_id)
-    if not listing:
+async def delete_listing(listing_id: int, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    await session.exec(delete(Report).where(Report.listing_id == listing_id))
+    if not await session.run_sync(delete_by_id, Listing, listing_id):
         raise HTTPException(404, "Listing not found")
-    session.delete(listing)
-    session.commit()
+    listing_events.publish("delete", ids=[listing_id])
     return {"ok": True}
 
 @router.get("/reports", response_model=List[ReportPublic])
-def list_reports(session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    reports = session.exec(select(Report).order_by(Report.created_at.desc())).all()
-    return [ReportPublic(id=r.id, listing_id=r.listing_id, reporter_id=r.reporter_id, reason=r.reason, resolved=r.resolved) for r in reports]
+async def list_reports(response: Response, cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1), fmt: Format = Query("json", alias="format"),
+                       session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    return await _paginate(
+        session, response, select(Report), (Report.created_at, Report.id), cursor, limit, fmt,
+        lambda r: ReportPublic(id=r.id, listing_id=r.listing_id, reporter_id=r.reporter_id, reason=r.reason, resolved=r.resolved),
+        "reports.csv", ("id", "listing_id", "reporter_id", "reason", "resolved", "created_at"),
+        lambda r: (r.id, r.listing_id, r.reporter_id, r.reason, r.resolved, r.created_at.isoformat()),
+    )
+
+@router.get("/reports/top", response_model=List[ReportedListing])
+async def top_reported_listings(limit: int = Query(20, ge=1, le=100), session: AsyncSession = Depends(get_read_session), user=Depends(require_role(Role.admin))):
+    """Listings with the most unresolved reports, read off the indexed report_count column"""
+    listings = (await session.exec(
+        select(Listing).where(Listing.report_count > 0).order_by(Listing.report_count.desc(), Listing.id).limit(limit)
+    )).all()
+    return [ReportedListing(listing=_to_listing_public(l), status=l.status.value, report_count=l.report_count) for l in listings]
 
 @router.patch("/reports/{report_id}/resolve", response_model=dict)
-def resolve_report(report_id: int, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    rep = session.get(Report, report_id)
+async def resolve_report(report_id: int, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    rep = await session.get(Report, report_id)
     if not rep: raise HTTPException(404, "Report not found")
-    rep.resolved = True
-    session.add(rep); session.commit()
+    if not rep.resolved:
+        rep.resolved = True
+        await session.exec(update(Listing).where(Listing.id == rep.listing_id, Listing.report_count > 0).values(report_count=Listing.report_count - 1))
+    session.add(rep); await session.commit()
     return {"ok": True}
 
 @router.get("/users", response_model=List[UserPublic])
-def list_users(session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    users = session.exec(select(User)).all()
-    return users
+async def list_users(response: Response, cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1), fmt: Format = Query("json", alias="format"),
+                     session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    return await _paginate(
+        session, response, select(User), (User.id,), cursor, limit, fmt,
+        lambda u: UserPublic(id=u.id, email=u.email, name=u.name, role=u.role),
+        "users.csv", ("id", "email", "name", "role"), lambda u: (u.id, u.email, u.name, u.role),
+        descending=False,
+    )
 
 @router.delete("/users/{user_id}", response_model=dict)
-def delete_user(user_id: int, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    user_to_delete = session.get(User, user_id)
-    if not user_to_delete:
+async def delete_user(user_id: int, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    # Remove the seller's listings with set-based deletes instead of letting the
+    # ORM cascade load every listing into the session first. No lookup beforehand:
+    # the user's own DELETE reports whether it existed. Reports on those listings
+    # go with them; the user's own reports stay as moderation history. Their
+    # alerts and saved searches go too, and leave the percolator index after commit.
+    await session.exec(delete(Report).where(Report.listing_id.in_(select(Listing.id).where(Listing.seller_id == user_id))))
+    await session.exec(update(Report).where(Report.reporter_id == user_id).values(reporter_id=None))
+    await session.exec(delete(SearchAlert).where(SearchAlert.user_id == user_id))
+    searches = (await session.exec(delete(SavedSearch).where(SavedSearch.user_id == user_id).returning(SavedSearch.id))).scalars().all()
+    purged: List[int] = []
+    if await session.run_sync(delete_where, Listing, Listing.seller_id == user_id, deleted_ids=purged):
+        listing_events.publish("reset", ids=purged)
+    if not await session.run_sync(delete_by_id, User, user_id):
         raise HTTPException(404, "User not found")
-    session.delete(user_to_delete)
-    session.commit()
+    for search_id in searches:
+        percolator.on_deleted(search_id)
     return {"ok": True}
 
 @router.get("/listings/pending", response_model=List[ListingPublic])
-def list_pending_listings(session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    listings = session.exec(select(Listing).where(Listing.status == ListingStatus.pending).order_by(Listing.created_at.desc())).all()
-    return [_to_listing_public(l) for l in listings]
+async def list_pending_listings(response: Response, cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1), fmt: Format = Query("json", alias="format"),
+                                session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    return await _paginate(session, response, select(Listing).where(Listing.status == ListingStatus.pending), (Listing.created_at, Listing.id),
+                           cursor, limit, fmt, _to_listing_public, "pending-listings.csv", LISTING_CSV, _listing_csv_row)
 
 @router.patch("/listings/{listing_id}/approve", response_model=dict)
-def approve_listing(listing_id: int, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    listing = session.get(Listing, listing_id)
+async def approve_listing(listing_id: int, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    listing = await session.get(Listing, listing_id)
     if not listing: raise HTTPException(404, "Listing not found")
     listing.status = ListingStatus.approved
-    session.add(listing); session.commit()
+    session.add(listing); await session.commit()
+    listing_events.publish("upsert", [listing])
+    await percolator.percolate(session, [listing])
     return {"ok": True}
 
 @router.patch("/listings/{listing_id}/reject", response_model=dict)
-def reject_listing(listing_id: int, session: Session = Depends(__import__("app.db.session", fromlist=["get_session"]).get_session), user=Depends(require_role(Role.admin))):
-    listing = session.get(Listing, listing_id)
+async def reject_listing(listing_id: int, session: AsyncSession = Depends(get_async_session), user=Depends(require_role(Role.admin))):
+    listing = await session.get(Listing, listing_id)
     if not listing: raise HTTPException(404, "Listing not found")
     listing.status = ListingStatus.rejected
-    session.add(listing); session.commit()
+    session.add(listing); await session.commit()
+    listing_events.publish("upsert", [listing])
     return {"ok": True}
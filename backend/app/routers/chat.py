@@ -1,11 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from sqlmodel import Session, select
-from app.db.session import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.async_session import get_async_session, iterate_sync
+from app.db.read_routing import get_read_session
 from app.deps import get_current_user
 from app.models.user import User
 from app.models.chat_room import ChatRoom
 from app.models.message import Message
+from app.services.bulk_delete import delete_where, delete_by_id
+from app.services.chat_export import stream_history_ndjson
+from app.services.chat_archive import load_room_page, iter_archived_messages, delete_room_archive
+from app.services.chat_manager import manager
 from app.schemas.chat import (
     ChatRoomCreate, ChatRoomPublic, ChatRoomWithMessages,
     MessageCreate, MessagePublic, ChatHistory
@@ -15,63 +22,66 @@ from datetime import datetime
 router = APIRouter(tags=["chat"])
 
 @router.get("/rooms", response_model=List[ChatRoomPublic])
-def get_user_chat_rooms(
-    session: Session = Depends(get_session)
+async def get_user_chat_rooms(
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get all chat rooms"""
-    rooms = session.exec(
+    rooms = (await session.exec(
         select(ChatRoom).order_by(ChatRoom.updated_at.desc())
-    ).all()
+    )).all()
     return rooms
 
+@router.get("/ws/stats", response_model=dict)
+async def get_ws_stats():
+    """Live WebSocket gauges: open connections, active rooms, online users"""
+    return manager.gauges()
+
+@router.get("/rooms/{room_id}/presence", response_model=dict)
+async def get_room_presence(room_id: int):
+    """Users with at least one live socket in the room (from memory, no DB access)"""
+    return {"room_id": room_id, "online": manager.online_users(str(room_id))}
+
 @router.get("/rooms/{room_id}", response_model=ChatRoomPublic)
-def get_chat_room(
+async def get_chat_room(
     room_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get specific chat room"""
-    room = session.get(ChatRoom, room_id)
+    room = await session.get(ChatRoom, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Chat room not found")
     
     return room
 
 @router.get("/rooms/{room_id}/messages", response_model=List[MessagePublic])
-def get_room_messages(
+async def get_room_messages(
     room_id: int,
     limit: int = 50,
     offset: int = 0,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get messages for a chat room (paginated)"""
-    room = session.get(ChatRoom, room_id)
+    room = await session.get(ChatRoom, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Chat room not found")
     
-    messages = session.exec(
-        select(Message)
-        .where(Message.room_id == room_id)
-        .order_by(Message.sent_at.desc())
-        .offset(offset)
-        .limit(limit)
-    ).all()
-    
-    # Return in chronological order
-    return list(reversed(messages))
+    # Pages through the hot table first, then into archived segments;
+    # returned in chronological order
+    return await session.run_sync(load_room_page, room_id, limit, offset)
 
 @router.post("/rooms", response_model=ChatRoomPublic)
-def get_or_create_room(
+async def get_or_create_room(
     payload: ChatRoomCreate,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Get existing or create new chat room between buyer and seller"""
     # Check if room already exists
-    existing_room = session.exec(
+    existing_room = (await session.exec(
         select(ChatRoom).where(
             (ChatRoom.listing_id == payload.listing_id) &
             (ChatRoom.seller_id == payload.seller_id)
         )
-    ).first()
+    )).first()
     
     if existing_room:
         return existing_room
@@ -83,20 +93,20 @@ def get_or_create_room(
         listing_id=payload.listing_id
     )
     session.add(new_room)
-    session.commit()
-    session.refresh(new_room)
+    await session.commit()
+    await session.refresh(new_room)
     
     return new_room
 
 @router.post("/rooms/{room_id}/messages", response_model=MessagePublic)
-def send_message(
+async def send_message(
     room_id: int,
     payload: MessageCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """Send a message in a chat room"""
-    room = session.get(ChatRoom, room_id)
+    room = await session.get(ChatRoom, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Chat room not found")
     
@@ -113,38 +123,53 @@ def send_message(
     room.updated_at = datetime.utcnow()
     session.add(room)
     
-    session.commit()
-    session.refresh(message)
+    await session.commit()
+    await session.refresh(message)
     
     return message
 
 @router.delete("/rooms/{room_id}")
-def delete_chat_room(
+async def delete_chat_room(
     room_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Delete a chat room"""
-    room = session.get(ChatRoom, room_id)
+    room = await session.get(ChatRoom, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Chat room not found")
     
-    # Delete all messages in the room first
-    messages = session.exec(select(Message).where(Message.room_id == room_id)).all()
-    for msg in messages:
-        session.delete(msg)
+    # Delete all messages in the room first, in bounded set-based batches
+    await session.run_sync(delete_where, Message, Message.room_id == room_id)
+    await session.run_sync(delete_room_archive, room_id)
     
     # Delete room
-    session.delete(room)
-    session.commit()
+    await session.run_sync(delete_by_id, ChatRoom, room_id)
     
     return {"message": "Chat room deleted successfully"}
 
 # Legacy endpoint for backward compatibility
 @router.get("/rooms/{room_id}/history", response_model=ChatHistory)
-def get_history(room_id: int, session: Session = Depends(get_session)):
-    room = session.get(ChatRoom, room_id)
+async def get_history(room_id: int, session: AsyncSession = Depends(get_read_session)):
+    room = await session.get(ChatRoom, room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Chat room not found")
+    
+    archived = [m async for segment in iterate_sync(session, iter_archived_messages, room_id) for m in segment]
+    msgs = (await session.exec(select(Message).where(Message.room_id==room_id).order_by(Message.sent_at.asc()))).all()
+    return ChatHistory(room_id=room_id, messages=archived + [m.model_dump() for m in msgs])
+
+@router.get("/rooms/{room_id}/history/export")
+async def export_history(room_id: int, gzip: bool = False, session: AsyncSession = Depends(get_read_session)):
+    """Stream the full room history as NDJSON (optionally gzip-encoded) in constant memory"""
+    room = await session.get(ChatRoom, room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Chat room not found")
     
-    msgs = session.exec(select(Message).where(Message.room_id==room_id).order_by(Message.sent_at.asc())).all()
-    return ChatHistory(room_id=room_id, messages=msgs)
+    headers = {"Content-Disposition": f'attachment; filename="room-{room_id}-history.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        iterate_sync(session, stream_history_ndjson, room_id, gzip),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
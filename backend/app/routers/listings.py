@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
-from sqlmodel import Session, select
-from app.db.session import get_session
+from sqlalchemy import delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.async_session import get_async_session
+from app.db.read_routing import get_read_session
 from app.deps import get_current_user, require_role
 from app.models.user import Role, User
 from app.models.listing import Listing, Category, ListingStatus
-from app.schemas.listing import ListingCreate, ListingUpdate, ListingPublic, ListingWithSeller, SellerInfo
+from app.models.listing_neighbor import ListingNeighbor
+from app.models.report import Report
+from app.schemas.listing import ListingCreate, ListingUpdate, ListingPublic, ListingWithSeller, SellerInfo, BulkImportResult, SimilarListing
 from app.core.config import settings
+from app.services.bulk_delete import delete_by_id
+from app.services import listing_events, listing_feed, percolator
+from app.services.listing_import import iter_lines, iter_csv_records, iter_ndjson_records, import_listings
 import os, uuid, shutil
 
 router = APIRouter()
 
 @router.get("", response_model=List[ListingPublic])
-def list_listings(q: Optional[str] = None, category: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, seller_id: Optional[int] = None, status: Optional[str] = "approved", session: Session = Depends(get_session)):
+async def list_listings(q: Optional[str] = None, category: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, seller_id: Optional[int] = None, status: Optional[str] = "approved", session: AsyncSession = Depends(get_read_session)):
     stmt = select(Listing)
     if status:
         # If status is "all", don't filter by status (useful for admin or specific views)
@@ -30,17 +39,30 @@ def list_listings(q: Optional[str] = None, category: Optional[str] = None, min_p
         stmt = stmt.where(Listing.price <= max_price)
     if seller_id is not None:
         stmt = stmt.where(Listing.seller_id == seller_id)
-    items = session.exec(stmt.order_by(Listing.created_at.desc())).all()
+    items = (await session.exec(stmt.order_by(Listing.created_at.desc()))).all()
     return [ListingPublic(id=i.id, title=i.title, description=i.description, price=i.price, category=i.category.value, is_sold=i.is_sold, photo_url=i.photo_url, location=i.location, seller_id=i.seller_id) for i in items]
 
+@router.get("/stream")
+async def listing_stream(request: Request, last_event_id: Optional[str] = Query(None)):
+    """
+    Server-Sent Events feed of listing changes (`listing`, `sold`, `delete`,
+    `reset` events). Reconnects resume after the Last-Event-ID header, or
+    `?last_event_id=` for clients that cannot set headers.
+    """
+    resume = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(listing_feed.stream(resume), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.get("/{listing_id}", response_model=ListingWithSeller)
-def get_listing(listing_id: int, session: Session = Depends(get_session)):
-    listing = session.get(Listing, listing_id)
-    if not listing:
+async def get_listing(listing_id: int, session: AsyncSession = Depends(get_async_session)):
+    # Listing and seller in one round-trip
+    row = (await session.exec(
+        select(Listing, User).outerjoin(User, User.id == Listing.seller_id).where(Listing.id == listing_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Listing not found")
     
-    # Fetch seller information
-    seller = session.get(User, listing.seller_id)
+    listing, seller = row
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
     
@@ -59,37 +81,79 @@ def get_listing(listing_id: int, session: Session = Depends(get_session)):
         seller=seller_info
     )
 
+@router.get("/{listing_id}/similar", response_model=List[SimilarListing])
+async def similar(listing_id: int, limit: int = Query(default=5, ge=1, le=50), session: AsyncSession = Depends(get_read_session)):
+    """
+    Approved, unsold listings most like this one, best first: a single read
+    of the precomputed neighbor table, which a background job keeps current
+    (see app.services.similar_listings).
+    """
+    rows = (await session.exec(
+        select(Listing, ListingNeighbor.score)
+        .join(ListingNeighbor, ListingNeighbor.neighbor_id == Listing.id)
+        .where(ListingNeighbor.listing_id == listing_id, Listing.status == ListingStatus.approved, Listing.is_sold == False)  # noqa: E712
+        .order_by(ListingNeighbor.rank)
+        .limit(limit)
+    )).all()
+    return [SimilarListing(id=i.id, title=i.title, description=i.description, price=i.price, category=i.category.value, is_sold=i.is_sold, photo_url=i.photo_url, location=i.location, seller_id=i.seller_id, score=round(score, 4)) for i, score in rows]
+
 @router.post("", response_model=ListingPublic)
-def create_listing(payload: ListingCreate, session: Session = Depends(get_session)):
+async def create_listing(payload: ListingCreate, session: AsyncSession = Depends(get_async_session)):
     seller_id = payload.seller_id if payload.seller_id else 1
     listing = Listing(**payload.model_dump(exclude={"category", "seller_id"}), seller_id=seller_id, category=Category(payload.category))
-    session.add(listing); session.commit(); session.refresh(listing)
+    session.add(listing); await session.commit(); await session.refresh(listing)
+    listing_events.publish("upsert", [listing])
+    await percolator.percolate(session, [listing])
     return ListingPublic(id=listing.id, title=listing.title, description=listing.description, price=listing.price, category=listing.category.value, is_sold=listing.is_sold, photo_url=listing.photo_url, location=listing.location, seller_id=listing.seller_id)
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_listings(request: Request, user: User = Depends(require_role(Role.seller)), session: AsyncSession = Depends(get_async_session)):
+    """
+    Import many listings from a streamed CSV (text/csv, header row required) or
+    NDJSON (application/x-ndjson) body. Each row is validated like
+    POST /listings; invalid rows are reported without aborting the import.
+    Only admins may set seller_id per row; sellers always import as themselves.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    lines = iter_lines(request.stream())
+    if content_type in ("text/csv", "application/csv"):
+        records = iter_csv_records(lines)
+    elif content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        records = iter_ndjson_records(lines)
+    else:
+        raise HTTPException(415, "Use text/csv or application/x-ndjson")
+    result = await import_listings(session, records, default_seller_id=user.id, allow_seller_override=user.role == Role.admin)
+    inserted_ids = result.pop("ids")
+    if inserted_ids:
+        listing_events.publish("reset", ids=inserted_ids)
+    return result
+
 @router.patch("/{listing_id}", response_model=ListingPublic)
-def update_listing(listing_id: int, payload: ListingUpdate, session: Session = Depends(get_session)):
-    listing = session.get(Listing, listing_id)
+async def update_listing(listing_id: int, payload: ListingUpdate, session: AsyncSession = Depends(get_async_session)):
+    listing = await session.get(Listing, listing_id)
     if not listing: raise HTTPException(404, "Listing not found")
     data = payload.model_dump(exclude_unset=True)
     if "category" in data and data["category"]:
         data["category"] = Category(data["category"])
     for k,v in data.items(): setattr(listing, k, v)
-    session.add(listing); session.commit(); session.refresh(listing)
+    session.add(listing); await session.commit(); await session.refresh(listing)
+    listing_events.publish("upsert", [listing])
     return ListingPublic(id=listing.id, title=listing.title, description=listing.description, price=listing.price, category=listing.category.value, is_sold=listing.is_sold, photo_url=listing.photo_url, location=listing.location, seller_id=listing.seller_id)
 
 @router.patch("/{listing_id}/sold", response_model=dict)
-def mark_sold(listing_id: int, session: Session = Depends(get_session)):
-    listing = session.get(Listing, listing_id)
+async def mark_sold(listing_id: int, session: AsyncSession = Depends(get_async_session)):
+    listing = await session.get(Listing, listing_id)
     if not listing: raise HTTPException(404, "Listing not found")
     listing.is_sold = True
-    session.add(listing); session.commit()
+    session.add(listing); await session.commit()
+    listing_events.publish("upsert", [listing])
     return {"ok": True}
 
 @router.delete("/{listing_id}", response_model=dict)
-def delete_listing(listing_id: int, session: Session = Depends(get_session)):
-    listing = session.get(Listing, listing_id)
-    if not listing: raise HTTPException(404, "Listing not found")
-    session.delete(listing); session.commit()
+async def delete_listing(listing_id: int, session: AsyncSession = Depends(get_async_session)):
+    await session.exec(delete(Report).where(Report.listing_id == listing_id))
+    if not await session.run_sync(delete_by_id, Listing, listing_id): raise HTTPException(404, "Listing not found")
+    listing_events.publish("delete", ids=[listing_id])
     return {"ok": True}
 
 @router.post("/upload", response_model=dict)
@@ -99,6 +163,7 @@ def upload_photo(file: UploadFile = File(...)):
     if ext not in [".jpg",".jpeg",".png",".gif"]:
         raise HTTPException(400, "Unsupported file type")
     fname = f"{uuid.uuid4().hex}{ext}"
+    os.makedirs(settings.MEDIA_DIR, exist_ok=True)
     path = os.path.join(settings.MEDIA_DIR, fname)
     with open(path, "wb") as out:
         shutil.copyfileobj(file.file, out)
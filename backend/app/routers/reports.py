@@ -1 +1,46 @@
-# (optional separate router if needed later)
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db.async_session import get_async_session
+from app.deps import get_current_user
+from app.models.user import User
+from app.models.listing import Listing, ListingStatus
+from app.models.report import Report
+from app.schemas.report import ReportCreate, ReportPublic
+from app.services import listing_events
+
+router = APIRouter()
+
+@router.post("", response_model=ReportPublic)
+async def create_report(payload: ReportCreate, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    """
+    Report a listing to the moderators. The listing's unresolved report
+    count is bumped in the same transaction; at REPORT_AUTO_HIDE_THRESHOLD
+    an approved listing goes back to pending until an admin reviews it.
+    A user has at most one open report per listing (a partial unique
+    index); a second one is a 409.
+    """
+    counted = await session.exec(update(Listing).where(Listing.id == payload.listing_id).values(report_count=Listing.report_count + 1))
+    if not counted.rowcount:
+        raise HTTPException(404, "Listing not found")
+    report = Report(listing_id=payload.listing_id, reporter_id=user.id, reason=payload.reason)
+    session.add(report)
+    hidden = False
+    try:
+        if settings.REPORT_AUTO_HIDE_THRESHOLD > 0:
+            hidden = (await session.exec(
+                update(Listing)
+                .where(Listing.id == payload.listing_id, Listing.status == ListingStatus.approved, Listing.report_count >= settings.REPORT_AUTO_HIDE_THRESHOLD)
+                .values(status=ListingStatus.pending)
+            )).rowcount > 0
+        await session.commit()
+    except IntegrityError:
+        # an open report by this user exists (unique index); the count bump rolls back with it
+        await session.rollback()
+        raise HTTPException(409, "You already reported this listing")
+    if hidden:
+        listing = await session.get(Listing, payload.listing_id)
+        listing_events.publish("upsert", [listing])
+    return ReportPublic(id=report.id, listing_id=report.listing_id, reporter_id=report.reporter_id, reason=report.reason, resolved=report.resolved)
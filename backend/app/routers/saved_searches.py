@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.db.async_session import get_async_session
+from app.deps import get_current_user
+from app.models.user import User
+from app.models.listing import Listing
+from app.models.saved_search import SavedSearch, SearchAlert
+from app.schemas.saved_search import SavedSearchCreate, SavedSearchPublic, SearchAlertPublic, AlertsRead
+from app.services import percolator
+from app.services.nl_search import nl_to_query
+
+router = APIRouter()
+
+def _to_public(s: SavedSearch) -> SavedSearchPublic:
+    return SavedSearchPublic(id=s.id, question=s.question, filters=s.filters, created_at=s.created_at)
+
+@router.post("", response_model=SavedSearchPublic)
+async def save_search(payload: SavedSearchCreate, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    """Parse `question` once and get alerted whenever a matching listing is approved"""
+    filters = await run_in_threadpool(nl_to_query, payload.question)
+    saved = SavedSearch(user_id=user.id, question=payload.question, filters=filters)
+    session.add(saved); await session.commit(); await session.refresh(saved)
+    percolator.on_saved(saved)
+    return _to_public(saved)
+
+@router.get("", response_model=List[SavedSearchPublic])
+async def list_saved_searches(user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    rows = (await session.exec(select(SavedSearch).where(SavedSearch.user_id == user.id).order_by(SavedSearch.id))).all()
+    return [_to_public(s) for s in rows]
+
+@router.delete("/{search_id}", response_model=dict)
+async def delete_saved_search(search_id: int, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    saved = await session.get(SavedSearch, search_id)
+    if not saved or saved.user_id != user.id:
+        raise HTTPException(404, "Saved search not found")
+    await session.delete(saved); await session.commit()
+    percolator.on_deleted(search_id)
+    return {"ok": True}
+
+@router.get("/alerts", response_model=List[SearchAlertPublic])
+async def list_alerts(
+    unread_only: bool = False,
+    limit: int = Query(50, ge=1, le=200),
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Alerts inbox, newest first; alerts for deleted listings drop out"""
+    stmt = select(SearchAlert, Listing).join(Listing, Listing.id == SearchAlert.listing_id).where(SearchAlert.user_id == user.id)
+    if unread_only:
+        stmt = stmt.where(SearchAlert.read == False)  # noqa: E712
+    rows = (await session.exec(stmt.order_by(SearchAlert.id.desc()).limit(limit))).all()
+    return [percolator.to_alert_public(alert, listing) for alert, listing in rows]
+
+@router.post("/alerts/read", response_model=dict)
+async def mark_alerts_read(payload: AlertsRead, user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    stmt = update(SearchAlert).where(SearchAlert.user_id == user.id, SearchAlert.read == False)  # noqa: E712
+    if payload.ids:
+        stmt = stmt.where(SearchAlert.id.in_(payload.ids))
+    result = await session.exec(stmt.values(read=True))
+    await session.commit()
+    return {"updated": result.rowcount}
@@ -1,32 +1,107 @@
-from fastapi import APIRouter, Depends, Query
-from pydantic import BaseModel
-from typing import List, Optional
-from sqlmodel import Session, select
-from app.db.session import get_session
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from sqlalchemy import and_, case, func, literal, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.read_routing import get_read_session, read_only
 from app.models.listing import Listing, Category
 from app.schemas.listing import ListingPublic
-from app.services.nl_search import nl_to_query
+from app.services.nl_search import nl_to_query, heuristic_parse
+from app.services.fuzzy_search import fuzzy_search
+from app.services import typeahead
+from app.core.config import settings
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
 class NLQuery(BaseModel):
     question: str
+    # "semantic": offline embedding retrieval, filters from the heuristic parser (no network)
+    mode: Literal["keyword", "semantic"] = "keyword"
+
+class NLBatchQuery(BaseModel):
+    questions: List[str] = Field(min_length=1)
+    limit: int = Field(default=20, ge=1, le=50)  # results per question
+
+class NLBatchResult(BaseModel):
+    question: str
+    filters: Dict[str, Any]
+    results: List[ListingPublic]
+
+class Suggestion(BaseModel):
+    term: str
+    kind: str  # "word", "course" or "category"
+    count: int  # approved listings containing the term
+
+class PriceBucket(BaseModel):
+    min_price: float
+    max_price: Optional[float] = None  # None: open-ended top bucket
+    count: int
+
+class SearchFacets(BaseModel):
+    total: int
+    categories: Dict[str, int]
+    price_histogram: List[PriceBucket]
+
+class FacetedResults(BaseModel):
+    results: List[ListingPublic]
+    facets: SearchFacets
 
 @router.post("/nl", response_model=List[ListingPublic])
-def nl_search(payload: NLQuery, session: Session = Depends(get_session)):
+@read_only
+async def nl_search(payload: NLQuery, session: AsyncSession = Depends(get_read_session)):
     """Natural language search - Example: 'cheap laptop under $500'"""
-    filters = nl_to_query(payload.question)
-    return _apply_filters(filters, session)
+    if payload.mode == "semantic":
+        return await _semantic(payload.question, session)
+    # nl_to_query may block on the OpenAI API, so keep it off the event loop
+    filters = await run_in_threadpool(nl_to_query, payload.question)
+    return await _apply_filters(filters, session)
+
+@router.post("/nl/faceted", response_model=FacetedResults)
+@read_only
+async def nl_search_faceted(payload: NLQuery, session: AsyncSession = Depends(get_read_session)):
+    """Natural language search plus category counts and a price histogram of all matches"""
+    filters = await run_in_threadpool(nl_to_query, payload.question)
+    return await _apply_filters(filters, session, facets=True)
+
+@router.post("/nl/batch", response_model=List[NLBatchResult])
+@read_only
+async def nl_search_batch(payload: NLBatchQuery, session: AsyncSession = Depends(get_read_session)):
+    """
+    Several natural language searches in one request, answered in order.
+    Distinct questions are parsed concurrently (cache lookups and LLM calls
+    overlap instead of queueing), and questions that parse to the same
+    filters share one query on a single session.
+    """
+    if len(payload.questions) > settings.SEARCH_BATCH_MAX_QUESTIONS:
+        raise HTTPException(422, f"At most {settings.SEARCH_BATCH_MAX_QUESTIONS} questions per batch")
+    distinct = list(dict.fromkeys(q.strip() for q in payload.questions))
+    parsed = await asyncio.gather(*(run_in_threadpool(nl_to_query, q) for q in distinct))
+    filters_of = dict(zip(distinct, parsed))
+
+    # The session runs one statement at a time, so the deduplicated filter sets are queried in turn
+    results: Dict[str, List[ListingPublic]] = {}
+    for filters in parsed:
+        key = _filters_key(filters)
+        if key not in results:
+            results[key] = await _apply_filters(filters, session, payload.limit)
+    return [
+        NLBatchResult(question=q, filters=filters_of[q.strip()], results=results[_filters_key(filters_of[q.strip()])])
+        for q in payload.questions
+    ]
 
 @router.get("/advanced", response_model=List[ListingPublic])
-def advanced_search(
+async def advanced_search(
     category: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     sort_by: str = Query("recent"),
     limit: int = Query(50),
     offset: int = Query(0),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Advanced search with filters"""
     filters = {
@@ -36,32 +111,52 @@ def advanced_search(
         "max_price": max_price,
         "sort_by": sort_by
     }
-    return _apply_filters(filters, session, limit, offset)
+    return await _apply_filters(filters, session, limit, offset)
 
-def _apply_filters(filters: dict, session: Session, limit: int = 50, offset: int = 0):
-    """Core filtering logic"""
-    stmt = select(Listing)
-    
-    # Category filter
-    if filters.get("category"):
-        try:
-            stmt = stmt.where(Listing.category == Category(filters["category"]))
-        except:
-            pass
-    
-    # Price filters
-    if filters.get("min_price") is not None:
-        stmt = stmt.where(Listing.price >= filters["min_price"])
-    if filters.get("max_price") is not None:
-        stmt = stmt.where(Listing.price <= filters["max_price"])
+@router.get("/advanced/faceted", response_model=FacetedResults)
+async def advanced_search_faceted(
+    category: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    sort_by: str = Query("recent"),
+    limit: int = Query(50),
+    offset: int = Query(0),
+    session: AsyncSession = Depends(get_read_session)
+):
+    """Advanced search plus category counts and a price histogram of all matches"""
+    filters = {
+        "keywords": [],
+        "category": category,
+        "min_price": min_price,
+        "max_price": max_price,
+        "sort_by": sort_by
+    }
+    return await _apply_filters(filters, session, limit, offset, facets=True)
+
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Typeahead: most frequent title words, course codes and categories starting with `prefix`"""
+    index = await typeahead.get_index()
+    return index.suggest(prefix, limit)
+
+async def _apply_filters(filters: dict, session: AsyncSession, limit: int = 50, offset: int = 0, facets: bool = False):
+    """
+    Core filtering logic. With facets=True returns FacetedResults: the page
+    plus facet counts, computed by one grouped query over the same matches
+    the results come from (every exact match, plus any fuzzy top-ups).
+    """
+    stmt = base = _filter_stmt(filters)
+    keywords = [k for k in filters.get("keywords", []) if k.strip()]
     
     # Keyword filters
-    for keyword in filters.get("keywords", []):
-        if keyword.strip():
-            like = f"%{keyword.lower()}%"
-            stmt = stmt.where(
-                (Listing.title.ilike(like)) | (Listing.description.ilike(like))
-            )
+    keyword_clauses = [
+        (Listing.title.ilike(f"%{k.lower()}%")) | (Listing.description.ilike(f"%{k.lower()}%"))
+        for k in keywords
+    ]
+    stmt = stmt.where(*keyword_clauses)
     
     # Sorting
     sort_by = filters.get("sort_by", "recent")
@@ -73,12 +168,90 @@ def _apply_filters(filters: dict, session: Session, limit: int = 50, offset: int
         stmt = stmt.order_by(Listing.created_at.desc())
     
     # Pagination
-    results = session.exec(stmt.offset(offset).limit(limit)).all()
+    results = list((await session.exec(stmt.offset(offset).limit(limit))).all())
     
-    return [
-        ListingPublic(
-            id=r.id, title=r.title, description=r.description,
-            price=r.price, category=r.category.value, is_sold=r.is_sold,
-            photo_url=r.photo_url, seller_id=r.seller_id
-        ) for r in results
-    ]
+    # Typo-tolerant fallback: too few exact hits on the first page are topped
+    # up with trigram matches, ranked by similarity, under the same filters
+    fuzzy_ids = []
+    if keywords and offset == 0 and len(results) < min(limit, settings.SEARCH_FUZZY_MIN_RESULTS):
+        seen = {r.id for r in results}
+        for listing, _score in await fuzzy_search(session, keywords, base, limit):
+            if len(results) >= limit:
+                break
+            if listing.id not in seen:
+                results.append(listing)
+                seen.add(listing.id)
+                fuzzy_ids.append(listing.id)
+    
+    page = [_to_public(r) for r in results]
+    if not facets:
+        return page
+    matched = base.where(or_(and_(*keyword_clauses), Listing.id.in_(fuzzy_ids))) if fuzzy_ids else base.where(*keyword_clauses)
+    return FacetedResults(results=page, facets=await _facet_counts(session, matched))
+
+async def _semantic(question: str, session: AsyncSession, limit: int = 50):
+    """Listings closest in meaning to `question` under its category/price filters"""
+    from app.services.semantic_search import semantic_search  # NumPy loads on first semantic query
+    filters = heuristic_parse(question)
+    matches = await semantic_search(session, question, _filter_stmt(filters), limit)
+    return [_to_public(r) for r, _score in matches]
+
+def _filters_key(filters: dict) -> str:
+    """Identity of a filter set: keyword order and case do not change the matches"""
+    keywords = sorted({k.strip().lower() for k in filters.get("keywords", []) if k.strip()})
+    return json.dumps({**filters, "keywords": keywords}, sort_keys=True, default=str)
+
+def _to_public(r: Listing) -> ListingPublic:
+    return ListingPublic(
+        id=r.id, title=r.title, description=r.description,
+        price=r.price, category=r.category.value, is_sold=r.is_sold,
+        photo_url=r.photo_url, seller_id=r.seller_id
+    )
+
+def _price_edges() -> List[float]:
+    return [float(e) for e in settings.SEARCH_PRICE_BUCKETS.split(",") if e.strip()]
+
+async def _facet_counts(session: AsyncSession, filtered) -> SearchFacets:
+    """Category counts and price histogram of `filtered` in one GROUP BY category, bucket"""
+    edges = _price_edges()
+    whens = [(Listing.price < edge, i) for i, edge in enumerate(edges[1:])]
+    # zero or one edge: no CASE to build (it needs a WHEN), every match lands in the single bucket, if any
+    bucket = case(*whens, else_=len(edges) - 1) if whens else literal(0)
+    matches = filtered.with_only_columns(Listing.category, bucket.label("bucket")).order_by(None).subquery()
+    rows = (await session.exec(
+        select(matches.c.category, matches.c.bucket, func.count()).group_by(matches.c.category, matches.c.bucket)
+    )).all()
+
+    categories: Dict[str, int] = {}
+    histogram = [0] * len(edges)
+    for category, i, n in rows:
+        key = category.value if isinstance(category, Category) else category
+        categories[key] = categories.get(key, 0) + n
+        if histogram:
+            histogram[i] += n
+    return SearchFacets(
+        total=sum(categories.values()),
+        categories=dict(sorted(categories.items(), key=lambda kv: (-kv[1], kv[0]))),
+        price_histogram=[
+            PriceBucket(min_price=lo, max_price=edges[i + 1] if i + 1 < len(edges) else None, count=histogram[i])
+            for i, lo in enumerate(edges)
+        ],
+    )
+
+def _filter_stmt(filters: dict):
+    """select(Listing) narrowed by the category and price filters"""
+    stmt = select(Listing)
+    
+    # Category filter
+    if filters.get("category"):
+        try:
+            stmt = stmt.where(Listing.category == Category(filters["category"]))
+        except:
+            pass
+    
+    # Price filters
+    if filters.get("min_price") is not None:
+        stmt = stmt.where(Listing.price >= filters["min_price"])
+    if filters.get("max_price") is not None:
+        stmt = stmt.where(Listing.price <= filters["max_price"])
+    return stmt
@@ -2,18 +2,20 @@ from fastapi import APIRouter, Depends, HTTPException
 from app.deps import get_current_user
 from app.schemas.user import UserPublic, UserUpdate
 from app.models.user import User
-from app.db.session import get_session
-from sqlalchemy.orm import Session
+from app.db.async_session import get_async_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.core.security import get_password_hash, verify_password
 
 router = APIRouter()
 
 @router.get("/me", response_model=UserPublic)
-def me(user: User = Depends(get_current_user)):
+async def me(user: User = Depends(get_current_user)):
     return UserPublic(id=user.id, email=user.email, name=user.name, role=user.role)
 
 @router.put("/me", response_model=UserPublic)
-def update_me(user_update: UserUpdate, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def update_me(user_update: UserUpdate, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     """Update current user's profile"""
     user = current_user
     
@@ -24,7 +26,7 @@ def update_me(user_update: UserUpdate, current_user: User = Depends(get_current_
     # Update email if provided (check for uniqueness)
     if user_update.email is not None:
         # Check if email already exists
-        existing_user = session.query(User).filter(User.email == user_update.email, User.id != user.id).first()
+        existing_user = (await session.exec(select(User).where(User.email == user_update.email, User.id != user.id))).first()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already in use")
         user.email = user_update.email
@@ -34,9 +36,9 @@ def update_me(user_update: UserUpdate, current_user: User = Depends(get_current_
         # If new password is provided, verify current password for security
         if user_update.currentPassword is None:
             raise HTTPException(status_code=400, detail="Current password is required to change password")
-        if not verify_password(user_update.currentPassword, user.hashed_password):
+        if not await run_in_threadpool(verify_password, user_update.currentPassword, user.hashed_password):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
-        user.hashed_password = get_password_hash(user_update.password)
+        user.hashed_password = await run_in_threadpool(get_password_hash, user_update.password)
     
     # Update roles if provided (can be multiple: "buyer,seller" or single)
     if user_update.roles is not None:
@@ -50,7 +52,7 @@ def update_me(user_update: UserUpdate, current_user: User = Depends(get_current_
         user.role = ','.join(roles_list)
     
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     
     return UserPublic(id=user.id, email=user.email, name=user.name, role=user.role)
@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Literal, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
 
 
 class AdminSummary(BaseModel):
@@ -19,3 +19,19 @@ class ListingStatusUpdate(BaseModel):
     status: Optional[Literal["pending", "approved", "rejected"]] = None
     is_sold: Optional[bool] = None
 
+
+
+class BulkListingAction(BaseModel):
+    ids: List[int] = Field(min_length=1)
+    action: Literal["approve", "reject", "sold", "delete"]
+
+
+class BulkListingOutcome(BaseModel):
+    id: int
+    outcome: Literal["updated", "unchanged", "deleted", "not_found"]
+
+
+class BulkListingResult(BaseModel):
+    action: str
+    counts: Dict[str, int]
+    results: List[BulkListingOutcome]  # in request order, duplicates removed
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 
 class ListingCreate(BaseModel):
     title: str = Field(min_length=2)
@@ -30,6 +30,9 @@ class ListingPublic(BaseModel):
     location: Optional[str] = None
     seller_id: int
 
+class SimilarListing(ListingPublic):
+    score: float
+
 class SellerInfo(BaseModel):
     id: int
     name: str
@@ -46,3 +49,12 @@ class ListingWithSeller(BaseModel):
     location: Optional[str] = None
     seller_id: int
     seller: SellerInfo
+
+class BulkImportError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkImportError]
@@ -1,4 +1,6 @@
 from pydantic import BaseModel, Field
+from typing import Optional
+from app.schemas.listing import ListingPublic
 
 class ReportCreate(BaseModel):
     listing_id: int
@@ -7,6 +9,11 @@ class ReportCreate(BaseModel):
 class ReportPublic(BaseModel):
     id: int
     listing_id: int
-    reporter_id: int
+    reporter_id: Optional[int] = None  # None once the reporter's account is deleted
     reason: str
     resolved: bool
+
+class ReportedListing(BaseModel):
+    listing: ListingPublic
+    status: str
+    report_count: int  # unresolved reports
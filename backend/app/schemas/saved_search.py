@@ -0,0 +1,23 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+from app.schemas.listing import ListingPublic
+
+class SavedSearchCreate(BaseModel):
+    question: str = Field(min_length=2, max_length=300)
+
+class SavedSearchPublic(BaseModel):
+    id: int
+    question: str
+    filters: Dict[str, Any]
+    created_at: datetime
+
+class SearchAlertPublic(BaseModel):
+    id: int
+    saved_search_id: int
+    listing: ListingPublic
+    created_at: datetime
+    read: bool
+
+class AlertsRead(BaseModel):
+    ids: List[int] = Field(default_factory=list)  # empty: mark every alert read
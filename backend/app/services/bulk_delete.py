@@ -0,0 +1,37 @@
+from typing import List, Optional, Type
+from sqlalchemy import delete
+from sqlmodel import Session, SQLModel, select
+from app.core.config import settings
+
+
+def delete_where(session: Session, model: Type[SQLModel], *criteria, batch_size: int = None, deleted_ids: Optional[List[int]] = None) -> int:
+    """
+    Delete every row of `model` matching `criteria` with set-based
+    DELETE ... WHERE id IN (...) statements.
+
+    Rows are removed in id-ordered batches of at most `batch_size`, committing
+    after each batch so a huge room or seller never holds the write lock for
+    the whole purge. Returns the number of deleted rows; their ids are also
+    appended to `deleted_ids` when given.
+    """
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = session.exec(select(model.id).where(*criteria).order_by(model.id).limit(batch_size)).all()
+        if not ids:
+            break
+        result = session.exec(delete(model).where(model.id.in_(ids)))
+        session.commit()
+        deleted += result.rowcount
+        if deleted_ids is not None:
+            deleted_ids.extend(ids)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def delete_by_id(session: Session, model: Type[SQLModel], row_id: int) -> bool:
+    """Delete a single row without loading it first. Returns False if it did not exist."""
+    result = session.exec(delete(model).where(model.id == row_id))
+    session.commit()
+    return result.rowcount > 0
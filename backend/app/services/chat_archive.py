@@ -0,0 +1,204 @@
+"""
+Tiered chat message retention.
+
+Messages older than CHAT_RETENTION_DAYS are moved out of the hot `message`
+table into per-room compressed segments (`MessageArchive`), each holding up
+to CHAT_ARCHIVE_SEGMENT_SIZE messages as gzip/zstd-compressed NDJSON. The hot
+table and its indexes stay small; the read helpers below page transparently
+from hot storage into the archive.
+
+Run once from the command line:
+    python -m app.services.chat_archive --days 30
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Iterator, List
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.models.message import Message
+from app.models.message_archive import MessageArchive
+from app.services.bulk_delete import delete_where
+from app.services.chat_export import _COLUMNS, message_row_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _resolve_codec() -> str:
+    """Use zstd when configured and installed, otherwise gzip."""
+    if settings.CHAT_ARCHIVE_CODEC == "zstd":
+        try:
+            import zstandard  # noqa: F401
+            return "zstd"
+        except ImportError:
+            pass
+    return "gzip"
+
+
+def decode_segment(segment: MessageArchive) -> List[dict]:
+    """Decompress an archive segment into message dicts, oldest first."""
+    return [json.loads(line) for line in _decompress(segment.payload, segment.codec).splitlines()]
+
+
+def archive_old_messages(session: Session, older_than: timedelta = None, segment_size: int = None) -> int:
+    """
+    Move messages sent before now - `older_than` into compressed archive segments.
+
+    Each segment is written and its source rows deleted in the same
+    transaction, so a crash never loses or duplicates messages. Returns the
+    number of archived messages.
+    """
+    older_than = older_than if older_than is not None else timedelta(days=settings.CHAT_RETENTION_DAYS)
+    segment_size = segment_size or settings.CHAT_ARCHIVE_SEGMENT_SIZE
+    cutoff = datetime.utcnow() - older_than
+    codec = _resolve_codec()
+    archived = 0
+
+    room_ids = session.exec(select(Message.room_id).where(Message.sent_at < cutoff).distinct()).all()
+    for room_id in room_ids:
+        while True:
+            rows = session.exec(
+                select(*_COLUMNS)
+                .where(Message.room_id == room_id, Message.sent_at < cutoff)
+                .order_by(Message.id)
+                .limit(segment_size)
+            ).all()
+            if not rows:
+                break
+            data = "".join(json.dumps(message_row_to_dict(r)) + "\n" for r in rows).encode("utf-8")
+            session.add(MessageArchive(
+                room_id=room_id,
+                first_message_id=rows[0][0],
+                last_message_id=rows[-1][0],
+                first_sent_at=rows[0][4],
+                last_sent_at=rows[-1][4],
+                message_count=len(rows),
+                codec=codec,
+                payload=_compress(data, codec),
+            ))
+            session.exec(delete(Message).where(Message.id.in_([r[0] for r in rows])))
+            session.commit()
+            archived += len(rows)
+            if len(rows) < segment_size:
+                break
+    return archived
+
+
+def iter_archived_messages(session: Session, room_id: int, after_id: int = 0) -> Iterator[List[dict]]:
+    """
+    Yield a room's archived messages one decoded segment at a time, oldest
+    first. Segments that only hold messages with id <= `after_id` are skipped.
+    """
+    last_id = 0
+    while True:
+        segment = session.exec(
+            select(MessageArchive)
+            .where(MessageArchive.room_id == room_id, MessageArchive.id > last_id, MessageArchive.last_message_id > after_id)
+            .order_by(MessageArchive.id)
+            .limit(1)
+        ).first()
+        if not segment:
+            return
+        last_id = segment.id
+        messages = decode_segment(segment)
+        session.expunge(segment)
+        yield messages
+
+
+def load_room_page(session: Session, room_id: int, limit: int, offset: int) -> List[dict]:
+    """
+    Return up to `limit` messages of a room, skipping the `offset` newest ones,
+    in chronological order. Reads the hot table first and only decodes the
+    archive segments that overlap the requested window.
+    """
+    hot = session.exec(
+        select(*_COLUMNS)
+        .where(Message.room_id == room_id)
+        .order_by(Message.sent_at.desc())
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    page = [message_row_to_dict(r) for r in hot]
+    if len(page) == limit:
+        return list(reversed(page))
+
+    if hot:
+        archive_offset = 0
+    else:
+        hot_count = session.exec(select(func.count()).select_from(Message).where(Message.room_id == room_id)).one()
+        archive_offset = offset - hot_count
+
+    # Walk segment metadata newest first; payloads are only loaded when needed.
+    segments = session.exec(
+        select(MessageArchive.id, MessageArchive.message_count)
+        .where(MessageArchive.room_id == room_id)
+        .order_by(MessageArchive.last_message_id.desc())
+    ).all()
+    for segment_id, count in segments:
+        if len(page) >= limit:
+            break
+        if archive_offset >= count:
+            archive_offset -= count
+            continue
+        newest_first = list(reversed(decode_segment(session.get(MessageArchive, segment_id))))
+        take = newest_first[archive_offset:archive_offset + limit - len(page)]
+        page.extend(take)
+        archive_offset = 0
+    return list(reversed(page))
+
+
+def delete_room_archive(session: Session, room_id: int) -> int:
+    return delete_where(session, MessageArchive, MessageArchive.room_id == room_id)
+
+
+async def run_retention_loop():
+    """Background task: archive old messages every CHAT_RETENTION_INTERVAL_SECONDS."""
+    from app.db.session import engine
+
+    def _once():
+        with Session(engine) as session:
+            return archive_old_messages(session)
+
+    while True:
+        try:
+            archived = await asyncio.to_thread(_once)
+            if archived:
+                logger.info("Archived %d chat messages", archived)
+        except Exception:
+            logger.exception("Chat retention run failed")
+        await asyncio.sleep(settings.CHAT_RETENTION_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.db.session import engine, create_db_and_tables
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Archive old chat messages")
+    parser.add_argument("--days", type=int, default=settings.CHAT_RETENTION_DAYS,
+                        help="archive messages older than this many days (default CHAT_RETENTION_DAYS)")
+    args = parser.parse_args()
+    if args.days <= 0:
+        # 0 means "retention disabled" in settings; archiving everything is never what that asks for
+        parser.error("--days must be positive (CHAT_RETENTION_DAYS=0 means retention is disabled)")
+    create_db_and_tables()
+    with Session(engine) as session:
+        print(f"Archived {archive_old_messages(session, timedelta(days=args.days))} chat messages")
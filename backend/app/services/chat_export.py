@@ -0,0 +1,67 @@
+"""
+Streaming export of chat history as NDJSON (one JSON message per line).
+Archived segments (see chat_archive) are emitted before the hot table.
+
+Rows are read with keyset pagination (`id > last_id ORDER BY id LIMIT n`) in
+fixed-size chunks and serialized as plain tuples, so memory use stays constant
+no matter how long the room history is and no transaction is held open
+between chunks.
+"""
+
+import json
+import zlib
+from typing import Iterator, List, Tuple
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.models.message import Message
+
+_COLUMNS = (Message.id, Message.room_id, Message.sender_id, Message.content, Message.sent_at)
+
+
+def iter_message_chunks(session: Session, room_id: int, chunk_size: int = None, after_id: int = 0) -> Iterator[List[Tuple]]:
+    """Yield lists of (id, room_id, sender_id, content, sent_at) rows in id order."""
+    chunk_size = chunk_size or settings.CHAT_EXPORT_CHUNK_SIZE
+    last_id = after_id
+    while True:
+        rows = session.exec(
+            select(*_COLUMNS)
+            .where(Message.room_id == room_id, Message.id > last_id)
+            .order_by(Message.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def message_row_to_dict(row: Tuple) -> dict:
+    msg_id, room_id, sender_id, content, sent_at = row
+    return {"id": msg_id, "room_id": room_id, "sender_id": sender_id, "content": content, "sent_at": sent_at.isoformat()}
+
+
+def _encode_chunk(rows: List[Tuple]) -> bytes:
+    return "".join(json.dumps(message_row_to_dict(r)) + "\n" for r in rows).encode("utf-8")
+
+
+def stream_history_ndjson(session: Session, room_id: int, compress: bool = False, chunk_size: int = None) -> Iterator[bytes]:
+    """
+    Generate the NDJSON body for a room's history.
+
+    With `compress=True` the output is a single gzip stream; each chunk is
+    sync-flushed so the client can decode it as soon as it arrives.
+    """
+    from app.services.chat_archive import iter_archived_messages
+
+    gz = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    # Archived segments hold the oldest messages, so they are emitted first.
+    for messages in iter_archived_messages(session, room_id):
+        data = "".join(json.dumps(m) + "\n" for m in messages).encode("utf-8")
+        yield gz.compress(data) + gz.flush(zlib.Z_SYNC_FLUSH) if gz else data
+    for rows in iter_message_chunks(session, room_id, chunk_size):
+        data = _encode_chunk(rows)
+        yield gz.compress(data) + gz.flush(zlib.Z_SYNC_FLUSH) if gz else data
+    if gz:
+        yield gz.flush()
@@ -1,28 +1,251 @@
-from fastapi import WebSocket
-from typing import Dict, List
+"""
+WebSocket fan-out for chat rooms.
+
+Protocol (`/ws/chat/{room_id}`):
+  - query params: `resume_after=<message id>` replays every message with a
+    larger id from the database before live delivery starts; `batch=true`
+    delivers `{"type": "batch", "messages": [...]}` frames that coalesce
+    whatever is queued for the socket; `encoding=msgpack` switches frames to
+    binary msgpack (falls back to JSON if msgpack is not installed).
+  - client -> server: `{"sender_id", "content", "client_id"?}`; on a socket
+    opened with `token=`, the sender is the token's user and `sender_id` is ignored
+  - server -> sender: `{"type": "ack", "id", "client_id"}` once persisted
+  - server -> room:   `{"type": "message", "id", "room_id", "sender_id", "content", "sent_at"}`
+
+Ephemeral events are fanned out without touching the database:
+  - client -> server: `{"type": "typing"}` -> room (minus sender) as
+    `{"type": "typing", "room_id", "sender_id"}`
+  - server -> room:   `{"type": "presence", "user_id", "status": "online"|"offline"}`
+    when a user's first socket joins or last socket leaves
+  Presence and typing need `token=<access token>`; the user is taken from it,
+  and sockets without a token stay anonymous (no presence, typing ignored).
+  - server -> client: `{"type": "ping"}` every CHAT_WS_PING_INTERVAL_SECONDS;
+    any client frame (e.g. `{"type": "pong"}`) counts as liveness. Sockets
+    silent for CHAT_WS_IDLE_TIMEOUT_SECONDS are closed and reaped.
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+from fastapi import WebSocket, WebSocketDisconnect
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
 from app.db.session import engine
 from app.models.message import Message
 
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, encoding: str = "json", batch: bool = False, user_id: Optional[int] = None):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.last_seen = time.monotonic()
+        self.encoding = "msgpack" if encoding == "msgpack" and msgpack is not None else "json"
+        self.batch = batch
+        self.queue: Optional[asyncio.Queue] = asyncio.Queue() if batch else None
+        self.writer: Optional[asyncio.Task] = None
+        # Live messages that arrive while a resume replay is in flight are held
+        # here and flushed (minus duplicates) once the replay finishes.
+        self.replay_buffer: Optional[List[dict]] = None
+
+    async def send_frame(self, frame: dict):
+        if self.encoding == "msgpack":
+            await self.websocket.send_bytes(msgpack.packb(frame))
+        else:
+            await self.websocket.send_text(json.dumps(frame))
+
+    async def receive(self) -> dict:
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        self.last_seen = time.monotonic()
+        if message.get("bytes") is not None:
+            return msgpack.unpackb(message["bytes"]) if msgpack is not None else json.loads(message["bytes"])
+        return json.loads(message["text"])
+
+    async def deliver(self, payload: dict, ephemeral: bool = False):
+        if self.replay_buffer is not None:
+            # Typing/presence events are not worth replaying; drop them mid-resume.
+            if not ephemeral:
+                self.replay_buffer.append(payload)
+        elif self.batch:
+            self.queue.put_nowait(payload)
+        else:
+            await self.send_frame(payload)
+
+    async def deliver_many(self, payloads: List[dict]):
+        if self.batch:
+            for start in range(0, len(payloads), settings.CHAT_WS_MAX_BATCH):
+                await self.send_frame({"type": "batch", "messages": payloads[start:start + settings.CHAT_WS_MAX_BATCH]})
+        else:
+            for payload in payloads:
+                await self.send_frame(payload)
+
+    async def run_writer(self):
+        """Drain the outbound queue, coalescing everything already queued into one frame."""
+        while True:
+            items = [await self.queue.get()]
+            while len(items) < settings.CHAT_WS_MAX_BATCH and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+            await self.send_frame({"type": "batch", "messages": items})
+
+
+def _message_frame(msg: dict) -> dict:
+    return {"type": "message", **msg}
+
+
+def _load_missed(room_id: int, after_id: int) -> List[dict]:
+    from app.services.chat_archive import iter_archived_messages
+    from app.services.chat_export import iter_message_chunks, message_row_to_dict
+
+    missed = []
+    with Session(engine) as session:
+        for segment in iter_archived_messages(session, room_id, after_id=after_id):
+            missed.extend(m for m in segment if m["id"] > after_id)
+        for rows in iter_message_chunks(session, room_id, after_id=after_id):
+            missed.extend(message_row_to_dict(r) for r in rows)
+    return missed
+
+
+def _persist(room_id: int, sender_id: int, content: str) -> dict:
+    msg = Message(room_id=room_id, sender_id=sender_id, content=content)
+    with Session(engine) as session:
+        session.add(msg); session.commit(); session.refresh(msg)
+    return {"id": msg.id, "room_id": msg.room_id, "sender_id": msg.sender_id, "content": msg.content, "sent_at": msg.sent_at.isoformat()}
+
+
 class ConnectionManager:
     def __init__(self):
-        self.rooms: Dict[str, List[WebSocket]] = {}
+        self.rooms: Dict[str, List[Connection]] = {}
+        # room_id -> {user_id: number of open sockets}
+        self.presence: Dict[str, Dict[int, int]] = {}
+        self._reaper: Optional[asyncio.Task] = None
 
-    async def connect(self, room_id: str, websocket: WebSocket):
+    async def connect(self, room_id: str, websocket: WebSocket, encoding: str = "json", batch: bool = False, resume_after: Optional[int] = None, user_id: Optional[int] = None) -> Connection:
         await websocket.accept()
-        self.rooms.setdefault(room_id, []).append(websocket)
+        conn = Connection(websocket, encoding=encoding, batch=batch, user_id=user_id)
+        if resume_after is not None:
+            conn.replay_buffer = []
+        self.rooms.setdefault(room_id, []).append(conn)
+        if batch:
+            conn.writer = asyncio.create_task(conn.run_writer())
+        if self._reaper is None or self._reaper.done() or self._reaper.get_loop() is not asyncio.get_running_loop():
+            self._reaper = asyncio.create_task(self._heartbeat_loop())
+        if resume_after is not None:
+            await self.replay(room_id, conn, resume_after)
+        if user_id is not None:
+            users = self.presence.setdefault(room_id, {})
+            users[user_id] = users.get(user_id, 0) + 1
+            if users[user_id] == 1:
+                await self._fan_out(room_id, {"type": "presence", "user_id": user_id, "status": "online"}, ephemeral=True)
+        return conn
+
+    async def replay(self, room_id: str, conn: Connection, after_id: int):
+        """Send every message newer than `after_id`, then switch the socket to live delivery."""
+        missed = [_message_frame(m) for m in await run_in_threadpool(_load_missed, int(room_id), after_id)]
+        last_id = after_id
+        # Live frames keep buffering until everything before them has been sent;
+        # only an empty buffer is switched off, with no await in between.
+        while True:
+            buffered, conn.replay_buffer = conn.replay_buffer or [], []
+            if missed:
+                last_id = missed[-1]["id"]
+            missed.extend(p for p in buffered if p["id"] > last_id)
+            if not missed:
+                conn.replay_buffer = None
+                return
+            last_id = missed[-1]["id"]
+            await conn.deliver_many(missed)
+            missed = []
 
-    def disconnect(self, room_id: str, websocket: WebSocket):
+    async def disconnect(self, room_id: str, conn: Connection):
+        if conn.writer:
+            conn.writer.cancel()
         if room_id in self.rooms:
-            self.rooms[room_id].remove(websocket)
+            if conn not in self.rooms[room_id]:
+                return
+            self.rooms[room_id].remove(conn)
+            if not self.rooms[room_id]:
+                del self.rooms[room_id]
+            if not self.rooms and self._reaper is not None and self._reaper.get_loop() is asyncio.get_running_loop():
+                self._reaper.cancel()
+        users = self.presence.get(room_id)
+        if conn.user_id is not None and users and conn.user_id in users:
+            users[conn.user_id] -= 1
+            if users[conn.user_id] == 0:
+                del users[conn.user_id]
+                if not users:
+                    del self.presence[room_id]
+                await self._fan_out(room_id, {"type": "presence", "user_id": conn.user_id, "status": "offline"}, ephemeral=True)
 
-    async def broadcast(self, room_id: str, data: dict):
-        # Persist message
-        msg = Message(room_id=room_id, sender_id=int(data.get("sender_id", 0)), content=str(data.get("content","")))
-        with Session(engine) as session:
-            session.add(msg); session.commit()
+    async def handle(self, room_id: str, conn: Connection, data: dict):
+        """Dispatch one client frame by its `type`; untyped frames are chat messages."""
+        kind = data.get("type", "message")
+        if kind in ("pong", "ack"):
+            return
+        if kind == "ping":
+            await conn.send_frame({"type": "pong"})
+        elif kind == "typing":
+            if conn.user_id is not None:
+                await self._fan_out(room_id, {"type": "typing", "room_id": int(room_id), "sender_id": conn.user_id}, ephemeral=True, exclude=conn)
+        else:
+            await self.broadcast(room_id, data, sender=conn)
+
+    async def broadcast(self, room_id: str, data: dict, sender: Optional[Connection] = None):
+        # Persist message; an authenticated socket can only post as its own user
+        sender_id = sender.user_id if sender is not None and sender.user_id is not None else int(data.get("sender_id", 0))
+        msg = await run_in_threadpool(_persist, int(room_id), sender_id, str(data.get("content", "")))
+        if sender is not None:
+            await sender.send_frame({"type": "ack", "id": msg["id"], "client_id": data.get("client_id")})
         # Fan out
-        for ws in list(self.rooms.get(room_id, [])):
-            await ws.send_json({"room_id": room_id, "sender_id": msg.sender_id, "content": msg.content})
+        await self._fan_out(room_id, _message_frame(msg))
+
+    async def _fan_out(self, room_id: str, frame: dict, ephemeral: bool = False, exclude: Optional[Connection] = None):
+        for conn in list(self.rooms.get(room_id, [])):
+            if conn is exclude:
+                continue
+            try:
+                await conn.deliver(frame, ephemeral=ephemeral)
+            except Exception:
+                # A dead socket must not stall delivery to the rest of the room.
+                await self.disconnect(room_id, conn)
+
+    async def _heartbeat_loop(self):
+        """Ping every socket periodically and reap the ones that stopped answering."""
+        while self.rooms:
+            await asyncio.sleep(settings.CHAT_WS_PING_INTERVAL_SECONDS)
+            await self.reap_idle()
+
+    async def reap_idle(self):
+        now = time.monotonic()
+        for room_id, conns in list(self.rooms.items()):
+            for conn in list(conns):
+                if now - conn.last_seen > settings.CHAT_WS_IDLE_TIMEOUT_SECONDS:
+                    try:
+                        await conn.websocket.close(code=1001)
+                    except Exception:
+                        pass
+                    await self.disconnect(room_id, conn)
+                    continue
+                try:
+                    await conn.send_frame({"type": "ping"})
+                except Exception:
+                    await self.disconnect(room_id, conn)
+
+    def online_users(self, room_id: str) -> List[int]:
+        return sorted(self.presence.get(room_id, {}))
+
+    def gauges(self) -> Dict[str, int]:
+        return {
+            "live_connections": sum(len(c) for c in self.rooms.values()),
+            "live_rooms": len(self.rooms),
+            "online_users": sum(len(u) for u in self.presence.values()),
+        }
 
 manager = ConnectionManager()
@@ -0,0 +1,149 @@
+"""
+Typo-tolerant keyword matching for listing search ("calculater" -> "calculator").
+
+Used by /search as a fallback when exact ilike matching returns fewer than
+SEARCH_FUZZY_MIN_RESULTS listings. Matches are ranked by trigram similarity
+and respect whatever category/price filters the caller already applied.
+
+- Postgres: pg_trgm `word_similarity` against title || ' ' || description,
+  served by the GIN index that `python -m app.db.manage create-tables` creates.
+- SQLite (and anything else): an in-process trigram inverted index over the
+  words of every listing's title and description. It is built on first use,
+  once per process, and kept current through listing events
+  (app/services/listing_events.py).
+"""
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import func, literal_column, or_, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.listing import Listing
+from app.services import listing_events
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# title || ' ' || description, spelled exactly like the Postgres index expression
+SEARCH_DOCUMENT = Listing.title + literal_column("' '") + Listing.description
+PG_TRGM_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_listing_search_trgm ON listing USING gin ((title || ' ' || description) gin_trgm_ops)",
+)
+
+
+def trigrams(word: str) -> Set[str]:
+    """pg_trgm-style trigrams: the word padded with two leading and one trailing space."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def words(text: str) -> Set[str]:
+    return set(WORD.findall(text.lower()))
+
+
+class TrigramIndex:
+    """Inverted indexes trigram -> words and word -> listing ids."""
+    def __init__(self):
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.postings: Dict[str, Set[int]] = {}
+        self.gram_count: Dict[str, int] = {}
+        self.docs: Dict[int, Set[str]] = {}
+
+    def add(self, listing_id: int, text: str):
+        self.remove(listing_id)
+        doc = words(text)
+        self.docs[listing_id] = doc
+        for word in doc:
+            if word not in self.postings:
+                grams = trigrams(word)
+                self.postings[word] = set()
+                self.gram_count[word] = len(grams)
+                for gram in grams:
+                    self.grams[gram].add(word)
+            self.postings[word].add(listing_id)
+
+    def remove(self, listing_id: int):
+        for word in self.docs.pop(listing_id, ()):
+            ids = self.postings[word]
+            ids.discard(listing_id)
+            if not ids:
+                del self.postings[word], self.gram_count[word]
+                for gram in trigrams(word):
+                    self.grams[gram].discard(word)
+                    if not self.grams[gram]:
+                        del self.grams[gram]
+
+    def similar_words(self, word: str, threshold: float) -> Dict[str, float]:
+        """Indexed words whose trigram similarity to `word` is at least `threshold`."""
+        query = trigrams(word)
+        shared = Counter(w for gram in query for w in self.grams.get(gram, ()))
+        matches = {}
+        for candidate, n in shared.items():
+            similarity = n / (len(query) + self.gram_count[candidate] - n)
+            if similarity >= threshold:
+                matches[candidate] = similarity
+        return matches
+
+    def search(self, keywords: Iterable[str], threshold: float, limit: int) -> List[Tuple[int, float]]:
+        """
+        Rank listings by the mean, over query words, of the best similarity any
+        of their words reaches; listings matching more query words rank higher.
+        """
+        query_words = [w for keyword in keywords for w in WORD.findall(keyword.lower())]
+        scores: Dict[int, float] = defaultdict(float)
+        for word in query_words:
+            best: Dict[int, float] = {}
+            for match, similarity in self.similar_words(word, threshold).items():
+                for listing_id in self.postings[match]:
+                    if similarity > best.get(listing_id, 0.0):
+                        best[listing_id] = similarity
+            for listing_id, similarity in best.items():
+                scores[listing_id] += similarity
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [(listing_id, score / len(query_words)) for listing_id, score in ranked]
+
+
+def _build_index(sync_session) -> TrigramIndex:
+    index = TrigramIndex()
+    stmt = select(Listing.id, Listing.title, Listing.description).execution_options(yield_per=5000)
+    for listing_id, title, description in sync_session.exec(stmt):
+        index.add(listing_id, f"{title} {description}")
+    return index
+
+
+def _apply_event(index: TrigramIndex, event: listing_events.ListingEvent):
+    if event.kind == "upsert":
+        for listing in event.listings:
+            index.add(listing.id, f"{listing.title} {listing.description}")
+    else:
+        for listing_id in event.ids:
+            index.remove(listing_id)
+
+
+_index = listing_events.DerivedIndex(_build_index, _apply_event)
+
+
+async def fuzzy_search(session: AsyncSession, keywords: List[str], base_stmt, limit: int) -> List[Tuple[Listing, float]]:
+    """
+    Listings from `base_stmt` (a filtered select(Listing)) that fuzzily match
+    `keywords`, best match first, with their similarity score in [0, 1].
+    """
+    threshold = settings.SEARCH_FUZZY_THRESHOLD
+    if session.bind.dialect.name == "postgresql":
+        await session.exec(text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"), params={"t": str(threshold)})
+        score = sum(func.word_similarity(k, SEARCH_DOCUMENT) for k in keywords) / len(keywords)
+        stmt = (base_stmt.add_columns(score.label("score"))
+                .where(or_(*[SEARCH_DOCUMENT.op("%>")(k) for k in keywords]))
+                .order_by(text("score DESC")).limit(limit))
+        return [(listing, float(s)) for listing, s in (await session.exec(stmt)).all()]
+
+    ranked = (await _index.get()).search(keywords, threshold, settings.SEARCH_FUZZY_CANDIDATES)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    rows = (await session.exec(base_stmt.where(Listing.id.in_(list(scores))))).all()
+    rows = sorted(rows, key=lambda l: (-scores[l.id], l.id))
+    return [(listing, scores[listing.id]) for listing in rows[:limit]]
@@ -0,0 +1,133 @@
+"""
+In-process listing change notifications.
+
+Write paths call `publish` after their commit; in-memory structures derived
+from the listing table (fuzzy search index, typeahead, ...) subscribe with
+`@subscribe` and update incrementally instead of re-reading the table.
+
+Event kinds:
+- "upsert": `listings` were created or changed (loaded Listing objects)
+- "delete": listings with `ids` were removed
+- "reset":  many rows changed at once (bulk import, seller purge) and were
+            not loaded; subscribers should rebuild lazily, or, if they can,
+            refresh just the affected `ids` (given when the writer knows them)
+Handlers run synchronously on the caller's thread; exceptions are logged and
+never fail the write that triggered them.
+
+`DerivedIndex` wraps the common case: a structure built from the listing
+table on first use and then kept current by these events.
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Generic, List, Optional, Sequence, TypeVar
+
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.listing import Listing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ListingEvent:
+    kind: str
+    listings: Sequence[Listing] = field(default_factory=list)
+    ids: Sequence[int] = field(default_factory=list)
+
+
+_subscribers: List[Callable[[ListingEvent], None]] = []
+
+
+def subscribe(handler: Callable[[ListingEvent], None]):
+    if handler not in _subscribers:
+        _subscribers.append(handler)
+    return handler
+
+
+def publish(kind: str, listings: Sequence[Listing] = (), ids: Sequence[int] = ()):
+    event = ListingEvent(kind, list(listings), list(ids) or [l.id for l in listings])
+    for handler in list(_subscribers):
+        try:
+            handler(event)
+        except Exception:
+            logger.exception("listing event handler %r failed", handler)
+
+
+T = TypeVar("T")
+
+
+class DerivedIndex(Generic[T]):
+    """
+    An in-memory index derived from the listing table of the logical database
+    (settings.DATABASE_URL): the same index serves a request whether it reads
+    through a replica or the primary.
+
+    `build(sync_session)` runs in a worker thread with its own session, so the
+    event loop keeps serving while it runs, and concurrent first uses wait for
+    a single build. Events are applied with `apply(index, event)`; those that
+    arrive during a build are replayed onto the result. "reset" drops the
+    index and the next use rebuilds it.
+    """
+
+    def __init__(self, build: Callable[[Session], T], apply: Callable[[T, ListingEvent], None],
+                 key: Callable[[], str] = lambda: settings.DATABASE_URL):
+        self._build, self._apply, self._key = build, apply, key
+        self.value: Optional[T] = None
+        self.built_for: Optional[str] = None
+        self._build_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._pending: Optional[List[ListingEvent]] = None
+        subscribe(self._on_event)
+
+    def current(self) -> Optional[T]:
+        """The index when it is built for the current database, else None."""
+        value = self.value
+        return value if value is not None and self.built_for == self._key() else None
+
+    async def get(self) -> T:
+        value = self.current()
+        return value if value is not None else await run_in_threadpool(self.load)
+
+    def load(self) -> T:
+        """Blocking `get`, for worker threads and the command line."""
+        key = self._key()
+        with self._build_lock:
+            value = self.current()
+            if value is not None:
+                return value
+            from app.db import session as db
+            with self._state_lock:
+                self._pending = []
+            try:
+                with Session(db.engine) as session:
+                    value = self._build(session)
+            except BaseException:
+                with self._state_lock:
+                    self._pending = None
+                raise
+            with self._state_lock:
+                pending, self._pending = self._pending, None
+                if any(e.kind == "reset" for e in pending):
+                    return value  # already stale: serve it once, rebuild on the next use
+                for event in pending:
+                    self._apply(value, event)
+                self.value, self.built_for = value, key
+            return value
+
+    def clear(self):
+        with self._state_lock:
+            self.value = self.built_for = None
+
+    def _on_event(self, event: ListingEvent):
+        with self._state_lock:
+            if self._pending is not None:
+                self._pending.append(event)
+            if self.value is None:
+                return
+            if event.kind == "reset":
+                self.value = self.built_for = None
+            else:
+                self._apply(self.value, event)
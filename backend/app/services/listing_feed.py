@@ -0,0 +1,143 @@
+"""
+Live listing deltas for GET /listings/stream (Server-Sent Events).
+
+Every listing event becomes one feed event, written as an SSE frame:
+
+- `listing`: created, approved or edited while approved and unsold. `data`
+  is the public listing.
+- `sold`: `{"id": ...}`.
+- `delete`: `{"id": ...}`. The listing was deleted, or it is pending or
+  rejected, so it is no longer public.
+- `reset`: `{}`. Many listings changed at once (bulk import, seller purge),
+  so the client should refetch GET /listings.
+
+Ids are "<process epoch>-<sequence>". The last LISTING_FEED_BUFFER events
+are kept in memory, so a reconnecting EventSource that sends Last-Event-ID
+is replayed what it missed. If the id is too old, or comes from another
+process, the client gets `reset` instead.
+
+Each connection gets a bounded queue. A consumer that falls
+LISTING_FEED_QUEUE events behind is disconnected and resumes by id.
+Streams end after LISTING_FEED_MAX_SECONDS so long-lived connections
+rotate through proxies. Idle streams send a comment line every
+LISTING_FEED_HEARTBEAT_SECONDS.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, List, NamedTuple, Optional, Set
+
+from app.core.config import settings
+from app.models.listing import Listing, ListingStatus
+from app.services import listing_events
+
+
+class FeedEvent(NamedTuple):
+    id: str
+    seq: int
+    type: str
+    data: dict
+
+    def frame(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+
+_epoch = format(int(time.time() * 1000), "x")
+_seq = itertools.count(1)
+buffer: Deque[FeedEvent] = deque(maxlen=settings.LISTING_FEED_BUFFER)
+
+
+class _Subscriber:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LISTING_FEED_QUEUE)
+        self.overflowed = False
+
+    def offer(self, event: FeedEvent):
+        # publishers may run on another thread/loop than the stream
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: FeedEvent):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+_subscribers: Set[_Subscriber] = set()
+
+
+def _listing_data(listing: Listing) -> dict:
+    return {"id": listing.id, "title": listing.title, "description": listing.description, "price": listing.price,
+            "category": listing.category.value, "is_sold": listing.is_sold, "photo_url": listing.photo_url,
+            "location": listing.location, "seller_id": listing.seller_id}
+
+
+def _emit(kind: str, data: dict):
+    seq = next(_seq)
+    event = FeedEvent(f"{_epoch}-{seq}", seq, kind, data)
+    buffer.append(event)
+    for subscriber in list(_subscribers):
+        subscriber.offer(event)
+
+
+@listing_events.subscribe
+def _on_listing_event(event: listing_events.ListingEvent):
+    if event.kind == "upsert":
+        for listing in event.listings:
+            if listing.status != ListingStatus.approved:
+                _emit("delete", {"id": listing.id})
+            elif listing.is_sold:
+                _emit("sold", {"id": listing.id})
+            else:
+                _emit("listing", _listing_data(listing))
+    elif event.kind == "delete":
+        for listing_id in event.ids:
+            _emit("delete", {"id": listing_id})
+    else:
+        _emit("reset", {})
+
+
+def missed_since(last_event_id: str) -> Optional[List[FeedEvent]]:
+    """Buffered events after `last_event_id`, or None when they can no longer be replayed."""
+    epoch, _, seq = last_event_id.partition("-")
+    if epoch != _epoch or not seq.isdigit():
+        return None
+    seq = int(seq)
+    if buffer and seq < buffer[0].seq - 1:
+        return None  # fell out of the buffer
+    return [e for e in buffer if e.seq > seq]
+
+
+async def stream(last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """SSE frames: the replay after `last_event_id`, then live events until the connection rotates."""
+    subscriber = _Subscriber()
+    _subscribers.add(subscriber)  # before the replay, so nothing falls in between
+    sent = buffer[-1].seq if buffer else 0  # live events start after this
+    try:
+        yield f"retry: {settings.LISTING_FEED_RETRY_MS}\n\n"
+        if last_event_id:
+            missed = missed_since(last_event_id)
+            if missed is None:
+                yield FeedEvent(buffer[-1].id if buffer else f"{_epoch}-0", sent, "reset", {}).frame()
+            else:
+                for event in missed:
+                    if event.seq <= sent:  # later ones arrive through the queue
+                        yield event.frame()
+        deadline = subscriber.loop.time() + settings.LISTING_FEED_MAX_SECONDS
+        while not (subscriber.overflowed and subscriber.queue.empty()):
+            remaining = deadline - subscriber.loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=min(settings.LISTING_FEED_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event.seq > sent:
+                sent = event.seq
+                yield event.frame()
+    finally:
+        _subscribers.discard(subscriber)
@@ -0,0 +1,162 @@
+"""
+Streaming bulk import of listings from CSV or NDJSON request bodies.
+
+Rows are parsed as the body arrives, validated one by one with
+`ListingCreate`, and inserted in executemany batches of
+BULK_IMPORT_BATCH_SIZE rows, one transaction per batch. Invalid rows are
+reported with their 1-based row number and never abort the import; a batch
+the database rejects is retried row by row so only the offending rows fail.
+"""
+
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.models.listing import Listing, Category, ListingStatus
+from app.schemas.listing import ListingCreate
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed UTF-8 body into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """
+    Whether a CSV record is still inside a quoted field after `line`, given
+    whether it was before it. Follows the csv module's default dialect: a
+    quote only opens a field at its start, and "" inside one is an escape.
+    """
+    field_start, i = not quoted, 0
+    while i < len(line):
+        c = line[i]
+        if quoted:
+            if c == '"':
+                if line[i + 1:i + 2] == '"':
+                    i += 1
+                else:
+                    quoted = False
+        elif c == '"' and field_start:
+            quoted = True
+        field_start = not quoted and c == ","
+        i += 1
+    return quoted
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Dict]:
+    """Parse CSV with a header row; quoted fields may span lines."""
+    header: Optional[List[str]] = None
+    record, quoted = "", False
+    async for line in lines:
+        record = f"{record}\n{line}" if quoted else line
+        quoted = _ends_quoted(line, quoted)
+        if quoted:  # inside a quoted field, keep reading
+            continue
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield {k: (v if v != "" else None) for k, v in zip(header, values)}
+    if quoted and header is not None:
+        # a stray quote swallowed the rest of the body: report it rather than drop it
+        yield {"__error__": "unterminated quoted field; every following line was read into this row"}
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Dict]:
+    async for line in lines:
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"__error__": f"invalid JSON: {e.msg}"}
+                continue
+            yield record if isinstance(record, dict) else {"__error__": "expected a JSON object"}
+
+
+def _format_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+async def import_listings(session: AsyncSession, records: AsyncIterator[Dict], default_seller_id: int, allow_seller_override: bool) -> Dict:
+    """
+    Validate and insert `records`. Returns the BulkImportResult counts and
+    errors, plus "ids": the ids of the inserted listings.
+    """
+    batch_size = settings.BULK_IMPORT_BATCH_SIZE
+    inserted, failed = 0, 0
+    ids: List[int] = []
+    errors: List[Dict] = []
+    batch: List[Dict] = []
+    batch_rows: List[int] = []
+
+    def record_error(row: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            errors.append({"row": row, "error": message})
+
+    async def flush():
+        nonlocal inserted
+        if not batch:
+            return
+        try:
+            new_ids = (await session.exec(insert(Listing).returning(Listing.id), params=batch)).scalars().all()
+            await session.commit()
+            inserted += len(batch)
+            ids.extend(new_ids)
+        except Exception:
+            await session.rollback()
+            # find the offending rows instead of failing the whole batch
+            for row, values in zip(batch_rows, batch):
+                try:
+                    new_ids = (await session.exec(insert(Listing).returning(Listing.id), params=[values])).scalars().all()
+                    await session.commit()
+                    inserted += 1
+                    ids.extend(new_ids)
+                except Exception as e:
+                    await session.rollback()
+                    record_error(row, f"insert failed: {e.__class__.__name__}")
+        batch.clear()
+        batch_rows.clear()
+
+    row = 0
+    async for record in records:
+        row += 1
+        if "__error__" in record:
+            record_error(row, record["__error__"])
+            continue
+        try:
+            payload = ListingCreate.model_validate(record)
+        except ValidationError as e:
+            record_error(row, _format_error(e))
+            continue
+        seller_id = payload.seller_id if allow_seller_override and payload.seller_id else default_seller_id
+        batch.append({
+            **payload.model_dump(exclude={"category", "seller_id"}),
+            "category": Category(payload.category),
+            "status": ListingStatus.pending,
+            "is_sold": False,
+            "created_at": datetime.utcnow(),
+            "seller_id": seller_id,
+        })
+        batch_rows.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+    return {"inserted": inserted, "failed": failed, "errors": errors, "ids": ids}
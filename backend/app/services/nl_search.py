@@ -8,9 +8,15 @@ Falls back to heuristic parsing if OpenAI API is unavailable
 import os
 import re
 import json
+import logging
+import time
 from typing import List, Optional, Dict, Any
 from functools import lru_cache
 
+from app.core.metrics import LLM_CALLS, LLM_LATENCY, NL_FALLBACKS
+
+logger = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_REQUEST_TIMEOUT = 5.0  # seconds
 
@@ -392,13 +398,13 @@ Output: {{"keywords": ["gadgets"], "category": "gadgets", "min_price": null, "ma
             }
             
     except httpx.TimeoutException:
-        print(f"OpenAI API timeout for query: {question}")
+        logger.warning("OpenAI API timeout for query: %s", question)
         raise
     except json.JSONDecodeError as e:
-        print(f"OpenAI response JSON parse error: {e}")
+        logger.warning("OpenAI response JSON parse error: %s", e)
         raise
     except Exception as e:
-        print(f"OpenAI API error: {e}")
+        logger.warning("OpenAI API error: %s", e)
         raise
 
 
@@ -423,21 +429,37 @@ def nl_to_query(question: str) -> Dict[str, Any]:
     
     # If no API key configured, use heuristic parsing
     if not OPENAI_API_KEY:
-        print("OpenAI API key not configured, using heuristic parsing")
+        logger.debug("OpenAI API key not configured, using heuristic parsing")
+        NL_FALLBACKS.inc("no_api_key")
         return heuristic_parse(question)
     
+    start = time.perf_counter()
     try:
         # Try OpenAI API first
         result = _call_openai_api(question)
-        print(f"OpenAI API parsed: {question} -> {result}")
+        LLM_LATENCY.observe(time.perf_counter() - start)
+        LLM_CALLS.inc("success")
+        logger.debug("OpenAI API parsed: %s -> %s", question, result)
         return result
         
     except Exception as e:
         # Fallback to heuristic parsing
-        print(f"Falling back to heuristic parsing due to: {e}")
+        LLM_LATENCY.observe(time.perf_counter() - start)
+        LLM_CALLS.inc(_llm_outcome(e))
+        NL_FALLBACKS.inc("llm_error")
+        logger.info("Falling back to heuristic parsing due to: %s", e)
         return heuristic_parse(question)
 
 
+def _llm_outcome(exc: Exception) -> str:
+    """Metric label for a failed OpenAI call."""
+    if isinstance(exc, json.JSONDecodeError):
+        return "bad_response"
+    if "Timeout" in type(exc).__name__:
+        return "timeout"
+    return "error"
+
+
 # Additional utility functions
 
 def validate_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,99 @@
+"""
+Keyset (cursor) pagination for the admin list endpoints and their CSV exports.
+
+A page is `ORDER BY <keys> LIMIT n` continued strictly after the previous
+page's last row, via a row-value comparison on the same keys. Every page
+is then the same short index range scan, however deep the client has
+paged, and rows inserted meanwhile neither shift nor repeat pages. The
+keys must end in a unique column (the primary key) and be backed by an
+index in that order.
+
+Cursors are opaque url-safe base64 of the last row's key values. The
+next one is returned in the X-Next-Cursor header.
+
+CSV exports walk the same keyset in ADMIN_EXPORT_CHUNK_SIZE chunks. After
+each chunk the session's identity map is cleared and its transaction
+ended, as with the chat history export, so memory stays constant and no
+snapshot is pinned for the length of a weekly compliance dump. Text cells
+that a spreadsheet would evaluate as a formula (leading =, +, -, @, tab or
+CR) are prefixed with a single quote.
+"""
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import literal, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+
+
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def csv_cell(value: Any) -> Any:
+    """`value` made inert for spreadsheets: user text must never run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [datetime.fromisoformat(v) if k.type.python_type is datetime else k.type.python_type(v) for k, v in zip(keys, values)]
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _page(stmt, keys: Sequence, descending: bool, after: Optional[Sequence[Any]]):
+    if after is not None:
+        bound = tuple_(*[literal(v, k.type) for k, v in zip(keys, after)])
+        stmt = stmt.where(tuple_(*keys) < bound if descending else tuple_(*keys) > bound)
+    return stmt.order_by(*[k.desc() if descending else k.asc() for k in keys])
+
+
+def _last_keys(row, keys: Sequence) -> List[Any]:
+    return [getattr(row, k.key) for k in keys]
+
+
+async def keyset_page(session: AsyncSession, stmt, keys: Sequence, cursor: Optional[str], limit: int, descending: bool = True) -> Tuple[list, Optional[str]]:
+    """One page of `stmt` after `cursor`, and the cursor of the page that follows (None on the last page)."""
+    after = decode_cursor(cursor, keys) if cursor else None
+    rows = (await session.exec(_page(stmt, keys, descending, after).limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return list(rows), None
+    return list(rows[:limit]), encode_cursor(_last_keys(rows[limit - 1], keys))
+
+
+async def iter_csv(session: AsyncSession, stmt, keys: Sequence, header: Sequence[str], to_row: Callable[[Any], Sequence[Any]],
+                   descending: bool = True, chunk_size: Optional[int] = None) -> AsyncIterator[str]:
+    """CSV text for every row of `stmt`, one chunk of rows per yielded string."""
+    chunk_size = chunk_size or settings.ADMIN_EXPORT_CHUNK_SIZE
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    after = None
+    while True:
+        rows = (await session.exec(_page(stmt, keys, descending, after).limit(chunk_size))).all()
+        for row in rows:
+            writer.writerow([csv_cell(v) for v in to_row(row)])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+        if len(rows) < chunk_size:
+            return
+        after = _last_keys(rows[-1], keys)
+        session.expunge_all()
+        await session.rollback()  # read-only: just releases the snapshot/connection until the next chunk
@@ -0,0 +1,266 @@
+"""
+Saved-search alerts: match each newly visible listing against every saved
+search without re-running them.
+
+Saved searches are `nl_to_query` filter dicts. Each one is indexed once,
+under its most selective criterion (its "anchor"):
+
+- a keyword: the longest [a-z0-9] run of its longest keyword, in an
+  inverted index. A listing looks up every substring of each of its words
+  (keyword filters are substring matches, as in `_apply_filters`).
+- else its category.
+- else its price range, in an interval index over quarter-octave price
+  buckets (a search sits in every bucket its [min, max] overlaps, a
+  listing's price reads exactly one bucket).
+- else nothing at all: the search matches every listing.
+
+Only the anchored candidates are checked against the full filters, so the
+cost per listing follows the number of plausible searches, not the total.
+
+`percolate` runs on the write paths that make a listing visible (create,
+approve, status change). It stores new alerts in the inbox table, one per
+(search, listing) as enforced by a unique index, so concurrent approvals
+skip each other's rows, and pushes them to the owner's open `/ws/alerts`
+sockets. The in-memory index is loaded lazily for the app's database
+(settings.DATABASE_URL). Saved-search endpoints keep it current. A
+(count, max id) fingerprint check reloads it when other workers changed the
+table.
+"""
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.listing import Listing, ListingStatus, Category
+from app.models.saved_search import SavedSearch, SearchAlert
+from app.schemas.listing import ListingPublic
+from app.schemas.saved_search import SearchAlertPublic
+
+WORD = re.compile(r"[a-z0-9]+")
+_MAX_WORD = 40  # longer "words" (URLs, serials) are not expanded into substrings
+_BUCKETS_PER_OCTAVE = 4
+_MAX_BUCKET = int(math.log2(1_000_000) * _BUCKETS_PER_OCTAVE) + 1
+
+
+def _bucket(price: float) -> int:
+    if price <= 1:
+        return 0
+    return min(int(math.log2(price) * _BUCKETS_PER_OCTAVE), _MAX_BUCKET)
+
+
+class _Search:
+    __slots__ = ("id", "user_id", "keywords", "category", "min_price", "max_price")
+
+    def __init__(self, search_id: int, user_id: int, filters: dict):
+        self.id, self.user_id = search_id, user_id
+        self.keywords = [k.strip().lower() for k in filters.get("keywords") or [] if k and k.strip()]
+        category = filters.get("category")
+        self.category = category if category in {c.value for c in Category} else None
+        self.min_price = filters.get("min_price")
+        self.max_price = filters.get("max_price")
+
+    def matches(self, listing: Listing) -> bool:
+        if self.category and listing.category != Category(self.category):
+            return False
+        if self.min_price is not None and listing.price < self.min_price:
+            return False
+        if self.max_price is not None and listing.price > self.max_price:
+            return False
+        title, description = listing.title.lower(), listing.description.lower()
+        return all(k in title or k in description for k in self.keywords)
+
+
+class Percolator:
+    def __init__(self, searches: Iterable[SavedSearch] = (), fingerprint: Tuple[int, int] = (0, 0)):
+        self.searches: Dict[int, _Search] = {}
+        self.anchors: Dict[int, Tuple[str, object]] = {}
+        self.by_keyword: Dict[str, Set[int]] = defaultdict(set)
+        self.by_category: Dict[str, Set[int]] = defaultdict(set)
+        self.by_price: Dict[int, Set[int]] = defaultdict(set)
+        self.match_all: Set[int] = set()
+        self.fingerprint = fingerprint
+        for search in searches:
+            self.add(search)
+
+    def add(self, saved: SavedSearch):
+        self.remove(saved.id)
+        search = self.searches[saved.id] = _Search(saved.id, saved.user_id, saved.filters)
+        if search.keywords:
+            pieces = WORD.findall(max(search.keywords, key=len))
+            if pieces:
+                anchor = max(pieces, key=len)
+                self.by_keyword[anchor].add(search.id)
+                self.anchors[search.id] = ("keyword", anchor)
+                return
+        if search.category:
+            self.by_category[search.category].add(search.id)
+            self.anchors[search.id] = ("category", search.category)
+        elif search.min_price is not None or search.max_price is not None:
+            buckets = range(_bucket(search.min_price or 0), _bucket(search.max_price) + 1 if search.max_price is not None else _MAX_BUCKET + 1)
+            for b in buckets:
+                self.by_price[b].add(search.id)
+            self.anchors[search.id] = ("price", buckets)
+        else:
+            self.match_all.add(search.id)
+            self.anchors[search.id] = ("all", None)
+
+    def remove(self, search_id: int):
+        if self.searches.pop(search_id, None) is None:
+            return
+        kind, key = self.anchors.pop(search_id)
+        if kind == "keyword":
+            self.by_keyword[key].discard(search_id)
+        elif kind == "category":
+            self.by_category[key].discard(search_id)
+        elif kind == "price":
+            for b in key:
+                self.by_price[b].discard(search_id)
+        else:
+            self.match_all.discard(search_id)
+
+    def candidates(self, listing: Listing) -> Set[int]:
+        found = set(self.match_all)
+        found |= self.by_category.get(listing.category.value if isinstance(listing.category, Category) else listing.category, set())
+        found |= self.by_price.get(_bucket(listing.price), set())
+        if self.by_keyword:
+            for word in set(WORD.findall(f"{listing.title} {listing.description}".lower())):
+                if len(word) > _MAX_WORD:
+                    continue
+                for i in range(len(word)):
+                    for j in range(i + 1, len(word) + 1):
+                        ids = self.by_keyword.get(word[i:j])
+                        if ids:
+                            found |= ids
+        return found
+
+    def match(self, listing: Listing) -> List[Tuple[int, int]]:
+        """(saved search id, owner id) of every search `listing` satisfies, excluding the seller's own."""
+        hits = []
+        for search_id in self.candidates(listing):
+            search = self.searches[search_id]
+            if search.user_id != listing.seller_id and search.matches(listing):
+                hits.append((search.id, search.user_id))
+        return sorted(hits)
+
+
+async def _fingerprint(session: AsyncSession) -> Tuple[int, int]:
+    count, max_id = (await session.exec(select(func.count(), func.max(SavedSearch.id)).select_from(SavedSearch))).one()
+    return int(count or 0), int(max_id or 0)
+
+
+_index: Optional[Percolator] = None
+_index_key: Optional[str] = None
+
+
+async def get_index(session: AsyncSession) -> Percolator:
+    """The percolator for the app's database, (re)loaded when the saved-search table changed elsewhere."""
+    global _index, _index_key
+    key = settings.DATABASE_URL
+    fingerprint = await _fingerprint(session)
+    if _index is None or _index_key != key or _index.fingerprint != fingerprint:
+        searches = (await session.exec(select(SavedSearch))).all()
+        _index, _index_key = Percolator(searches, fingerprint), key
+    return _index
+
+
+def on_saved(saved: SavedSearch):
+    """Keep a loaded index current after `saved` was committed."""
+    if _index is not None and _index_key == settings.DATABASE_URL:
+        count, max_id = _index.fingerprint
+        _index.add(saved)
+        _index.fingerprint = (count + 1, max(max_id, saved.id))
+
+
+def on_deleted(search_id: int):
+    if _index is not None and _index_key == settings.DATABASE_URL and search_id in _index.searches:
+        count, max_id = _index.fingerprint
+        _index.remove(search_id)
+        # a deleted top id lowers the real max; the next check then reloads
+        _index.fingerprint = (count - 1, max_id)
+
+
+def to_alert_public(alert: SearchAlert, listing: Listing) -> SearchAlertPublic:
+    """Inbox entry; also the payload of a pushed {"type": "alert"} frame."""
+    return SearchAlertPublic(
+        id=alert.id, saved_search_id=alert.saved_search_id, created_at=alert.created_at, read=alert.read,
+        listing=ListingPublic(id=listing.id, title=listing.title, description=listing.description, price=listing.price,
+                              category=listing.category.value, is_sold=listing.is_sold, photo_url=listing.photo_url,
+                              location=listing.location, seller_id=listing.seller_id),
+    )
+
+
+class AlertHub:
+    """Open /ws/alerts sockets per user."""
+
+    def __init__(self):
+        self.sockets: Dict[int, Set[WebSocket]] = defaultdict(set)
+
+    def connect(self, user_id: int, websocket: WebSocket):
+        self.sockets[user_id].add(websocket)
+
+    def disconnect(self, user_id: int, websocket: WebSocket):
+        self.sockets[user_id].discard(websocket)
+        if not self.sockets[user_id]:
+            del self.sockets[user_id]
+
+    async def push(self, user_id: int, payload: dict):
+        for websocket in list(self.sockets.get(user_id, ())):
+            try:
+                await websocket.send_json(payload)
+            except Exception:
+                self.disconnect(user_id, websocket)
+
+
+hub = AlertHub()
+
+
+def _insert(session: AsyncSession):
+    """INSERT construct with ON CONFLICT support for the session's dialect."""
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+async def percolate(session: AsyncSession, listings: List[Listing]) -> int:
+    """Alert the owners of saved searches matched by `listings` (approved, unsold ones). Returns new alerts."""
+    visible = [l for l in listings if l.status == ListingStatus.approved and not l.is_sold]
+    if not visible:
+        return 0
+    index = await get_index(session)
+    matched = [(search_id, user_id, listing) for listing in visible for search_id, user_id in index.match(listing)]
+    if not matched:
+        return 0
+    already = set((await session.exec(
+        select(SearchAlert.saved_search_id, SearchAlert.listing_id)
+        .where(SearchAlert.listing_id.in_([l.id for l in visible]), SearchAlert.saved_search_id.in_({m[0] for m in matched}))
+    )).all())
+    candidates = {(search_id, listing.id): SearchAlert(user_id=user_id, saved_search_id=search_id, listing_id=listing.id)
+                  for search_id, user_id, listing in matched if (search_id, listing.id) not in already}
+    if not candidates:
+        return 0
+    # a concurrent percolation of the same listing may have inserted some meanwhile: skip those
+    stmt = (_insert(session)(SearchAlert)
+            .values([alert.model_dump(exclude={"id"}) for alert in candidates.values()])
+            .on_conflict_do_nothing(index_elements=["saved_search_id", "listing_id"])
+            .returning(SearchAlert.id, SearchAlert.saved_search_id, SearchAlert.listing_id))
+    alerts = []
+    for alert_id, search_id, listing_id in (await session.exec(stmt)).all():
+        alert = candidates[search_id, listing_id]
+        alert.id = alert_id
+        alerts.append(alert)
+    await session.commit()
+    if not alerts:
+        return 0
+    listing_of = {l.id: l for l in visible}
+    for alert in alerts:
+        if alert.user_id in hub.sockets:
+            await hub.push(alert.user_id, {"type": "alert", "alert": to_alert_public(alert, listing_of[alert.listing_id]).model_dump(mode="json")})
+    return len(alerts)
@@ -0,0 +1,334 @@
+"""
+Offline semantic search over listing titles and descriptions.
+
+A deterministic latent-semantic model, no network and no model download:
+
+1. Each listing becomes a hashed TF-IDF vector: singularised words plus
+   5-letter stems ("calculators" -> "calculator", "calcu"), hashed with crc32 into SEMANTIC_HASH_DIM
+   buckets, sublinear tf, smoothed idf, L2-normalised.
+2. A randomized truncated SVD (NumPy only, fixed seed) projects these onto
+   SEMANTIC_DIM latent dimensions, so listings that share vocabulary with
+   each other land near each other even without sharing the query's words.
+3. Unit-length float32 embeddings are stored in SEMANTIC_INDEX_DIR as a
+   memory-mapped .npy matrix; a query is one matrix-vector product (cosine)
+   followed by an argpartition top-k.
+
+Candidates are re-checked against the caller's category/price statement in
+SQL, as with the fuzzy fallback. Listing events keep an in-memory delta
+(new/edited vectors, tombstones) on top of the memmap. The index belongs to
+the logical database (settings.DATABASE_URL), whichever replica a request
+reads through, and is loaded once per process in a worker thread. On load
+the stored database/listing count/max id are compared with the database and
+the index is refitted when they differ;
+`python -m app.services.semantic_search build` refits it explicitly (e.g.
+nightly, after many edits, or ahead of a deploy).
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.listing import Listing
+from app.services import listing_events
+
+WORD = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {"a", "an", "and", "the", "for", "of", "with", "in", "on", "to", "or", "by", "at", "from", "is", "it", "this", "that", "my", "i"}
+_ROW_CHUNK = 4096
+_SEED = 20251
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def features(text: str) -> Counter:
+    tokens = [_singular(w) for w in WORD.findall(text.lower()) if len(w) > 1 and w not in STOP_WORDS]
+    counts = Counter(tokens)
+    counts.update(w[:5] + "~" for w in tokens if len(w) > 5)
+    return counts
+
+
+def _bucket(feature: str, hash_dim: int) -> int:
+    return zlib.crc32(feature.encode()) % hash_dim
+
+
+def _hashed_rows(texts: List[str], hash_dim: int):
+    """CSR (indptr, indices, counts) of hashed feature counts."""
+    indptr, indices, data = [0], [], []
+    for text in texts:
+        row: Dict[int, float] = {}
+        for feature, n in features(text).items():
+            b = _bucket(feature, hash_dim)
+            row[b] = row.get(b, 0.0) + n
+        indices.extend(row)
+        data.extend(row.values())
+        indptr.append(len(indices))
+    return np.asarray(indptr, np.int64), np.asarray(indices, np.int64), np.asarray(data, np.float32)
+
+
+def _tfidf(indptr, indices, counts, idf):
+    """Sublinear tf * idf, each row L2-normalised (in place on a copy)."""
+    data = (1.0 + np.log(counts)) * idf[indices]
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(indptr) - 1))
+    data /= np.maximum(norms[rows], 1e-12)
+    return data.astype(np.float32)
+
+
+def _csr_dot(indptr, indices, data, dense):
+    """(sparse N x D) @ (dense D x k)"""
+    n = len(indptr) - 1
+    out = np.zeros((n, dense.shape[1]), np.float32)
+    for start in range(0, n, _ROW_CHUNK):
+        stop = min(n, start + _ROW_CHUNK)
+        lo, hi = indptr[start], indptr[stop]
+        if lo == hi:
+            continue
+        contrib = data[lo:hi, None] * dense[indices[lo:hi]]
+        nonempty = np.diff(indptr[start:stop + 1]) > 0
+        out[start:stop][nonempty] = np.add.reduceat(contrib, indptr[start:stop][nonempty] - lo, axis=0)
+    return out
+
+
+def _csr_transpose(indptr, indices, data, n_cols):
+    """CSR of the transposed matrix, so X.T @ Y is another _csr_dot."""
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    t_indptr = np.concatenate([[0], np.cumsum(np.bincount(indices, minlength=n_cols))])
+    return t_indptr, rows[order], data[order]
+
+
+def _normalize(m):
+    return m / np.maximum(np.linalg.norm(m, axis=-1, keepdims=True), 1e-12)
+
+
+def fit(texts: List[str], dim: int, hash_dim: int):
+    """Fit idf and SVD components; returns (idf, components D x dim, doc embeddings N x dim)."""
+    if not texts:
+        return np.ones(hash_dim, np.float32), np.zeros((hash_dim, dim), np.float32), np.zeros((0, dim), np.float32)
+    indptr, indices, counts = _hashed_rows(texts, hash_dim)
+    n = len(texts)
+    df = np.bincount(indices, minlength=hash_dim)
+    idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+    data = _tfidf(indptr, indices, counts, idf)
+
+    # Randomized range finder with two power iterations (Halko et al.)
+    rng = np.random.default_rng(_SEED)
+    k = min(dim + 10, n)
+    xt = _csr_transpose(indptr, indices, data, hash_dim)
+    y = _csr_dot(indptr, indices, data, rng.standard_normal((hash_dim, k)).astype(np.float32))
+    for _ in range(2):
+        q, _ = np.linalg.qr(y)
+        y = _csr_dot(indptr, indices, data, _csr_dot(*xt, q))
+    q, _ = np.linalg.qr(y)
+    b = _csr_dot(*xt, q).T  # k x D
+    _, _, vt = np.linalg.svd(b, full_matrices=False)
+    components = np.zeros((hash_dim, dim), np.float32)
+    r = min(dim, vt.shape[0])
+    components[:, :r] = vt[:r].T
+    embeddings = _normalize(_csr_dot(indptr, indices, data, components))
+    return idf, components, embeddings
+
+
+class SemanticIndex:
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        model = np.load(os.path.join(directory, "model.npz"))
+        self.idf, self.components = model["idf"], model["components"]
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(directory, "ids.npy"))
+        if len(self.ids) != len(self.vectors):
+            raise ValueError("ids.npy and vectors.npy are from different builds")
+        self.row_of = {int(i): r for r, i in enumerate(self.ids)}
+        # Changes since the files were written
+        self.delta: Dict[int, np.ndarray] = {}
+        self.dead_rows: set = set()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        indptr, indices, counts = _hashed_rows(texts, self.meta["hash_dim"])
+        data = _tfidf(indptr, indices, counts, self.idf)
+        return _normalize(_csr_dot(indptr, indices, data, self.components))
+
+    def upsert(self, listing_id: int, text: str):
+        self.remove(listing_id)
+        self.delta[listing_id] = self.embed([text])[0]
+
+    def remove(self, listing_id: int):
+        self.delta.pop(listing_id, None)
+        row = self.row_of.get(listing_id)
+        if row is not None:
+            self.dead_rows.add(row)
+
+    def vectors_for(self, listing_ids: List[int]) -> np.ndarray:
+        """Current embeddings of `listing_ids` (zero rows for unknown or removed ids)."""
+        out = np.zeros((len(listing_ids), self.components.shape[1]), np.float32)
+        for i, listing_id in enumerate(listing_ids):
+            vector = self.delta.get(listing_id)
+            if vector is None:
+                row = self.row_of.get(listing_id)
+                if row is None or row in self.dead_rows:
+                    continue
+                vector = self.vectors[row]
+            out[i] = vector
+        return out
+
+    def snapshot(self) -> "SemanticIndex":
+        """A view sharing the files but with its own delta/tombstones, safe to query while events keep applying."""
+        view = copy.copy(self)
+        view.delta, view.dead_rows = dict(self.delta), set(self.dead_rows)
+        return view
+
+    def query(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """Top-k (listing id, cosine) pairs for `text`."""
+        q = self.embed([text])[0]
+        if not q.any():
+            return []
+        scores = self.vectors @ q
+        if self.dead_rows:
+            scores[list(self.dead_rows)] = -1.0
+        ids = self.ids
+        if self.delta:
+            ids = np.concatenate([ids, np.fromiter(self.delta, np.int64, len(self.delta))])
+            scores = np.concatenate([scores, np.stack(list(self.delta.values())) @ q])
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] >= settings.SEMANTIC_MIN_SCORE]
+
+
+def _fingerprint(sync_session) -> Tuple[int, int]:
+    count, max_id = sync_session.exec(select(func.count(), func.max(Listing.id)).select_from(Listing)).one()
+    return int(count or 0), int(max_id or 0)
+
+
+def build(sync_session, directory: str, database_url: Optional[str] = None) -> SemanticIndex:
+    """Fit the model on every listing of `database_url` (the app's by default) and (re)write the index files atomically."""
+    started = time.perf_counter()
+    rows = sync_session.exec(select(Listing.id, Listing.title, Listing.description).order_by(Listing.id)).all()
+    texts = [f"{title} {description}" for _, title, description in rows]
+    idf, components, embeddings = fit(texts, settings.SEMANTIC_DIM, settings.SEMANTIC_HASH_DIM)
+    count, max_id = _fingerprint(sync_session)
+
+    os.makedirs(directory, exist_ok=True)
+    # unique temp names: several workers may rebuild the same directory at once
+    tmp = {name: _temp_path(directory, name) for name in ("vectors.npy", "ids.npy", "model.npz", "meta.json")}
+    try:
+        vectors = np.lib.format.open_memmap(tmp["vectors.npy"], mode="w+", dtype=np.float32, shape=embeddings.shape)
+        vectors[:] = embeddings
+        vectors.flush()
+        del vectors
+        with open(tmp["ids.npy"], "wb") as f:
+            np.save(f, np.asarray([r[0] for r in rows], np.int64))
+        with open(tmp["model.npz"], "wb") as f:
+            np.savez(f, idf=idf, components=components)
+        meta = {"database_url": database_url or settings.DATABASE_URL, "count": count, "max_id": max_id,
+                "dim": settings.SEMANTIC_DIM, "hash_dim": settings.SEMANTIC_HASH_DIM,
+                "built_at": time.time(), "build_seconds": round(time.perf_counter() - started, 3)}
+        with open(tmp["meta.json"], "w") as f:
+            json.dump(meta, f)
+        for final, path in tmp.items():
+            os.replace(path, os.path.join(directory, final))
+    finally:
+        for path in tmp.values():
+            if os.path.exists(path):
+                os.remove(path)
+    return SemanticIndex(directory)
+
+
+def _temp_path(directory: str, name: str) -> str:
+    fd, path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    os.close(fd)
+    return path
+
+
+def _load_or_build(sync_session, directory: str) -> SemanticIndex:
+    try:
+        index = SemanticIndex(directory)
+    except (OSError, ValueError, KeyError):
+        return build(sync_session, directory)
+    meta = index.meta
+    current = (settings.DATABASE_URL, *_fingerprint(sync_session),
+               settings.SEMANTIC_DIM, settings.SEMANTIC_HASH_DIM)
+    if (meta["database_url"], meta["count"], meta["max_id"], meta["dim"], meta["hash_dim"]) != current:
+        return build(sync_session, directory)
+    return index
+
+
+def _apply_event(index: SemanticIndex, event: listing_events.ListingEvent):
+    if event.kind == "upsert":
+        for listing in event.listings:
+            index.upsert(listing.id, f"{listing.title} {listing.description}")
+    else:
+        for listing_id in event.ids:
+            index.remove(listing_id)
+
+
+_index = listing_events.DerivedIndex(
+    lambda sync_session: _load_or_build(sync_session, settings.SEMANTIC_INDEX_DIR), _apply_event,
+    key=lambda: f"{settings.DATABASE_URL}|{settings.SEMANTIC_INDEX_DIR}",
+)
+
+
+async def get_index() -> SemanticIndex:
+    """The index for the app's database, loaded (or built) on first use."""
+    return await _index.get()
+
+
+def load_index() -> SemanticIndex:
+    """Blocking `get_index`, for worker threads."""
+    return _index.load()
+
+
+async def semantic_search(session: AsyncSession, question: str, base_stmt, limit: int) -> List[Tuple[Listing, float]]:
+    """
+    Listings from `base_stmt` (a filtered select(Listing)) closest in meaning
+    to `question`, best first, with their cosine similarity.
+    """
+    index = await get_index()
+    # a pass over the whole memmap: score in the threadpool instead of blocking the event loop
+    ranked = await run_in_threadpool(index.snapshot().query, question, settings.SEMANTIC_CANDIDATES)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    rows = (await session.exec(base_stmt.where(Listing.id.in_(list(scores))))).all()
+    rows = sorted(rows, key=lambda l: (-scores[l.id], l.id))
+    return [(listing, scores[listing.id]) for listing in rows[:limit]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.services.semantic_search", description="Build the offline semantic search index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--index-dir", default=settings.SEMANTIC_INDEX_DIR)
+    args = parser.parse_args(argv)
+
+    from sqlmodel import Session, create_engine
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        index = build(session, args.index_dir, args.database_url)
+    print(json.dumps(index.meta, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
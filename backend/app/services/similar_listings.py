@@ -0,0 +1,259 @@
+"""
+Precomputed "similar listings" for GET /listings/{id}/similar.
+
+Every approved, unsold listing keeps its SIMILAR_K best neighbors in the
+`listingneighbor` table, so serving recommendations is one primary-key range
+read. A neighbor's score blends
+
+- cosine similarity of the offline semantic embeddings (hashed TF-IDF
+  projected by the SVD model in `semantic_search`), across all categories,
+- SIMILAR_CATEGORY_WEIGHT when both listings share a category,
+- SIMILAR_PRICE_WEIGHT * exp(-|log(p1 / p2)|) for price proximity.
+
+The score is symmetric, which keeps refreshes incremental: listing events
+(including "reset" events that carry the affected ids, as bulk import and
+seller purges do) only mark ids dirty, and the next refresh re-ranks the dirty listings, the
+listings that pointed at them, and the listings whose k-th score a dirty
+listing now beats; everything else is left alone. Scoring runs in NumPy
+blocks of SIMILAR_BATCH_SIZE rows.
+
+Refreshes never run on the request path. With SIMILAR_REFRESH_SECONDS > 0
+(opt-in, off by default so booting the app fits and writes nothing),
+`run_refresh_loop` folds pending changes in at that interval from a worker
+thread with its own session, so the endpoint only ever reads and may trail
+writes by that interval. A "reset" event without ids or an empty table
+triggers a full recompute, which is also available offline as
+`python -m app.services.similar_listings rebuild` (run it after the first
+deploy, and periodically, rather than letting workers start with a full build).
+
+NumPy and the semantic model are only imported when a refresh actually runs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Dict, List, Set
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.listing import Listing, ListingStatus, Category
+from app.models.listing_neighbor import ListingNeighbor
+from app.services import listing_events
+
+logger = logging.getLogger(__name__)
+
+_dirty: Set[int] = set()
+_reset = False
+_populated: Set[str] = set()  # databases whose neighbor table is known to be non-empty
+_state_lock = threading.Lock()  # events arrive on the loop, refreshes run in a worker thread
+_refresh_lock = threading.Lock()
+_CATEGORY_CODES = {c: code for code, c in enumerate(Category)}
+
+
+def needs_refresh() -> bool:
+    return _reset or bool(_dirty)
+
+
+@listing_events.subscribe
+def _on_listing_event(event: listing_events.ListingEvent):
+    global _reset
+    with _state_lock:
+        if event.kind == "reset" and not event.ids:
+            _reset = True
+            _dirty.clear()
+        elif not _reset:
+            _dirty.update(event.ids)
+
+
+def _candidates(sync_session):
+    """(ids, category codes, prices) of every listing that may be recommended."""
+    import numpy as np
+    rows = sync_session.exec(
+        select(Listing.id, Listing.category, Listing.price)
+        .where(Listing.status == ListingStatus.approved, Listing.is_sold == False)  # noqa: E712
+        .order_by(Listing.id)
+    ).all()
+    ids = np.fromiter((r[0] for r in rows), np.int64, len(rows))
+    categories = np.fromiter((_CATEGORY_CODES.get(r[1], -1) for r in rows), np.int64, len(rows))
+    prices = np.fromiter((r[2] for r in rows), np.float32, len(rows))
+    return ids, categories, prices
+
+
+def _embeddings(sync_session, index, ids, fresh: Set[int]):
+    """Candidate vectors; `fresh` ids are re-embedded from their current text."""
+    import numpy as np
+    vectors = index.vectors_for(ids.tolist())
+    if fresh:
+        rows = sync_session.exec(select(Listing.id, Listing.title, Listing.description).where(Listing.id.in_(list(fresh)))).all()
+        if rows:
+            position = {int(i): p for p, i in enumerate(ids)}
+            at = [position[r[0]] for r in rows if r[0] in position]
+            texts = [f"{r[1]} {r[2]}" for r in rows if r[0] in position]
+            if at:
+                vectors[np.asarray(at)] = index.embed(texts)
+    return vectors
+
+
+def _scores(rows, vectors, categories, prices):
+    """Blended similarity of candidates `rows` against every candidate (float32 throughout)."""
+    import numpy as np
+    scores = vectors[rows] @ vectors.T
+    same = categories[rows, None] == categories[None, :]
+    scores += np.float32(settings.SIMILAR_CATEGORY_WEIGHT) * same
+    # exp(-|log(a / b)|) == min(a, b) / max(a, b)
+    a, b = prices[rows, None], prices[None, :]
+    scores += np.float32(settings.SIMILAR_PRICE_WEIGHT) * (np.minimum(a, b) / np.maximum(a, b))
+    scores[np.arange(len(rows)), rows] = -np.inf  # never your own neighbor
+    return scores
+
+
+def _top_k(rows, ids, vectors, categories, prices) -> List[Dict]:
+    """Neighbor rows for candidates `rows`, scored in blocks."""
+    import numpy as np
+    k = min(settings.SIMILAR_K, len(ids) - 1)
+    out: List[Dict] = []
+    if k <= 0:
+        return out
+    for start in range(0, len(rows), settings.SIMILAR_BATCH_SIZE):
+        block = rows[start:start + settings.SIMILAR_BATCH_SIZE]
+        scores = _scores(block, vectors, categories, prices)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        for row, neighbors, neighbor_scores in zip(block, top, top_scores):
+            listing_id = int(ids[row])
+            out.extend({"listing_id": listing_id, "rank": rank, "neighbor_id": int(ids[n]), "score": float(s)}
+                       for rank, (n, s) in enumerate(zip(neighbors, neighbor_scores)))
+    return out
+
+
+def _write(sync_session, listing_ids, rows: List[Dict]):
+    """Replace the neighbors of `listing_ids` (all listings when None) with `rows`."""
+    if listing_ids is None:
+        sync_session.exec(delete(ListingNeighbor))
+    else:
+        listing_ids = list(listing_ids)
+        for start in range(0, len(listing_ids), settings.DELETE_BATCH_SIZE):
+            chunk = listing_ids[start:start + settings.DELETE_BATCH_SIZE]
+            sync_session.exec(delete(ListingNeighbor).where(ListingNeighbor.listing_id.in_(chunk)))
+    connection = sync_session.connection()
+    for start in range(0, len(rows), 5000):
+        connection.execute(insert(ListingNeighbor.__table__), rows[start:start + 5000])
+    sync_session.commit()
+
+
+def rebuild(sync_session, index) -> int:
+    """Recompute the whole table. Returns the number of listings ranked."""
+    import numpy as np
+    ids, categories, prices = _candidates(sync_session)
+    vectors = _embeddings(sync_session, index, ids, set())
+    rows = _top_k(np.arange(len(ids)), ids, vectors, categories, prices)
+    _write(sync_session, None, rows)
+    return len(ids)
+
+
+def update(sync_session, index, changed: Set[int]) -> int:
+    """Re-rank only what `changed` listings can affect. Returns the number of listings re-ranked."""
+    import numpy as np
+    ids, categories, prices = _candidates(sync_session)
+    vectors = _embeddings(sync_session, index, ids, changed)
+    position = {int(i): p for p, i in enumerate(ids)}
+    affected = {i for i in changed if i in position}
+
+    # lists that contained a changed listing may need to drop or re-order it
+    affected.update(sync_session.exec(
+        select(ListingNeighbor.listing_id).where(ListingNeighbor.neighbor_id.in_(list(changed))).distinct()
+    ).all())
+
+    # lists that a changed listing now beats the k-th entry of
+    rows = np.asarray(sorted(position[i] for i in changed if i in position), np.int64)
+    if len(rows):
+        kth = np.full(len(ids), -np.inf)
+        for listing_id, worst, count in sync_session.exec(
+            select(ListingNeighbor.listing_id, func.min(ListingNeighbor.score), func.count()).group_by(ListingNeighbor.listing_id)
+        ).all():
+            if listing_id in position and count >= settings.SIMILAR_K:
+                kth[position[listing_id]] = worst
+        best = np.full(len(ids), -np.inf)
+        for start in range(0, len(rows), settings.SIMILAR_BATCH_SIZE):
+            best = np.maximum(best, _scores(rows[start:start + settings.SIMILAR_BATCH_SIZE], vectors, categories, prices).max(axis=0))
+        affected.update(int(i) for i in ids[best > kth])
+
+    ranked = np.asarray(sorted(position[i] for i in affected if i in position), np.int64)
+    _write(sync_session, affected | changed, _top_k(ranked, ids, vectors, categories, prices))
+    return len(ranked)
+
+
+def _refresh(sync_session, index, key: str, changed: Set[int], reset: bool) -> int:
+    if not reset and key not in _populated:
+        reset = sync_session.exec(select(ListingNeighbor.listing_id).limit(1)).first() is None
+    count = rebuild(sync_session, index) if reset else update(sync_session, index, changed)
+    _populated.add(key)
+    return count
+
+
+def refresh_pending() -> int:
+    """
+    Fold pending listing changes (or the first full build) into the app
+    database's neighbor table. Blocking; returns the number of listings re-ranked.
+    """
+    global _reset
+    from app.db import session as db
+    from app.services import semantic_search
+    key = settings.DATABASE_URL
+    with _refresh_lock:
+        if not needs_refresh() and key in _populated:
+            return 0
+        with _state_lock:
+            changed, reset = set(_dirty), _reset
+            _dirty.clear()
+            _reset = False
+        try:
+            index = semantic_search.load_index()
+            with Session(db.engine) as session:
+                return _refresh(session, index, key, changed, reset)
+        except Exception:
+            with _state_lock:
+                _dirty.update(changed)
+                _reset = _reset or reset
+            raise
+
+
+async def run_refresh_loop():
+    """Background task: apply listing changes to the neighbor table every SIMILAR_REFRESH_SECONDS."""
+    while True:
+        if needs_refresh() or settings.DATABASE_URL not in _populated:
+            try:
+                refreshed = await asyncio.to_thread(refresh_pending)
+                if refreshed:
+                    logger.info("Re-ranked similar listings of %d listings", refreshed)
+            except Exception:
+                logger.exception("Similar listings refresh failed")
+        await asyncio.sleep(settings.SIMILAR_REFRESH_SECONDS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.services.similar_listings", description="Recompute the similar-listings table")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--index-dir", default=settings.SEMANTIC_INDEX_DIR)
+    args = parser.parse_args(argv)
+
+    from sqlmodel import Session, create_engine
+    from app.services import semantic_search
+    engine = create_engine(args.database_url)
+    with Session(engine) as session:
+        started = time.perf_counter()
+        count = rebuild(session, semantic_search.build(session, args.index_dir, args.database_url))
+    print(json.dumps({"listings": count, "k": settings.SIMILAR_K, "seconds": round(time.perf_counter() - started, 3)}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Search-box typeahead over approved listings.
+
+Terms are title words, course codes (from title or description, normalised
+"CMPE 202" -> "cmpe202") and category names, each weighted by the number of
+approved listings that contain it. They are kept in a sorted array so a
+prefix is two `bisect` calls away. Short prefixes (up to TOP_PREFIX_LEN
+characters) match a large share of the vocabulary, so their best TOP_K terms
+are kept per prefix and only recomputed after a term under that prefix
+changes; longer prefixes pick the best `limit` of their (small) slice. The
+last TYPEAHEAD_CACHE_SIZE answers are memoised until the next change.
+
+The index is built on first use, once per process (terms are sorted once at
+the end), and then maintained incrementally from listing events (create,
+approve/reject, edit, delete).
+"""
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.listing import Listing, ListingStatus, Category
+from app.services import listing_events
+
+WORD = re.compile(r"[a-z][a-z0-9'-]+")
+COURSE_CODE = re.compile(r"\b([a-z]{2,5})\s?-?(\d{2,3}[a-z]?)\b")
+STOP_WORDS = {"a", "an", "and", "the", "for", "of", "with", "in", "on", "to", "or", "by", "at", "from", "is", "new", "like", "used"}
+CATEGORIES = {c.value for c in Category if c != Category.none}
+TOP_PREFIX_LEN = 3  # prefixes up to this length serve from a precomputed top list
+TOP_K = 50  # size of those lists; the largest limit /search/suggest accepts
+
+
+def listing_terms(title: str, description: str, category: Optional[str]) -> Dict[str, str]:
+    """term -> kind ("word", "course", "category") for one listing."""
+    terms = {w.strip("'-"): "word" for w in WORD.findall(title.lower())}
+    terms = {t: k for t, k in terms.items() if len(t) >= 2 and t not in STOP_WORDS}
+    for subject, number in COURSE_CODE.findall(f"{title} {description}".lower()):
+        terms[subject + number] = "course"
+    if category in CATEGORIES:
+        terms[category] = "category"
+    return terms
+
+
+class TypeaheadIndex:
+    def __init__(self):
+        self.keys: List[str] = []  # sorted distinct terms
+        self.weights: Counter = Counter()
+        self.kinds: Dict[str, str] = {}
+        self.docs: Dict[int, Dict[str, str]] = {}
+        self._top: Dict[str, List[str]] = {}  # short prefix -> its best TOP_K terms
+        self._cache: "OrderedDict[Tuple[str, int], List[dict]]" = OrderedDict()
+
+    @classmethod
+    def build(cls, docs: Iterable[Tuple[int, Dict[str, str]]]) -> "TypeaheadIndex":
+        """Index of (listing_id, terms) pairs, sorting the vocabulary once instead of inserting term by term."""
+        index = cls()
+        for listing_id, terms in docs:
+            index._count(listing_id, terms)
+        index.keys = sorted(index.weights)
+        return index
+
+    def _count(self, listing_id: int, terms: Dict[str, str]) -> List[str]:
+        """Record `terms` for a listing; returns the terms that are new to the vocabulary."""
+        self.docs[listing_id] = terms
+        new = []
+        for term, kind in terms.items():
+            if not self.weights[term]:
+                new.append(term)
+            self.weights[term] += 1
+            # a term that is ever a course code / category is reported as such
+            if self.kinds.get(term, "word") == "word":
+                self.kinds[term] = kind
+        return new
+
+    def _changed(self, terms: Iterable[str]):
+        for term in terms:
+            for n in range(min(len(term), TOP_PREFIX_LEN) + 1):
+                self._top.pop(term[:n], None)
+        self._cache.clear()
+
+    def add(self, listing_id: int, terms: Dict[str, str]):
+        self.remove(listing_id)
+        for term in self._count(listing_id, terms):
+            insort(self.keys, term)
+        self._changed(terms)
+
+    def remove(self, listing_id: int):
+        terms = self.docs.pop(listing_id, None)
+        if not terms:
+            return
+        for term in terms:
+            self.weights[term] -= 1
+            if not self.weights[term]:
+                del self.weights[term], self.kinds[term]
+                del self.keys[bisect_left(self.keys, term)]
+        self._changed(terms)
+
+    def _best(self, prefix: str, limit: int) -> List[str]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        return heapq.nsmallest(limit, self.keys[lo:hi], key=lambda t: (-self.weights[t], t))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = prefix.strip().lower().replace(" ", "")
+        key = (prefix, limit)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if len(prefix) <= TOP_PREFIX_LEN and limit <= TOP_K:
+            if prefix not in self._top:
+                self._top[prefix] = self._best(prefix, TOP_K)
+            best = self._top[prefix][:limit]
+        else:
+            best = self._best(prefix, limit)
+        answer = self._cache[key] = [{"term": t, "kind": self.kinds[t], "count": self.weights[t]} for t in best]
+        while len(self._cache) > settings.TYPEAHEAD_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return answer
+
+
+def _build_index(sync_session) -> TypeaheadIndex:
+    stmt = (select(Listing.id, Listing.title, Listing.description, Listing.category)
+            .where(Listing.status == ListingStatus.approved).execution_options(yield_per=5000))
+    return TypeaheadIndex.build((listing_id, listing_terms(title, description, category.value))
+                                for listing_id, title, description, category in sync_session.exec(stmt))
+
+
+def _apply_event(index: TypeaheadIndex, event: listing_events.ListingEvent):
+    if event.kind == "upsert":
+        for listing in event.listings:
+            if listing.status == ListingStatus.approved:
+                index.add(listing.id, listing_terms(listing.title, listing.description, listing.category.value))
+            else:
+                index.remove(listing.id)
+    else:
+        for listing_id in event.ids:
+            index.remove(listing_id)
+
+
+_index = listing_events.DerivedIndex(_build_index, _apply_event)
+
+
+async def get_index() -> TypeaheadIndex:
+    """The index for the app's database, built on first use."""
+    return await _index.get()
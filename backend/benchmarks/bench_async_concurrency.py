@@ -0,0 +1,156 @@
+"""
+Load test: async routes vs the old sync-route model under high concurrency.
+
+Sync `def` routes run in Starlette's threadpool (40 threads by default), so
+no more than 40 requests can be talking to the database at once no matter how
+many clients are waiting. The async routes have no such ceiling; they are
+bounded only by the async engine's connection pool.
+
+The benchmark serves `GET /listings` (async, AsyncSession) next to a sync
+twin of the pre-port implementation, runs both in-process against a temporary
+SQLite database, and reports throughput plus the peak number of queries in
+flight at once.
+
+    python -m benchmarks.bench_async_concurrency --listings 20000 --concurrency 10 40 100 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+import httpx
+from fastapi import Depends
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class _InFlight:
+    """Counts statements executing at the same time across threads/greenlets."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def attach(self, sync_engine):
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _before(*args):
+            with self.lock:
+                self.current += 1
+                self.peak = max(self.peak, self.current)
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _after(*args):
+            with self.lock:
+                self.current -= 1
+
+    def reset(self):
+        self.current = 0
+        self.peak = 0
+
+
+def _populate(engine, n_listings: int):
+    from app.models import User, Listing, Category
+    with Session(engine) as session:
+        user = User(email="bench@univ.edu", name="Bench", hashed_password="x")
+        session.add(user); session.commit(); session.refresh(user)
+        cats = list(Category)
+        now = datetime.utcnow()
+        rows = [{"title": f"Item {i}", "description": f"benchmark listing number {i}", "price": 5.0 + i % 500,
+                 "category": cats[i % len(cats)], "status": "approved", "is_sold": False,
+                 "created_at": now, "seller_id": user.id}
+                for i in range(n_listings)]
+        session.exec(insert(Listing), params=rows)
+        session.commit()
+
+
+async def _drive(client: httpx.AsyncClient, path: str, concurrency: int, requests: int) -> dict:
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            r = await client.get(path)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def _run(args):
+    from app.main import app
+    from app.db.async_session import get_async_session
+    from app.models.listing import Listing, ListingStatus
+    from app.schemas.listing import ListingPublic
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "bench.sqlite3")
+    pool = dict(pool_size=args.pool_size, max_overflow=0)
+    sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, **pool)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **pool)
+    SQLModel.metadata.create_all(sync_engine)
+    _populate(sync_engine, args.listings)
+
+    in_flight = _InFlight()
+    in_flight.attach(sync_engine)
+    in_flight.attach(async_engine.sync_engine)
+
+    async def _get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    def _get_sync_session():
+        with Session(sync_engine) as session:
+            yield session
+
+    # Sync twin of the pre-port list_listings (keyword scan forces real DB work).
+    @app.get("/bench/sync-listings", response_model=List[ListingPublic])
+    def sync_listings(q: Optional[str] = None, session: Session = Depends(_get_sync_session)):
+        stmt = select(Listing).where(Listing.status == ListingStatus.approved)
+        if q:
+            stmt = stmt.where(Listing.title.ilike(f"%{q}%") | Listing.description.ilike(f"%{q}%"))
+        items = session.exec(stmt.order_by(Listing.created_at.desc()).limit(20)).all()
+        return [ListingPublic(id=i.id, title=i.title, description=i.description, price=i.price, category=i.category.value, is_sold=i.is_sold, seller_id=i.seller_id) for i in items]
+
+    app.dependency_overrides[get_async_session] = _get_async_session
+    report = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in args.concurrency:
+            for label, url in (("sync", "/bench/sync-listings?q=number 1999"), ("async", "/listings?q=number 1999")):
+                in_flight.reset()
+                result = await _drive(client, url, concurrency, args.requests)
+                result.update({"route": label, "concurrency": concurrency, "peak_queries_in_flight": in_flight.peak})
+                report.append(result)
+    app.dependency_overrides.clear()
+    await async_engine.dispose()
+    sync_engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async vs sync route concurrency benchmark")
+    parser.add_argument("--listings", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 40, 100, 200])
+    parser.add_argument("--pool-size", type=int, default=200)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
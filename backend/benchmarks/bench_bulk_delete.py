@@ -0,0 +1,64 @@
+"""
+Benchmark: deleting a chat room with a large message history.
+
+Compares the old per-row ORM delete (load every Message, session.delete each)
+with the set-based batched delete in app.services.bulk_delete.
+
+    python -m benchmarks.bench_bulk_delete --messages 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine, select
+from app.models import User, Listing, ChatRoom, Message
+from app.services.bulk_delete import delete_where
+
+
+def _populate(engine, n_messages: int) -> int:
+    with Session(engine) as session:
+        user = User(email="bench@univ.edu", name="Bench", hashed_password="x")
+        session.add(user); session.commit(); session.refresh(user)
+        listing = Listing(title="Bench", description="Bench", price=1.0, seller_id=user.id)
+        session.add(listing); session.commit(); session.refresh(listing)
+        room = ChatRoom(buyer_id=user.id, seller_id=user.id, listing_id=listing.id)
+        session.add(room); session.commit(); session.refresh(room)
+        now = datetime.utcnow()
+        rows = [{"room_id": room.id, "sender_id": user.id, "content": f"message {i}", "sent_at": now} for i in range(n_messages)]
+        session.exec(insert(Message), params=rows)
+        session.commit()
+        return room.id
+
+
+def _legacy_delete(session: Session, room_id: int):
+    for msg in session.exec(select(Message).where(Message.room_id == room_id)).all():
+        session.delete(msg)
+    session.commit()
+
+
+def _run(label, n_messages, fn):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        SQLModel.metadata.create_all(engine)
+        room_id = _populate(engine, n_messages)
+        with Session(engine) as session:
+            start = time.perf_counter()
+            fn(session, room_id)
+            elapsed = time.perf_counter() - start
+        engine.dispose()
+    print(f"{label:<12} {n_messages:>8} messages  {elapsed * 1000:10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    _run("per-row", args.messages, _legacy_delete)
+    _run("set-based", args.messages, lambda s, rid: delete_where(s, Message, Message.room_id == rid, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: mixed read/write throughput for each storage profile (SQLite).
+
+Writer threads each commit one chat message per transaction (like
+POST /chat/rooms/{id}/messages); reader threads page the newest messages of
+a room (like GET /chat/rooms/{id}/messages). Reports committed writes/s,
+reads/s and lock errors per profile as JSON.
+
+    python -m benchmarks.bench_db_profiles --seconds 5 --writers 4 --readers 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, Session, create_engine, select
+from app.db.profiles import PROFILES, engine_kwargs, install_sqlite_pragmas
+from app.models import User, Listing, ChatRoom, Message
+
+
+def _setup(engine, rooms: int, seed_messages: int):
+    with Session(engine) as session:
+        user = User(email="bench@univ.edu", name="Bench", hashed_password="x")
+        session.add(user); session.commit(); session.refresh(user)
+        listing = Listing(title="Bench", description="Bench", price=1.0, seller_id=user.id)
+        session.add(listing); session.commit(); session.refresh(listing)
+        for _ in range(rooms):
+            session.add(ChatRoom(buyer_id=user.id, seller_id=user.id, listing_id=listing.id))
+        session.commit()
+        now = datetime.utcnow()
+        session.exec(insert(Message), params=[
+            {"room_id": 1 + i % rooms, "sender_id": user.id, "content": f"seed {i}", "sent_at": now} for i in range(seed_messages)
+        ])
+        session.commit()
+
+
+def _run_profile(name: str, args) -> dict:
+    tmp = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}"
+    engine = create_engine(url, **engine_kwargs(url, name), pool_size=args.writers + args.readers)
+    install_sqlite_pragmas(engine, name)
+    SQLModel.metadata.create_all(engine)
+    _setup(engine, args.rooms, args.seed_messages)
+
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(worker: int):
+        i = 0
+        while not stop.is_set():
+            try:
+                with Session(engine) as session:
+                    session.add(Message(room_id=1 + (worker + i) % args.rooms, sender_id=1, content=f"w{worker}-{i}"))
+                    session.commit()
+                bump("writes")
+            except OperationalError:
+                bump("errors")
+            i += 1
+
+    def reader(worker: int):
+        i = 0
+        while not stop.is_set():
+            try:
+                with Session(engine) as session:
+                    session.exec(select(Message).where(Message.room_id == 1 + (worker + i) % args.rooms)
+                                 .order_by(Message.sent_at.desc()).limit(50)).all()
+                bump("reads")
+            except OperationalError:
+                bump("errors")
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(r,)) for r in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return {
+        "profile": name,
+        "writes_per_s": round(counts["writes"] / args.seconds, 1),
+        "reads_per_s": round(counts["reads"] / args.seconds, 1),
+        "lock_errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed read/write throughput per DB_PROFILE")
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--seed-messages", type=int, default=50000)
+    args = parser.parse_args()
+    print(json.dumps([_run_profile(name, args) for name in args.profiles], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+End-to-end load and latency benchmark.
+
+Drives a weighted mix of API calls with N concurrent virtual users for a
+fixed duration and prints throughput and p50/p95/p99 latency per scenario as
+JSON, so runs can be diffed between releases.
+
+In-process (default): builds a temporary SQLite database with the synthetic
+generator and calls the app through httpx's ASGI transport. The OpenAI call
+in nl_to_query is replaced by a stub with --llm-latency-ms of delay.
+
+    python -m benchmarks.loadtest --duration 10 --concurrency 50
+    python -m benchmarks.loadtest --mix listings=5,search_nl=3,chat_send=2 --out run.json
+
+Against a running server (start it without OPENAI_API_KEY, seeded with
+`python -m app.db.synth_data --seed 0`):
+
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --ws-rooms 20
+
+Scenarios: listings (GET /listings), search_nl (POST /search/nl),
+search_advanced (GET /search/advanced), login (POST /auth/login),
+chat_send (POST /chat/rooms/{id}/messages). --ws-rooms additionally opens
+that many concurrent /ws/chat rooms (two sockets each) and measures message
+round-trip latency; it needs a live --url and the `websockets` package.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+DEFAULT_MIX = "listings=40,search_nl=20,search_advanced=20,login=5,chat_send=15"
+QUESTIONS = ["cheap laptop under $500", "textbook for cmpe202 under $30", "desk chair", "wireless headphones",
+             "bike between $100 and $300", "newest gadgets", "winter jacket", "yoga mat cheapest first"]
+PASSWORD = "password123"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+class Scenarios:
+    def __init__(self, client, rng: random.Random, token: str, room_ids: List[int], emails: List[str]):
+        self.client = client
+        self.rng = rng
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.room_ids = room_ids
+        self.emails = emails
+
+    async def listings(self):
+        params = {"category": self.rng.choice(["gadgets", "textbooks", "furniture"])} if self.rng.random() < 0.5 else {}
+        return await self.client.get("/listings", params=params)
+
+    async def search_nl(self):
+        return await self.client.post("/search/nl", json={"question": self.rng.choice(QUESTIONS)})
+
+    async def search_advanced(self):
+        low = self.rng.choice([0, 10, 50])
+        return await self.client.get("/search/advanced", params={"min_price": low, "max_price": low + 100, "sort_by": "price_asc", "limit": 20})
+
+    async def login(self):
+        return await self.client.post("/auth/login", json={"email": self.rng.choice(self.emails), "password": PASSWORD})
+
+    async def chat_send(self):
+        room_id = self.rng.choice(self.room_ids)
+        return await self.client.post(f"/chat/rooms/{room_id}/messages", json={"content": "load test", "sender_id": 0}, headers=self.auth)
+
+
+async def run_http(client, mix: Dict[str, int], concurrency: int, duration: float, seed: int, emails: List[str]) -> dict:
+    r = await client.post("/auth/login", json={"email": emails[0], "password": PASSWORD})
+    r.raise_for_status()
+    token = r.json()["access_token"]
+    rooms = (await client.get("/chat/rooms")).json()
+    room_ids = [room["id"] for room in rooms[:500]] or [1]
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(i: int):
+        rng = random.Random(seed * 1000 + i)
+        scenarios = Scenarios(client, rng, token, room_ids, emails)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(scenarios, name)()
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            if ok:
+                latencies[name].append(time.perf_counter() - start)
+            else:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    report = {name: summarize(latencies[name], errors[name], elapsed) for name in names}
+    report["total"] = summarize([v for vs in latencies.values() for v in vs], sum(errors.values()), elapsed)
+    return report
+
+
+async def run_websockets(base_url: str, rooms: int, messages: int) -> dict:
+    import websockets
+
+    ws_url = base_url.replace("http", "ws", 1)
+    latencies: List[float] = []
+    errors = 0
+
+    async def room(room_id: int):
+        nonlocal errors
+        try:
+            async with websockets.connect(f"{ws_url}/ws/chat/{room_id}") as sender, websockets.connect(f"{ws_url}/ws/chat/{room_id}") as receiver:
+                for i in range(messages):
+                    start = time.perf_counter()
+                    await sender.send(json.dumps({"sender_id": 1, "content": f"ws {i}", "client_id": str(i)}))
+                    while True:
+                        frame = json.loads(await receiver.recv())
+                        if frame.get("type") == "message" and frame.get("content") == f"ws {i}":
+                            break
+                    latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(room(i + 1) for i in range(rooms)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def _prepare_in_process(args) -> Callable:
+    """Point the app at a fresh synthetic database and stub the LLM; returns the ASGI app."""
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'loadtest.sqlite3')}"
+    os.environ.setdefault("MEDIA_DIR", os.path.join(tmp, "media"))
+
+    from app.db.session import engine, create_db_and_tables
+    from app.db.synth_data import generate
+    from app.services import nl_search
+    from app.main import app
+
+    create_db_and_tables()
+    generate(engine, users=args.users, listings=args.listings, rooms=args.rooms, messages=args.rooms * 5, seed=args.seed)
+
+    def fake_llm(question: str):
+        time.sleep(args.llm_latency_ms / 1000)
+        return nl_search.heuristic_parse(question)
+
+    nl_search.OPENAI_API_KEY = "stub"
+    nl_search._call_openai_api = fake_llm
+    return app
+
+
+async def _main(args):
+    import httpx
+
+    emails = [f"synth{args.seed}.user{i}@univ.edu" for i in range(min(args.users, 50))]
+    result = {"config": {k: v for k, v in vars(args).items() if k != "out"}}
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30)
+    else:
+        app = _prepare_in_process(args)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=30)
+    async with client:
+        result["http"] = await run_http(client, parse_mix(args.mix), args.concurrency, args.duration, args.seed, emails)
+    if args.ws_rooms:
+        result["websocket"] = await run_websockets(args.url, args.ws_rooms, args.ws_messages) if args.url else {"skipped": "needs --url"}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Campus Marketplace load and latency benchmark")
+    parser.add_argument("--url", help="base URL of a running server; omit to run in-process")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight list, default %(default)s")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=200, help="in-process dataset size")
+    parser.add_argument("--listings", type=int, default=20000, help="in-process dataset size")
+    parser.add_argument("--rooms", type=int, default=500, help="in-process dataset size")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="delay of the stubbed OpenAI call")
+    parser.add_argument("--ws-rooms", type=int, default=0)
+    parser.add_argument("--ws-messages", type=int, default=20)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    return 0 if report["http"]["total"]["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import pytest
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.main import app
+from app.core import query_profiler
+from app.core.config import settings
+from app.core.metrics import install_query_hooks
+from app.db.session import get_session
+from app.db.async_session import get_async_session
+from app.db.read_routing import get_read_session
+from app.deps import get_current_user
+from app.models.user import User, Role
+from app.models.listing import Listing
+from app.models.chat_room import ChatRoom
+from app.models.message import Message
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "test.sqlite3"
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_engine(engine, db_path):
+    # NullPool: the TestClient runs the app on its own event loop, so connections must not be reused across loops
+    return create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def admin_user(session):
+    admin = User(email="admin@test.edu", name="Admin", role=Role.admin, hashed_password="x")
+    session.add(admin); session.commit(); session.refresh(admin)
+    return admin
+
+
+@pytest.fixture
+def make_room(session):
+    """Factory: make_room(user, n_messages=0) -> a chat room on a new listing of `user`, with messages "hello 0".."""
+    def _make(user, n_messages=0):
+        listing = Listing(title="Lamp", description="LED lamp", price=10.0, seller_id=user.id)
+        session.add(listing); session.commit(); session.refresh(listing)
+        room = ChatRoom(buyer_id=user.id, seller_id=user.id, listing_id=listing.id)
+        session.add(room); session.commit(); session.refresh(room)
+        session.add_all([Message(room_id=room.id, sender_id=user.id, content=f"hello {i}") for i in range(n_messages)])
+        session.commit()
+        return room
+    return _make
+
+
+@pytest.fixture
+def client(engine, async_engine, admin_user, db_path, monkeypatch):
+    """TestClient bound to the per-test database, authenticated as `admin_user`."""
+    # the per-test database is the app's logical database (in-memory indexes, background jobs)
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{db_path}")
+    monkeypatch.setattr("app.db.session.engine", engine)
+    def _get_session():
+        with Session(engine) as session:
+            yield session
+
+    async def _get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _get_session
+    app.dependency_overrides[get_async_session] = _get_async_session
+    app.dependency_overrides[get_read_session] = _get_async_session
+    app.dependency_overrides[get_current_user] = lambda: admin_user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def assert_max_queries(engine, async_engine, monkeypatch):
+    """
+    Query budget for requests made through `client`:
+
+        with assert_max_queries(2):
+            client.get("/listings/1")
+
+    Fails when the requests inside the block issue more statements in total,
+    or when any of them repeats a statement shape (N+1) unless allowed.
+    """
+    monkeypatch.setattr(settings, "QUERY_PROFILER", True)
+    install_query_hooks(engine)
+    install_query_hooks(async_engine.sync_engine)
+
+    @contextmanager
+    def _budget(max_queries: int, allow_n_plus_one: bool = False):
+        query_profiler.recent.clear()
+        yield
+        ledgers = list(query_profiler.recent)
+        used = sum(l["queries"] for l in ledgers)
+        detail = "\n".join(f"{l['method']} {l['path']}: " + "; ".join(s["sql"] for s in l["statements"]) for l in ledgers)
+        assert used <= max_queries, f"{used} queries, budget {max_queries}:\n{detail}"
+        if not allow_n_plus_one:
+            flagged = [(l["path"], l["n_plus_one"]) for l in ledgers if l["n_plus_one"]]
+            assert not flagged, f"N+1 statement shapes: {flagged}"
+    return _budget
@@ -0,0 +1,102 @@
+from sqlmodel import select
+from app.models.listing import Listing, ListingStatus
+from app.services import listing_feed
+
+
+def _pending(session, seller, n):
+    listings = [Listing(title=f"Item {i}", description="Queued for review", price=10 + i, seller_id=seller.id) for i in range(n)]
+    session.add_all(listings); session.commit()
+    return [l.id for l in listings]
+
+
+def test_bulk_moderation_is_set_based(client, session, admin_user, assert_max_queries):
+    ids = _pending(session, admin_user, 40)
+    session.refresh(admin_user)
+    with assert_max_queries(8):
+        r = client.patch("/admin/listings/bulk", json={"ids": ids + [ids[0], 999_999], "action": "approve"})
+    body = r.json()
+    assert body["counts"] == {"updated": 40, "not_found": 1}
+    assert [o["id"] for o in body["results"]] == ids + [999_999]
+    session.expire_all()
+    assert set(session.exec(select(Listing.status)).all()) == {ListingStatus.approved}
+    assert [e.type for e in list(listing_feed.buffer)[-40:]] == ["listing"] * 40  # one event refreshed every subscriber
+
+    r = client.patch("/admin/listings/bulk", json={"ids": ids[:2], "action": "approve"})
+    assert r.json()["counts"] == {"unchanged": 2}
+    client.patch("/admin/listings/bulk", json={"ids": ids[:5], "action": "sold"})
+    r = client.patch("/admin/listings/bulk", json={"ids": ids[:10], "action": "delete"})
+    assert r.json()["counts"] == {"deleted": 10}
+    assert session.exec(select(Listing.id).where(Listing.id.in_(ids[:10]))).all() == []
+    assert client.patch("/admin/listings/bulk", json={"ids": [1], "action": "archive"}).status_code == 422
+
+
+def test_admin_lists_page_by_cursor_and_export_csv(client, session, admin_user, monkeypatch, assert_max_queries):
+    import csv, io
+    from datetime import datetime
+    from app.core.config import settings
+    from app.models.report import Report
+    stamp = datetime(2026, 1, 1)  # ties on created_at are broken by id
+    listings = [Listing(title=f"Item {i}", description="x", price=5, seller_id=admin_user.id, created_at=stamp if i % 2 else datetime(2026, 1, 1 + i)) for i in range(25)]
+    listings[3].description = '=HYPERLINK("http://evil.example","x")'
+    session.add_all(listings); session.commit()
+    session.add_all([Report(listing_id=listings[0].id, reporter_id=admin_user.id, reason=f"spam {i}", resolved=i > 0) for i in range(3)]); session.commit()
+    expected = [l.id for l in sorted(listings, key=lambda l: (l.created_at, l.id), reverse=True)]
+    session.refresh(admin_user)
+
+    seen, cursor = [], None
+    while True:
+        with assert_max_queries(1):
+            r = client.get("/admin/listings/pending", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        seen += [l["id"] for l in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == expected
+    assert client.get("/admin/listings?cursor=not-a-cursor").status_code == 400
+
+    monkeypatch.setattr(settings, "ADMIN_EXPORT_CHUNK_SIZE", 7)
+    r = client.get("/admin/listings?format=csv")
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [int(row["id"]) for row in rows] == expected and rows[0]["status"] == "pending"
+    descriptions = {int(row["id"]): row["description"] for row in rows}
+    assert descriptions[listings[3].id] == "'" + listings[3].description and descriptions[listings[4].id] == "x"
+    users = list(csv.DictReader(io.StringIO(client.get("/admin/users?format=csv").text)))
+    assert [u["email"] for u in users] == [admin_user.email]
+    assert len(client.get("/admin/reports", params={"limit": 2}).json()) == 2
+
+
+def test_reports_are_counted_ranked_and_auto_hide(client, session, admin_user, monkeypatch):
+    from app.core.config import settings
+    from app.deps import get_current_user
+    from app.main import app
+    from app.models.user import User, Role
+    monkeypatch.setattr(settings, "REPORT_AUTO_HIDE_THRESHOLD", 2)
+    buyer = User(email="buyer@test.edu", name="Buyer", role=Role.buyer, hashed_password="x")
+    flagged = Listing(title="Suspicious phone", description="Too cheap", price=20, status=ListingStatus.approved, seller_id=admin_user.id)
+    other = Listing(title="Desk", description="Oak", price=40, status=ListingStatus.approved, seller_id=admin_user.id)
+    session.add_all([buyer, flagged, other]); session.commit()
+
+    first = client.post("/reports", json={"listing_id": flagged.id, "reason": "scam"})
+    assert first.status_code == 200 and first.json()["reporter_id"] == admin_user.id
+    assert client.post("/reports", json={"listing_id": flagged.id, "reason": "scam again"}).status_code == 409
+    assert client.post("/reports", json={"listing_id": 999_999, "reason": "scam"}).status_code == 404
+    client.post("/reports", json={"listing_id": other.id, "reason": "wrong category"})
+
+    app.dependency_overrides[get_current_user] = lambda: buyer
+    client.post("/reports", json={"listing_id": flagged.id, "reason": "fake photos"})
+    app.dependency_overrides[get_current_user] = lambda: admin_user
+    assert listing_feed.buffer[-1].type == "delete" and listing_feed.buffer[-1].data == {"id": flagged.id}
+
+    top = client.get("/admin/reports/top").json()
+    assert [(t["listing"]["id"], t["report_count"], t["status"]) for t in top] == [(flagged.id, 2, "pending"), (other.id, 1, "approved")]
+    client.patch(f"/admin/reports/{first.json()['id']}/resolve")
+    client.patch(f"/admin/reports/{first.json()['id']}/resolve")  # resolving twice counts once
+    assert [t["report_count"] for t in client.get("/admin/reports/top").json()] == [1, 1]
+    assert client.post("/reports", json={"listing_id": flagged.id, "reason": "back again"}).status_code == 200  # the old one is resolved
+
+    from app.models.report import Report
+    client.delete(f"/admin/listings/{other.id}")
+    client.delete(f"/admin/users/{buyer.id}")
+    session.expire_all()
+    assert [(r.listing_id, r.reporter_id) for r in session.exec(select(Report).order_by(Report.id)).all()] == [(flagged.id, admin_user.id), (flagged.id, None), (flagged.id, admin_user.id)]
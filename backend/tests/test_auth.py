@@ -0,0 +1,7 @@
+def test_register_and_login(client):
+    r = client.post("/auth/register", json={"email": "new@univ.edu", "name": "New", "role": "buyer", "password": "secret123"})
+    assert r.status_code == 200
+    assert client.post("/auth/register", json={"email": "new@univ.edu", "name": "New", "role": "buyer", "password": "x"}).status_code == 400
+    r = client.post("/auth/login", json={"email": "new@univ.edu", "password": "secret123"})
+    assert r.status_code == 200 and r.json()["access_token"]
+    assert client.post("/auth/login", json={"email": "new@univ.edu", "password": "wrong"}).status_code == 401
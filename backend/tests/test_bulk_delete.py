@@ -0,0 +1,34 @@
+from sqlmodel import select
+from app.models.user import User, Role
+from app.models.listing import Listing
+from app.models.message import Message
+from app.services.bulk_delete import delete_where
+
+
+def test_delete_where_batches(session, admin_user, make_room):
+    room = make_room(admin_user, 25)
+    other = make_room(admin_user, 3)
+    assert delete_where(session, Message, Message.room_id == room.id, batch_size=10) == 25
+    remaining = session.exec(select(Message)).all()
+    assert {m.room_id for m in remaining} == {other.id}
+
+
+def test_delete_chat_room_endpoint(client, session, admin_user, make_room):
+    room = make_room(admin_user, 12)
+    r = client.delete(f"/chat/rooms/{room.id}")
+    assert r.status_code == 200
+    assert session.exec(select(Message).where(Message.room_id == room.id)).first() is None
+    assert client.delete(f"/chat/rooms/{room.id}").status_code == 404
+
+
+def test_delete_user_removes_listings(client, session):
+    seller = User(email="s@test.edu", name="S", role=Role.seller, hashed_password="x")
+    session.add(seller); session.commit(); session.refresh(seller)
+    session.add_all([Listing(title=f"Item {i}", description="desc", price=5.0, seller_id=seller.id) for i in range(7)])
+    session.commit()
+    seller_id = seller.id
+    assert client.delete(f"/admin/users/{seller_id}").status_code == 200
+    session.expunge_all()
+    assert session.get(User, seller_id) is None
+    assert session.exec(select(Listing).where(Listing.seller_id == seller_id)).first() is None
+    assert client.delete(f"/admin/listings/999").status_code == 404
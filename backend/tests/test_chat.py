@@ -0,0 +1,177 @@
+import gzip
+import json
+import pytest
+from anyio.from_thread import start_blocking_portal
+from starlette.websockets import WebSocketDisconnect
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.message import Message
+from app.models.user import User
+
+
+def test_export_history_ndjson(client, session, admin_user, monkeypatch, make_room):
+    monkeypatch.setattr(settings, "CHAT_EXPORT_CHUNK_SIZE", 4)
+    room = make_room(admin_user, 10)
+    r = client.get(f"/chat/rooms/{room.id}/history/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(l) for l in r.text.splitlines()]
+    assert [l["content"] for l in lines] == [f"hello {i}" for i in range(10)]
+
+
+def test_export_history_gzip(client, session, admin_user, monkeypatch, make_room):
+    monkeypatch.setattr(settings, "CHAT_EXPORT_CHUNK_SIZE", 3)
+    room = make_room(admin_user, 7)
+    with client.stream("GET", f"/chat/rooms/{room.id}/history/export?gzip=true") as r:
+        assert r.headers["content-encoding"] == "gzip"
+        raw = b"".join(r.iter_raw())
+    assert len(gzip.decompress(raw).splitlines()) == 7
+    assert client.get("/chat/rooms/9999/history/export").status_code == 404
+
+
+def test_archive_pages_transparently(client, session, admin_user, make_room):
+    from datetime import datetime, timedelta
+    from sqlmodel import select
+    from app.models.message_archive import MessageArchive
+    from app.services.chat_archive import archive_old_messages
+
+    room = make_room(admin_user)
+    old = datetime.utcnow() - timedelta(days=90)
+    session.add_all([Message(room_id=room.id, sender_id=admin_user.id, content=f"old {i}", sent_at=old + timedelta(minutes=i)) for i in range(9)])
+    session.add_all([Message(room_id=room.id, sender_id=admin_user.id, content=f"new {i}") for i in range(3)])
+    session.commit()
+
+    assert archive_old_messages(session, timedelta(days=30), segment_size=4) == 9
+    assert len(session.exec(select(MessageArchive)).all()) == 3
+    assert len(session.exec(select(Message)).all()) == 3
+
+    page = client.get(f"/chat/rooms/{room.id}/messages?limit=5&offset=0").json()
+    assert [m["content"] for m in page] == ["old 7", "old 8", "new 0", "new 1", "new 2"]
+    page = client.get(f"/chat/rooms/{room.id}/messages?limit=5&offset=5").json()
+    assert [m["content"] for m in page] == [f"old {i}" for i in range(2, 7)]
+
+    history = client.get(f"/chat/rooms/{room.id}/history").json()
+    assert len(history["messages"]) == 12
+    export = client.get(f"/chat/rooms/{room.id}/history/export").text.splitlines()
+    assert json.loads(export[0])["content"] == "old 0" and len(export) == 12
+
+
+def test_websocket_ack_and_resume(client, session, engine, admin_user, monkeypatch, make_room):
+    import app.services.chat_manager as chat_manager
+    monkeypatch.setattr(chat_manager, "engine", engine)
+    room = make_room(admin_user)
+
+    with client.websocket_connect(f"/ws/chat/{room.id}") as ws:
+        ws.send_json({"sender_id": admin_user.id, "content": "first", "client_id": "c1"})
+        ack = ws.receive_json()
+        assert ack["type"] == "ack" and ack["client_id"] == "c1"
+        first = ws.receive_json()
+        assert first["type"] == "message" and first["id"] == ack["id"]
+        ws.send_json({"sender_id": admin_user.id, "content": "second"})
+        ws.receive_json(); ws.receive_json()
+        ws.send_json({"sender_id": admin_user.id, "content": "third"})
+        ws.receive_json(); ws.receive_json()
+
+    with client.websocket_connect(f"/ws/chat/{room.id}?resume_after={first['id']}&batch=true") as ws:
+        frame = ws.receive_json()
+        assert frame["type"] == "batch"
+        assert [m["content"] for m in frame["messages"]] == ["second", "third"]
+
+
+def test_websocket_presence_typing_and_reaping(client, session, engine, admin_user, monkeypatch, make_room):
+    import app.services.chat_manager as chat_manager
+    monkeypatch.setattr(chat_manager, "engine", engine)
+    room = make_room(admin_user)
+    bob = User(email="bob@test.edu", name="Bob", hashed_password="x")
+    session.add(bob); session.commit(); session.refresh(bob)
+
+    # Both sockets must share one event loop, like they would under uvicorn.
+    with start_blocking_portal() as portal:
+        client.portal = portal
+        _presence_scenario(client, room, admin_user.id, bob.id, _token(admin_user), _token(bob))
+
+
+def _token(user):
+    return create_access_token(user.email, settings.SECRET_KEY, 5)
+
+
+def _presence_scenario(client, room, alice_id, bob_id, alice_token, bob_token):
+    with client.websocket_connect(f"/ws/chat/{room.id}?token={alice_token}") as alice:
+        assert alice.receive_json() == {"type": "presence", "user_id": alice_id, "status": "online"}
+        with client.websocket_connect(f"/ws/chat/{room.id}?token={bob_token}") as bob:
+            assert alice.receive_json()["user_id"] == bob_id
+            assert bob.receive_json()["user_id"] == bob_id
+            assert client.get(f"/chat/rooms/{room.id}/presence").json()["online"] == sorted([alice_id, bob_id])
+            assert client.get("/chat/ws/stats").json()["live_connections"] == 2
+
+            bob.send_json({"type": "typing", "sender_id": alice_id})  # claimed ids are ignored
+            assert alice.receive_json() == {"type": "typing", "room_id": room.id, "sender_id": bob_id}
+            bob.send_json({"sender_id": alice_id, "content": "hi, I am Alice"})
+            assert bob.receive_json()["type"] == "ack"
+            assert alice.receive_json()["sender_id"] == bob_id and bob.receive_json()["sender_id"] == bob_id
+        assert alice.receive_json() == {"type": "presence", "user_id": bob_id, "status": "offline"}
+        with client.websocket_connect(f"/ws/chat/{room.id}") as anonymous:
+            anonymous.send_json({"type": "typing", "sender_id": alice_id})
+            anonymous.send_json({"type": "ping"})
+            assert anonymous.receive_json() == {"type": "pong"}
+        assert client.get(f"/chat/rooms/{room.id}/presence").json()["online"] == [alice_id]
+
+
+def test_websocket_rejects_bad_token(client, session, admin_user, make_room):
+    room = make_room(admin_user)
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(f"/ws/chat/{room.id}?token=forged") as ws:
+            ws.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_reap_idle_closes_silent_sockets(monkeypatch):
+    import asyncio
+    from app.services.chat_manager import ConnectionManager
+
+    class FakeSocket:
+        closed = False
+        async def accept(self): pass
+        async def send_text(self, data): pass
+        async def close(self, code=1000): self.closed = True
+
+    async def scenario():
+        mgr, ws = ConnectionManager(), FakeSocket()
+        await mgr.connect("7", ws, user_id=3)
+        monkeypatch.setattr(settings, "CHAT_WS_IDLE_TIMEOUT_SECONDS", -1)
+        await mgr.reap_idle()
+        mgr._reaper.cancel()
+        return mgr, ws
+
+    mgr, ws = asyncio.run(scenario())
+    assert ws.closed
+    assert mgr.gauges() == {"live_connections": 0, "live_rooms": 0, "online_users": 0}
+
+
+def test_resume_keeps_live_messages_after_the_replay(monkeypatch):
+    import asyncio
+    import app.services.chat_manager as chat_manager
+
+    def frame(i):
+        return {"type": "message", "id": i, "room_id": 7, "sender_id": 1, "content": f"m{i}", "sent_at": "2026-01-01T00:00:00"}
+    monkeypatch.setattr(chat_manager, "_load_missed", lambda room_id, after_id: [frame(1), frame(2)])
+    mgr = chat_manager.ConnectionManager()
+
+    class FakeSocket:
+        sent = []
+        async def accept(self): pass
+        async def send_text(self, data):
+            self.sent.append(json.loads(data)["id"])
+            if len(self.sent) == 1:  # a live message and a late duplicate arrive mid-replay
+                await mgr._fan_out("7", frame(3))
+                await mgr._fan_out("7", frame(2))
+
+    async def scenario():
+        ws = FakeSocket()
+        conn = await mgr.connect("7", ws, resume_after=0)
+        await mgr._fan_out("7", frame(4))
+        mgr._reaper.cancel()
+        return ws, conn
+
+    ws, conn = asyncio.run(scenario())
+    assert ws.sent == [1, 2, 3, 4] and conn.replay_buffer is None
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.profiles import engine_kwargs, install_sqlite_pragmas, get_profile
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.sqlite3'}")
+    install_sqlite_pragmas(engine, "balanced")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'p.sqlite3'}")
+    install_sqlite_pragmas(async_engine.sync_engine, "durable")
+
+    async def check():
+        async with async_engine.connect() as conn:
+            assert (await conn.exec_driver_sql("PRAGMA synchronous")).scalar() == 2  # FULL
+        await async_engine.dispose()
+    asyncio.run(check())
+
+
+def test_postgres_pool_and_statement_timeout():
+    sync = engine_kwargs("postgresql://u:p@db/app", "throughput")
+    assert sync["pool_size"] == 20 and sync["pool_pre_ping"]
+    assert sync["connect_args"]["options"] == "-c statement_timeout=30000"
+    async_ = engine_kwargs("postgresql://u:p@db/app", "balanced", is_async=True)
+    assert async_["connect_args"]["server_settings"] == {"statement_timeout": "15000"}
+    assert engine_kwargs("postgresql://u:p@db/app", "legacy") == {"connect_args": {}}
+    with pytest.raises(ValueError):
+        get_profile("turbo")
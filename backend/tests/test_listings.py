@@ -0,0 +1,140 @@
+import json
+import pytest
+from sqlmodel import select
+from app.models.listing import Listing
+
+
+def test_bulk_import_csv_reports_row_errors(client, session, admin_user):
+    body = (
+        "title,description,price,category,location\n"
+        'Desk,"Sturdy desk, with\nmultiline note",30,essentials,Dorm A\n'
+        "X,too short title,10,none,\n"
+        "Lamp,LED lamp,-1,essentials,\n"
+        "Calculator,TI-84,60,gadgets,Math Building\n"
+        'Monitor,"27"" screen",80,gadgets,\n'
+        'Ruler,12" steel ruler,3,essentials,\n'
+    )
+    r = client.post("/listings/bulk", content=body, headers={"content-type": "text/csv"})
+    assert r.status_code == 200
+    result = r.json()
+    assert result["inserted"] == 4 and result["failed"] == 2
+    assert [e["row"] for e in result["errors"]] == [2, 3]
+    titles = session.exec(select(Listing.title).order_by(Listing.id)).all()
+    assert titles == ["Desk", "Calculator", "Monitor", "Ruler"]
+    assert session.exec(select(Listing.description).where(Listing.title == "Ruler")).one() == '12" steel ruler'
+
+    # a stray quote at the start of a field is reported, not silently swallowed
+    r = client.post("/listings/bulk", content='title,description,price,category\nChair,"Oak chair,15,essentials\nTable,Pine,20,essentials\n',
+                    headers={"content-type": "text/csv"})
+    assert r.json()["inserted"] == 0 and r.json()["failed"] == 1
+    assert r.json()["errors"][0]["row"] == 1 and "unterminated" in r.json()["errors"][0]["error"]
+    assert session.exec(select(Listing.description).where(Listing.title == "Desk")).one() == "Sturdy desk, with\nmultiline note"
+
+
+def test_bulk_import_ndjson_batches(client, session, admin_user, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 7)
+    rows = [json.dumps({"title": f"Book {i}", "description": "Used textbook", "price": 5 + i, "category": "textbooks", "seller_id": admin_user.id}) for i in range(50)]
+    body = "\n".join(rows[:25] + ["{not json", "5", "null"] + rows[25:])
+    r = client.post("/listings/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    assert r.json()["inserted"] == 50
+    assert [e["row"] for e in r.json()["errors"]] == [26, 27, 28]
+    assert r.json()["errors"][1]["error"] == "expected a JSON object"
+    assert len(session.exec(select(Listing)).all()) == 50
+
+    # a row the database rejects (seller id beyond SQLite's INTEGER) fails alone, not its whole batch
+    rows = [{"title": f"Pen {i}", "description": "Blue ink", "price": 1, "category": "essentials"} for i in range(5)]
+    rows[2]["seller_id"] = 2 ** 70
+    r = client.post("/listings/bulk", content="\n".join(json.dumps(row) for row in rows), headers={"content-type": "application/x-ndjson"})
+    assert r.json()["inserted"] == 4 and [e["row"] for e in r.json()["errors"]] == [3]
+    assert client.post("/listings/bulk", content="x", headers={"content-type": "text/plain"}).status_code == 415
+
+
+def test_similar_listings_precomputed_and_refreshed(client, session, admin_user, tmp_path, monkeypatch, assert_max_queries):
+    from app.core.config import settings
+    from app.models.listing import Category, ListingStatus
+    from app.services import similar_listings
+    monkeypatch.setattr(settings, "SEMANTIC_INDEX_DIR", str(tmp_path / "semantic"))
+    monkeypatch.setattr(settings, "SIMILAR_K", 3)
+    items = [
+        ("Calculus textbook", "Stewart calculus early transcendentals", 40, Category.textbooks),
+        ("Calculus workbook", "Calculus practice problems and solutions", 25, Category.textbooks),
+        ("Linear algebra textbook", "Strang linear algebra", 45, Category.textbooks),
+        ("Scientific calculator", "TI-84 graphing calculator", 60, Category.gadgets),
+        ("Basic calculator", "Pocket calculator", 8, Category.gadgets),
+        ("Wireless headphones", "Noise cancelling headphones", 120, Category.gadgets),
+    ]
+    ids = {}
+    for title, description, price, category in items:
+        listing = Listing(title=title, description=description, price=price, category=category, status=ListingStatus.approved, seller_id=admin_user.id)
+        session.add(listing); session.commit()
+        ids[title] = listing.id
+    monkeypatch.setattr(similar_listings, "_populated", set())
+
+    assert similar_listings.refresh_pending() == len(items)
+    similar = client.get(f"/listings/{ids['Calculus textbook']}/similar").json()
+    assert similar[0]["id"] == ids["Calculus workbook"] and len(similar) == 3
+    assert ids["Calculus textbook"] not in [s["id"] for s in similar]
+    assert [s["score"] for s in similar] == sorted([s["score"] for s in similar], reverse=True)
+    with assert_max_queries(1):
+        client.get(f"/listings/{ids['Scientific calculator']}/similar")
+
+    # a sold neighbor disappears and a new close match is ranked in incrementally
+    client.patch(f"/listings/{ids['Calculus workbook']}/sold")
+    created = client.post("/listings", json={"title": "Calculus study guide", "description": "Calculus exam review", "price": 30, "category": "textbooks"}).json()
+    session.exec(select(Listing).where(Listing.id == created["id"])).one().status = ListingStatus.approved
+    session.commit()
+    client.patch(f"/listings/{created['id']}", json={"price": 35})
+    assert created["id"] not in [s["id"] for s in client.get(f"/listings/{ids['Calculus textbook']}/similar").json()]  # reads never refresh
+    similar_listings.refresh_pending()
+    similar = [s["id"] for s in client.get(f"/listings/{ids['Calculus textbook']}/similar").json()]
+    assert similar[0] == created["id"] and ids["Calculus workbook"] not in similar
+    assert client.get(f"/listings/{ids['Calculus workbook']}/similar").json() == []
+
+    # bulk import and seller purges name the listings they touched instead of forcing a full rebuild
+    body = json.dumps({"title": "Calculus flashcards", "description": "Derivatives", "price": 9, "category": "textbooks"})
+    client.post("/listings/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    imported = session.exec(select(Listing.id).where(Listing.title == "Calculus flashcards")).one()
+    assert not similar_listings._reset and similar_listings._dirty == {imported}
+    monkeypatch.setattr(similar_listings, "rebuild", lambda *a: pytest.fail("incremental refresh expected"))
+    similar_listings.refresh_pending()
+
+
+def _sse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"]), fields["id"]))
+    return events
+
+
+def test_listing_stream_resumes_after_last_event_id(client, monkeypatch):
+    import asyncio
+    from app.core.config import settings
+    from app.services import listing_events, listing_feed
+    monkeypatch.setattr(settings, "LISTING_FEED_MAX_SECONDS", 0.2)
+
+    listing_id = client.post("/listings", json={"title": "Desk lamp", "description": "LED", "price": 12, "category": "essentials"}).json()["id"]
+    last_seen = listing_feed.buffer[-1].id  # the pending listing showed up as a `delete`
+    client.patch(f"/admin/listings/{listing_id}/approve")
+    client.patch(f"/listings/{listing_id}/sold")
+    client.delete(f"/listings/{listing_id}")
+
+    r = client.get("/listings/stream", headers={"Last-Event-ID": last_seen})
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(r.text)
+    assert [(kind, data["id"]) for kind, data, _ in events] == [("listing", listing_id), ("sold", listing_id), ("delete", listing_id)]
+    assert events[0][1]["title"] == "Desk lamp"
+    # an id this process never issued cannot be replayed
+    assert [kind for kind, _, _ in _sse_events(client.get("/listings/stream?last_event_id=0-1").text)] == ["reset"]
+
+    async def live():
+        stream = listing_feed.stream()
+        assert (await stream.__anext__()).startswith("retry:")
+        pending = asyncio.ensure_future(stream.__anext__())
+        listing_events.publish("delete", ids=[listing_id])
+        frame = await pending
+        await stream.aclose()
+        return frame
+    assert _sse_events(asyncio.run(live())) == [("delete", {"id": listing_id}, listing_feed.buffer[-1].id)]
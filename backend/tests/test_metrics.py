@@ -0,0 +1,67 @@
+import logging
+from app.core import metrics
+from app.core.config import settings
+from app.services import nl_search
+
+
+def test_metrics_record_route_latency_and_queries(client, async_engine):
+    metrics.install_query_hooks(async_engine.sync_engine)
+    route = "/listings/{listing_id}"
+    before = metrics.REQUEST_QUERIES.values.get((route,), (None, 0.0))[1]
+
+    assert client.get("/listings/999999").status_code == 404
+    assert metrics.HTTP_REQUESTS.get("GET", route, "404") >= 1
+    # the lookup ran on the async session's greenlet but was attributed to the request
+    assert metrics.REQUEST_QUERIES.values[(route,)][1] >= before + 1
+
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/listings/{listing_id}",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/listings/{listing_id}",le="+Inf"}' in body
+    assert "db_queries_total" in body
+    assert "chat_live_connections 0" in body
+
+
+def test_route_label_includes_router_prefix_and_failed_queries_do_not_leak(client, engine):
+    assert client.delete("/admin/users/999999").status_code == 404
+    assert metrics.HTTP_REQUESTS.get("DELETE", "/admin/users/{user_id}", "404") >= 1
+    assert client.get("/no/such/route").status_code == 404
+    assert metrics.HTTP_REQUESTS.get("GET", "unmatched", "404") >= 1
+
+    metrics.install_query_hooks(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            try:
+                conn.exec_driver_sql("SELECT * FROM no_such_table")
+            except Exception:
+                pass
+        assert not conn.info.get("_query_start")
+
+
+def test_slow_queries_are_logged(client, async_engine, monkeypatch, caplog):
+    metrics.install_query_hooks(async_engine.sync_engine)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.000001)
+    slow_before = metrics.DB_SLOW_QUERIES.get()
+    with caplog.at_level(logging.WARNING, logger="app.db.slow"):
+        client.get("/listings")
+    assert metrics.DB_SLOW_QUERIES.get() > slow_before
+    assert any("slow query" in r.getMessage() and "FROM listing" in r.getMessage() for r in caplog.records)
+
+
+def test_nl_fallback_and_llm_counters(monkeypatch):
+    no_key = metrics.NL_FALLBACKS.get("no_api_key")
+    monkeypatch.setattr(nl_search, "OPENAI_API_KEY", None)
+    nl_search.nl_to_query("cheap desk")
+    assert metrics.NL_FALLBACKS.get("no_api_key") == no_key + 1
+
+    class ReadTimeout(Exception):
+        pass
+
+    def boom(question):
+        raise ReadTimeout("too slow")
+
+    timeouts, errors = metrics.LLM_CALLS.get("timeout"), metrics.NL_FALLBACKS.get("llm_error")
+    monkeypatch.setattr(nl_search, "OPENAI_API_KEY", "key")
+    monkeypatch.setattr(nl_search, "_call_openai_api", boom)
+    assert nl_search.nl_to_query("cheap desk")["max_price"] == 50
+    assert metrics.LLM_CALLS.get("timeout") == timeouts + 1
+    assert metrics.NL_FALLBACKS.get("llm_error") == errors + 1
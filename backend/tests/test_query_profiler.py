@@ -0,0 +1,51 @@
+from app.core.query_profiler import QueryLedger, statement_shape
+from app.models.listing import Listing
+from app.models.user import User, Role
+
+
+def test_statement_shape_collapses_values():
+    a = statement_shape("SELECT * FROM listing WHERE id = 5 AND title = 'x'")
+    b = statement_shape("SELECT *  FROM listing\n WHERE id = 17 AND title = 'it''s'")
+    assert a == b
+    assert statement_shape("DELETE FROM message WHERE id IN (?, ?, ?)") == statement_shape("DELETE FROM message WHERE id IN (?)")
+
+    ledger = QueryLedger()
+    for i in range(4):
+        ledger.record(f"SELECT * FROM user WHERE id = {i}", 0.001)
+    ledger.record("SELECT count(*) FROM listing", 0.001)
+    assert list(ledger.n_plus_one(threshold=3).values()) == [4]
+
+
+def test_get_listing_is_a_single_query(client, session, admin_user, assert_max_queries):
+    listing = Listing(title="Lamp", description="Desk lamp", price=9.0, seller_id=admin_user.id)
+    session.add(listing); session.commit(); session.refresh(listing)
+    with assert_max_queries(1):
+        r = client.get(f"/listings/{listing.id}")
+    assert r.status_code == 200 and r.json()["seller"]["id"] == admin_user.id
+    assert r.headers["X-Query-Count"] == "1"
+    assert r.headers["X-Query-N-Plus-One"] == "0"
+
+
+def test_delete_paths_do_not_scale_with_rows(client, session, admin_user, assert_max_queries, make_room):
+    room = make_room(admin_user, 40)
+    session.refresh(admin_user)  # the overridden current user must not lazy-load inside the budget
+    with assert_max_queries(5):
+        assert client.delete(f"/chat/rooms/{room.id}").status_code == 200
+
+    seller = User(email="s@test.edu", name="S", role=Role.seller, hashed_password="x")
+    session.add(seller); session.commit(); session.refresh(seller)
+    session.add_all([Listing(title=f"Item {i}", description="desc", price=5.0, seller_id=seller.id) for i in range(30)])
+    session.commit(); session.refresh(admin_user)
+    with assert_max_queries(7):  # reports on the listings, the user's own reports, alerts, saved searches, listing ids, listings, user
+        assert client.delete(f"/admin/users/{seller.id}").status_code == 200
+
+
+def test_debug_endpoint_lists_recent_ledgers(client, session, admin_user, assert_max_queries):
+    listings = [Listing(title=f"L{i}", description="d", price=1.0, seller_id=admin_user.id) for i in range(3)]
+    session.add_all(listings); session.commit()
+    ids = [l.id for l in listings]
+    for listing_id in ids:
+        client.get(f"/listings/{listing_id}")
+    ledgers = client.get("/debug/queries", params={"limit": 3}).json()
+    assert [l["path"] for l in ledgers] == [f"/listings/{i}" for i in reversed(ids)]
+    assert ledgers[0]["queries"] == 1 and ledgers[0]["statements"][0]["sql"].startswith("SELECT")
@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import text
+from app.core.config import settings
+from app.db import read_routing
+
+
+def test_sqlite_read_pool_is_read_only(engine, db_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{db_path}")
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", "")
+    monkeypatch.setattr("app.db.session.engine", engine)
+    router = read_routing.build_read_router()
+    assert len(router.replicas) == 1
+
+    async def scenario():
+        replica = await router.pick()
+        async with replica.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM listing"))).scalar() == 0
+            with pytest.raises(Exception, match="readonly"):
+                await conn.execute(text("DELETE FROM listing"))
+        await replica.dispose()
+
+    asyncio.run(scenario())
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+
+def test_writes_set_fence_and_pin_reads_to_primary(client):
+    r = client.post("/auth/register", json={"email": "f@univ.edu", "name": "F", "role": "buyer", "password": "pw123456"})
+    fence = r.headers[read_routing.FENCE_HEADER]
+    assert r.cookies.get(read_routing.FENCE_COOKIE) == fence
+    assert client.get("/listings").headers.get(read_routing.FENCE_HEADER) is None
+    assert read_routing.FENCE_HEADER not in client.post("/search/nl", json={"question": "lamp"}).headers
+
+    class _Req:
+        def __init__(self, headers):
+            self.headers, self.cookies = headers, {}
+
+    assert read_routing.has_recent_write(_Req({read_routing.FENCE_HEADER: fence}))
+    assert not read_routing.has_recent_write(_Req({read_routing.FENCE_HEADER: str(time.time() - 3600)}))
+    assert not read_routing.has_recent_write(_Req({}))
+
+
+def test_unresponsive_replica_is_skipped_without_stalling(monkeypatch):
+    from contextlib import asynccontextmanager
+    monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_TIMEOUT_SECONDS", 0.1)
+
+    class FakeReplica:
+        class dialect:
+            name = "postgresql"
+        def __init__(self, lag, hang=False):
+            self.lag, self.hang = lag, hang
+        @asynccontextmanager
+        async def connect(self):
+            if self.hang:
+                await asyncio.sleep(60)
+            class Conn:
+                async def execute(conn, stmt):
+                    class Result:
+                        def scalar(result):
+                            return self.lag
+                    return Result()
+            yield Conn()
+
+    dead, healthy = FakeReplica(0, hang=True), FakeReplica(0.5)
+    router = read_routing.ReadRouter([dead, healthy])
+    started = time.monotonic()
+    async def scenario():
+        return [await router.pick() for _ in range(3)]
+    picks = asyncio.run(scenario())
+    assert time.monotonic() - started < 2
+    assert router._lag == [float("inf"), 0.5] and picks == [healthy] * 3
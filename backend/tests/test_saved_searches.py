@@ -0,0 +1,104 @@
+import pytest
+from sqlmodel import select
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.listing import Listing, Category, ListingStatus
+from app.models.saved_search import SavedSearch
+from app.models.user import User, Role
+from app.services import nl_search
+from app.services.percolator import Percolator
+
+
+@pytest.fixture
+def seller(session, monkeypatch):
+    monkeypatch.setattr(nl_search, "OPENAI_API_KEY", None)
+    user = User(email="seller@test.edu", name="Seller", role=Role.seller, hashed_password="x")
+    session.add(user); session.commit(); session.refresh(user)
+    return user
+
+
+def test_percolator_only_checks_anchored_searches():
+    searches = [
+        SavedSearch(id=1, user_id=10, question="", filters={"keywords": ["calc"], "category": "gadgets", "max_price": 50}),
+        SavedSearch(id=2, user_id=10, question="", filters={"keywords": [], "category": "textbooks"}),
+        SavedSearch(id=3, user_id=11, question="", filters={"keywords": [], "min_price": 100, "max_price": 300}),
+        SavedSearch(id=4, user_id=11, question="", filters={"keywords": []}),
+        SavedSearch(id=5, user_id=12, question="", filters={"keywords": ["headphones"]}),
+    ]
+    index = Percolator(searches)
+    calculator = Listing(id=1, title="Scientific Calculator", description="TI-84", price=30, category=Category.gadgets, seller_id=99)
+    assert index.candidates(calculator) == {1, 4}
+    assert index.match(calculator) == [(1, 10), (4, 11)]
+    monitor = Listing(id=2, title="Monitor", description="27 inch", price=150, category=Category.gadgets, seller_id=99)
+    assert index.match(monitor) == [(3, 11), (4, 11)]
+    assert index.match(Listing(id=3, title="Headphones", description="", price=150, category=Category.gadgets, seller_id=12)) == [(3, 11), (4, 11)]
+    index.remove(4)
+    assert index.match(calculator) == [(1, 10)]
+
+
+def test_saved_search_alerts_inbox_and_websocket(client, session, admin_user, seller):
+    saved = client.post("/saved-searches", json={"question": "calculator under $50"}).json()
+    assert saved["filters"]["keywords"] == ["calculator"] and saved["filters"]["max_price"] == 50
+    assert [s["id"] for s in client.get("/saved-searches").json()] == [saved["id"]]
+
+    def create(title, price):
+        return client.post("/listings", json={"title": title, "description": "Works fine", "price": price, "category": "gadgets", "seller_id": seller.id}).json()["id"]
+    cheap, pricey = create("Basic calculator", 8), create("Graphing calculator", 120)
+    assert client.get("/saved-searches/alerts").json() == []  # pending listings are not visible yet
+
+    token = create_access_token(admin_user.email, settings.SECRET_KEY, 5)
+    with client.websocket_connect(f"/ws/alerts?token={token}") as ws:
+        client.patch(f"/admin/listings/{pricey}/approve")
+        client.patch(f"/admin/listings/{cheap}/approve")
+        frame = ws.receive_json()
+    assert frame["type"] == "alert" and frame["alert"]["listing"]["id"] == cheap
+
+    client.patch(f"/admin/listings/{cheap}", json={"status": "approved"})  # no duplicate alert
+    inbox = client.get("/saved-searches/alerts").json()
+    assert [(a["saved_search_id"], a["listing"]["id"], a["read"]) for a in inbox] == [(saved["id"], cheap, False)]
+    assert client.post("/saved-searches/alerts/read", json={}).json() == {"updated": 1}
+    assert client.get("/saved-searches/alerts?unread_only=true").json() == []
+
+    assert client.delete(f"/saved-searches/{saved['id']}").json() == {"ok": True}
+    client.patch(f"/admin/listings/{create('Solar calculator', 5)}/approve")
+    assert len(client.get("/saved-searches/alerts").json()) == 1
+
+
+def test_concurrent_percolation_stores_one_alert(session, async_engine, admin_user, seller):
+    import asyncio
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.models.saved_search import SearchAlert
+    from app.services import percolator
+    session.add(SavedSearch(user_id=admin_user.id, question="calculator", filters={"keywords": ["calculator"]}))
+    listing = Listing(title="Basic calculator", description="", price=8, category=Category.gadgets, seller_id=seller.id, status=ListingStatus.approved)
+    session.add(listing); session.commit(); session.refresh(listing)
+
+    async def run():
+        async def one():
+            async with AsyncSession(async_engine, expire_on_commit=False) as s:
+                return await percolator.percolate(s, [listing])
+        return await asyncio.gather(one(), one())
+    assert sorted(asyncio.run(run())) == [0, 1]
+    assert len(session.exec(select(SearchAlert)).all()) == 1
+
+
+def test_deleting_a_user_drops_their_saved_searches_and_alerts(client, session, admin_user, seller):
+    from app.models.saved_search import SearchAlert
+    from app.services import percolator
+    buyer = User(email="buyer@test.edu", name="Buyer", role=Role.buyer, hashed_password="x")
+    session.add(buyer); session.commit(); session.refresh(buyer)
+    saved = SavedSearch(user_id=buyer.id, question="lamp", filters={"keywords": ["lamp"]})
+    session.add(saved); session.commit(); session.refresh(saved)
+
+    def approve_lamp():
+        listing_id = client.post("/listings", json={"title": "Desk lamp", "description": "LED", "price": 12, "category": "essentials", "seller_id": seller.id}).json()["id"]
+        client.patch(f"/admin/listings/{listing_id}/approve")
+    approve_lamp()
+    assert session.exec(select(SearchAlert.saved_search_id).where(SearchAlert.user_id == buyer.id)).all() == [saved.id]
+
+    assert client.delete(f"/admin/users/{buyer.id}").status_code == 200
+    assert session.exec(select(SavedSearch).where(SavedSearch.user_id == buyer.id)).all() == []
+    assert session.exec(select(SearchAlert).where(SearchAlert.user_id == buyer.id)).all() == []
+    assert saved.id not in percolator._index.searches
+    approve_lamp()  # no alerts for a user who no longer exists
+    assert session.exec(select(SearchAlert)).all() == []
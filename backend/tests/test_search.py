@@ -0,0 +1,245 @@
+import pytest
+from sqlmodel import select
+from app.models.listing import Listing, Category, ListingStatus
+from app.core.config import settings
+from app.services import nl_search
+from app.services.fuzzy_search import TrigramIndex
+
+
+@pytest.fixture
+def catalog(session, admin_user, monkeypatch):
+    monkeypatch.setattr(nl_search, "OPENAI_API_KEY", None)
+    items = [
+        Listing(title="Scientific Calculator TI-84", description="Color screen", price=85.0, category=Category.gadgets, seller_id=admin_user.id),
+        Listing(title="Basic calculator", description="Solar powered", price=8.0, category=Category.gadgets, seller_id=admin_user.id),
+        Listing(title="Wireless Headphones", description="Noise cancelling", price=220.0, category=Category.gadgets, seller_id=admin_user.id),
+        Listing(title="Calculus Textbook", description="5th edition", price=45.0, category=Category.textbooks, seller_id=admin_user.id),
+    ]
+    session.add_all(items); session.commit()
+    return {l.title: l.id for l in items}
+
+
+def test_trigram_index_ranks_by_similarity():
+    index = TrigramIndex()
+    index.add(1, "Scientific calculator")
+    index.add(2, "Calculus textbook")
+    index.add(3, "Desk lamp")
+    ranked = index.search(["calculater"], threshold=0.5, limit=10)
+    assert [listing_id for listing_id, _ in ranked] == [1]
+    index.remove(1)
+    assert index.search(["calculater"], 0.5, 10) == []
+    assert "calculator" not in index.postings
+
+
+def test_misspelled_keywords_fall_back_to_fuzzy_matches(client, catalog):
+    hits = client.post("/search/nl", json={"question": "calculater"}).json()
+    assert [h["id"] for h in hits][:2] == sorted([catalog["Basic calculator"], catalog["Scientific Calculator TI-84"]])
+    assert catalog["Calculus Textbook"] not in [h["id"] for h in hits]
+
+    # price filter from nl_to_query still applies ("under $50")
+    hits = client.post("/search/nl", json={"question": "calculater under $50"}).json()
+    assert [h["id"] for h in hits] == [catalog["Basic calculator"]]
+
+    assert [h["id"] for h in client.post("/search/nl", json={"question": "hedphones"}).json()] == [catalog["Wireless Headphones"]]
+
+
+def test_fuzzy_index_follows_listing_writes(client, catalog):
+    assert client.post("/search/nl", json={"question": "ergonomik mesh"}).json() == []
+    created = client.post("/listings", json={"title": "Ergonomic desk chair", "description": "Mesh back", "price": 60.0, "category": "essentials"}).json()
+    assert [h["id"] for h in client.post("/search/nl", json={"question": "ergonomik mesh"}).json()] == [created["id"]]
+    client.delete(f"/listings/{created['id']}")
+    assert client.post("/search/nl", json={"question": "ergonomik"}).json() == []
+
+
+def test_fuzzy_index_is_shared_by_replica_and_primary_reads(client, catalog, async_engine, db_path):
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.services import fuzzy_search
+
+    async def search(engine):
+        async with AsyncSession(engine) as session:
+            return [l.id for l, _ in await fuzzy_search.fuzzy_search(session, ["calculater"], select(Listing), 10)]
+
+    replica = create_async_engine(f"sqlite+aiosqlite:///file:{db_path}?mode=ro&uri=true")
+    assert asyncio.run(search(replica))
+    built = fuzzy_search._index.value
+    assert asyncio.run(search(async_engine)) == asyncio.run(search(replica))
+    assert fuzzy_search._index.value is built
+    asyncio.run(replica.dispose())
+
+
+def test_suggest_ranks_approved_terms_and_follows_writes(client, session, admin_user):
+    approved = ListingStatus.approved
+    session.add_all([
+        Listing(title="CMPE 202 textbook", description="Software systems", price=30.0, category=Category.textbooks, status=approved, seller_id=admin_user.id),
+        Listing(title="Calculator", description="For cmpe202 exams", price=10.0, category=Category.gadgets, status=approved, seller_id=admin_user.id),
+        Listing(title="Calculus notes", description="Math 31", price=5.0, category=Category.textbooks, status=approved, seller_id=admin_user.id),
+        Listing(title="Camera", description="Pending review", price=90.0, category=Category.gadgets, seller_id=admin_user.id),
+    ])
+    session.commit()
+
+    assert client.get("/search/suggest", params={"prefix": "cmpe"}).json()[0] == {"term": "cmpe202", "kind": "course", "count": 2}
+    assert [s["term"] for s in client.get("/search/suggest", params={"prefix": "ca"}).json()] == ["calculator", "calculus"]
+    assert client.get("/search/suggest", params={"prefix": "text"}).json()[0] == {"term": "textbooks", "kind": "category", "count": 2}
+
+    camera = session.exec(select(Listing).where(Listing.title == "Camera")).one()
+    assert client.patch(f"/admin/listings/{camera.id}/approve").status_code == 200
+    assert "camera" in [s["term"] for s in client.get("/search/suggest", params={"prefix": "ca"}).json()]
+    client.delete(f"/listings/{camera.id}")
+    assert "camera" not in [s["term"] for s in client.get("/search/suggest", params={"prefix": "ca"}).json()]
+
+
+def test_suggest_cache_is_bounded(monkeypatch):
+    from app.services.typeahead import TypeaheadIndex
+    monkeypatch.setattr(settings, "TYPEAHEAD_CACHE_SIZE", 2)
+    index = TypeaheadIndex()
+    index.add(1, {"calculator": "word", "camera": "word"})
+    for prefix in ("c", "ca", "cal", "c"):
+        index.suggest(prefix)
+    assert list(index._cache) == [("cal", 10), ("c", 10)]
+
+
+def test_suggest_serves_short_prefixes_from_top_lists():
+    from app.services.typeahead import TypeaheadIndex
+    docs = [(i, {f"w{i:04d}": "word", "common": "word"}) for i in range(300)]
+    index = TypeaheadIndex.build(docs)
+    assert index.keys == sorted(index.weights)
+    assert [s["term"] for s in index.suggest("w", 3)] == ["w0000", "w0001", "w0002"]
+    assert list(index._top) == ["w"] and len(index._top["w"]) == 50
+    index.add(1000, {"w0299": "word"})  # w0299 now ranks first; only prefixes of w0299 are recomputed
+    index.suggest("c")
+    assert [s["term"] for s in index.suggest("w", 2)] == ["w0299", "w0000"]
+    index.add(1001, {"zebra": "word"})
+    assert set(index._top) == {"w", "c"}
+    assert index.suggest("w00", 60)[-1]["term"] == "w0059"  # past TOP_K: scanned directly
+
+
+def test_faceted_search_counts_all_matches_in_one_query(client, catalog, assert_max_queries):
+    with assert_max_queries(2):
+        body = client.get("/search/advanced/faceted", params={"max_price": 100, "limit": 1}).json()
+    assert len(body["results"]) == 1
+    facets = body["facets"]
+    assert facets["total"] == 3
+    assert facets["categories"] == {"gadgets": 2, "textbooks": 1}
+    histogram = {(b["min_price"], b["max_price"]): b["count"] for b in facets["price_histogram"]}
+    assert histogram[(0.0, 25.0)] == 1 and histogram[(25.0, 50.0)] == 1 and histogram[(50.0, 100.0)] == 1
+    assert histogram[(1000.0, None)] == 0
+
+    facets = client.post("/search/nl/faceted", json={"question": "calculator"}).json()["facets"]
+    assert facets["categories"] == {"gadgets": 2} and facets["total"] == 2
+
+
+def test_faceted_counts_include_fuzzy_top_ups_and_allow_no_buckets(client, catalog, monkeypatch):
+    body = client.post("/search/nl/faceted", json={"question": "calculater"}).json()
+    assert len(body["results"]) == 2
+    assert body["facets"]["total"] == 2 and body["facets"]["categories"] == {"gadgets": 2}
+
+    monkeypatch.setattr(settings, "SEARCH_PRICE_BUCKETS", "")
+    facets = client.get("/search/advanced/faceted", params={"max_price": 100}).json()["facets"]
+    assert facets["total"] == 3 and facets["price_histogram"] == []
+    monkeypatch.setattr(settings, "SEARCH_PRICE_BUCKETS", "0")
+    facets = client.get("/search/advanced/faceted", params={"max_price": 100}).json()["facets"]
+    assert facets["price_histogram"] == [{"min_price": 0.0, "max_price": None, "count": 3}]
+
+
+def test_semantic_mode_is_offline_and_follows_writes(client, catalog, tmp_path, monkeypatch, async_engine, db_path):
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.services import semantic_search
+    monkeypatch.setattr(settings, "SEMANTIC_INDEX_DIR", str(tmp_path / "semantic"))
+    monkeypatch.setattr(nl_search, "OPENAI_API_KEY", "key")
+    monkeypatch.setattr(nl_search, "_call_openai_api", lambda q: pytest.fail("semantic mode must not call OpenAI"))
+
+    def search(question):
+        return [h["id"] for h in client.post("/search/nl", json={"question": question, "mode": "semantic"}).json()]
+
+    on_loop = []
+    real_query = semantic_search.SemanticIndex.query
+    def query_spy(self, text, k):
+        try:
+            on_loop.append(asyncio.get_running_loop() is not None)
+        except RuntimeError:
+            on_loop.append(False)
+        return real_query(self, text, k)
+    monkeypatch.setattr(semantic_search.SemanticIndex, "query", query_spy)
+
+    hits = search("calculators")
+    assert on_loop == [False]  # scored in the threadpool
+    assert set(hits[:2]) == {catalog["Basic calculator"], catalog["Scientific Calculator TI-84"]}
+    assert catalog["Wireless Headphones"] not in hits
+    cheap = search("calculators under $50")
+    assert cheap[0] == catalog["Basic calculator"] and catalog["Scientific Calculator TI-84"] not in cheap
+
+    built_at = semantic_search._index.value.meta["built_at"]
+    created = client.post("/listings", json={"title": "Solar calculator", "description": "Pocket size", "price": 4.0, "category": "gadgets"}).json()
+    assert created["id"] in search("solar calculator")
+    client.delete(f"/listings/{catalog['Basic calculator']}")
+    assert catalog["Basic calculator"] not in search("calculators")
+
+    # a fresh process reuses the memory-mapped files while the table matches them
+    semantic_search._index.clear()
+    client.post("/search/nl", json={"question": "calculator", "mode": "semantic"})
+    assert semantic_search._index.value.meta["built_at"] != built_at  # rows changed since the build
+    rebuilt_at = semantic_search._index.value.meta["built_at"]
+    semantic_search._index.clear()
+    client.post("/search/nl", json={"question": "calculator", "mode": "semantic"})
+    assert semantic_search._index.value.meta["built_at"] == rebuilt_at
+
+    # reads through the read-only replica and the primary share the index
+    async def query(engine):
+        async with AsyncSession(engine) as session:
+            return await semantic_search.semantic_search(session, "calculator", select(Listing), 5)
+    replica = create_async_engine(f"sqlite+aiosqlite:///file:{db_path}?mode=ro&uri=true")
+    for engine in (replica, async_engine, replica):
+        assert asyncio.run(query(engine))
+    assert semantic_search._index.value.meta["built_at"] == rebuilt_at
+    asyncio.run(replica.dispose())
+
+
+def test_nl_batch_parses_concurrently_and_dedupes_filters(client, catalog, monkeypatch):
+    import threading
+    from app.routers import search
+
+    # three distinct questions: each parse only returns once all three are in flight
+    in_flight = threading.Barrier(3, timeout=10)
+    def slow_parse(question):
+        in_flight.wait()  # stands in for an LLM round-trip; breaks if parses run one after another
+        return nl_search.heuristic_parse(question)
+    applied = []
+    apply_filters = search._apply_filters
+    async def counting_apply(filters, session, *args, **kwargs):
+        applied.append(filters)
+        return await apply_filters(filters, session, *args, **kwargs)
+    monkeypatch.setattr(search, "nl_to_query", slow_parse)
+    monkeypatch.setattr(search, "_apply_filters", counting_apply)
+
+    questions = ["calculator under $50", "Calculator under 50 dollars", "headphones", "calculator under $50"]
+    r = client.post("/search/nl/batch", json={"questions": questions})
+    assert r.status_code == 200 and not in_flight.broken
+    body = r.json()
+    assert [b["question"] for b in body] == questions
+    assert [h["id"] for h in body[0]["results"]] == [catalog["Basic calculator"]]
+    assert body[1]["results"] == body[0]["results"] == body[3]["results"]
+    assert [h["id"] for h in body[2]["results"]] == [catalog["Wireless Headphones"]]
+    assert len(applied) == 2
+
+    monkeypatch.setattr(search, "nl_to_query", nl_search.heuristic_parse)
+    monkeypatch.setattr(settings, "SEARCH_BATCH_MAX_QUESTIONS", 2)
+    assert client.post("/search/nl/batch", json={"questions": questions}).status_code == 422
+
+
+def test_semantic_builds_do_not_share_temp_files(session, catalog, tmp_path):
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlmodel import Session
+    from app.services import semantic_search
+    directory = str(tmp_path / "semantic")
+
+    def build(_):
+        with Session(session.get_bind()) as s:
+            return len(semantic_search.build(s, directory).ids)
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(build, range(4))) == [4] * 4
+    assert sorted(os.listdir(directory)) == ["ids.npy", "meta.json", "model.npz", "vectors.npy"]
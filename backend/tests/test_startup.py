@@ -0,0 +1,48 @@
+import logging
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from app.main import app
+from app.core.config import settings
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code, tmp_path, *args):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'boot.sqlite3'}", "MEDIA_DIR": str(tmp_path / "media")}
+    return subprocess.run([sys.executable, *args, code] if code else [sys.executable, *args],
+                          cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+
+
+def test_import_is_side_effect_free(tmp_path):
+    out = _run("import sys, app.main; print(sorted(m for m in ('passlib', 'httpx') if m in sys.modules))", tmp_path, "-c")
+    assert out.stdout.strip() == "[]"
+    assert not (tmp_path / "media").exists()
+    assert not (tmp_path / "boot.sqlite3").exists()
+
+
+def test_startup_skips_schema_and_seed_by_default(monkeypatch, caplog):
+    monkeypatch.setattr("app.db.session.create_db_and_tables", lambda: (_ for _ in ()).throw(AssertionError("ran create_all")))
+    monkeypatch.setattr(settings, "DEBUG", True)
+    with caplog.at_level(logging.INFO, logger="app.main"), TestClient(app) as client:
+        assert client.get("/media/missing.png").status_code == 404
+    assert any(r.getMessage().startswith("Startup profile: import app.main") for r in caplog.records)
+
+
+def test_startup_profile_reaches_stderr_without_logging_config(tmp_path):
+    code = ("from fastapi.testclient import TestClient; from app.main import app\n"
+            "with TestClient(app): pass")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'boot.sqlite3'}", "DEBUG": "true", "SEMANTIC_INDEX_DIR": str(tmp_path / "semantic")}
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    assert "app.main - Startup profile: import app.main" in out.stderr
+    assert not (tmp_path / "semantic").exists()  # no background job fits an index by default
+
+
+def test_manage_cli_creates_and_seeds(tmp_path):
+    _run(None, tmp_path, "-m", "app.db.manage", "seed")
+    engine = create_engine(f"sqlite:///{tmp_path / 'boot.sqlite3'}")
+    assert {"user", "listing", "chatroom"} <= set(inspect(engine).get_table_names())
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM listing").scalar() > 0
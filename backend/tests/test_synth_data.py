@@ -0,0 +1,24 @@
+from sqlmodel import SQLModel, Session, create_engine, select
+from app.db.synth_data import generate
+from app.models import Listing, Category, ChatRoom, Message
+
+
+def _snapshot(tmp_path, name, seed):
+    engine = create_engine(f"sqlite:///{tmp_path / name}")
+    counts = generate(engine, users=30, listings=400, rooms=40, messages=200, seed=seed, batch_size=64)
+    with Session(engine) as session:
+        listings = session.exec(select(Listing.title, Listing.price, Listing.category).order_by(Listing.id)).all()
+        assert len(session.exec(select(ChatRoom)).all()) == 40
+        assert len(session.exec(select(Message)).all()) == 200
+    engine.dispose()
+    return counts, listings
+
+
+def test_generate_is_deterministic_and_covers_categories(tmp_path):
+    counts, first = _snapshot(tmp_path, "a.sqlite3", seed=3)
+    assert counts == {"users": 30, "listings": 400, "rooms": 40, "messages": 200}
+    _, again = _snapshot(tmp_path, "b.sqlite3", seed=3)
+    _, other = _snapshot(tmp_path, "c.sqlite3", seed=4)
+    assert first == again
+    assert first != other
+    assert {c for _, _, c in first} == set(Category)
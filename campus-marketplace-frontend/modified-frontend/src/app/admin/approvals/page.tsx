@@ -19,19 +19,25 @@ export default function AdminApprovalsPage() {
     const [listings, setListings] = useState<Listing[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
+    const [nextCursor, setNextCursor] = useState<string>();
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         fetchPendingListings();
     }, []);
 
-    const fetchPendingListings = async () => {
+    // One page per request; "Load more" appends the next one.
+    const fetchPendingListings = async (cursor?: string) => {
+        setLoadingMore(Boolean(cursor));
         try {
-            const data = await adminAPI.getPendingListings();
-            setListings(data);
+            const page = await adminAPI.getPendingListings(cursor);
+            setListings(prev => (cursor ? [...prev, ...page.items] : page.items));
+            setNextCursor(page.nextCursor);
         } catch (err: any) {
             setError(err.message || 'Failed to fetch pending listings');
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
@@ -64,7 +70,7 @@ export default function AdminApprovalsPage() {
                         <div className="flex items-center justify-between mb-6">
                             <h1 className="text-3xl font-bold text-gray-900">Pending Approvals</h1>
                             <span className="px-3 py-1 text-sm bg-yellow-100 text-yellow-800 rounded-full font-medium">
-                                Pending: {listings.length}
+                                Pending: {listings.length}{nextCursor ? '+' : ''}
                             </span>
                         </div>
 
@@ -78,7 +84,7 @@ export default function AdminApprovalsPage() {
                             <div className="text-center py-8">
                                 <p className="text-gray-500">Loading pending listings...</p>
                             </div>
-                        ) : listings.length === 0 ? (
+                        ) : listings.length === 0 && !nextCursor ? (
                             <div className="text-center py-12">
                                 <p className="text-gray-500 text-lg">No pending listings to review.</p>
                             </div>
@@ -131,6 +137,17 @@ export default function AdminApprovalsPage() {
                                 ))}
                             </div>
                         )}
+                        {nextCursor && (
+                            <div className="mt-6 text-center">
+                                <button
+                                    onClick={() => fetchPendingListings(nextCursor)}
+                                    disabled={loadingMore}
+                                    className="px-4 py-2 text-sm font-medium text-indigo-600 border border-indigo-200 rounded-md hover:bg-indigo-50 disabled:opacity-50"
+                                >
+                                    {loadingMore ? 'Loading...' : 'Load more'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 </div>
             </div>
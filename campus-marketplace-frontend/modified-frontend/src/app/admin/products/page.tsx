@@ -20,6 +20,8 @@ export default function AdminProductsPage() {
   const [statusFilter, setStatusFilter] = useState<string>('pending');
   const [searchTerm, setSearchTerm] = useState('');
   const [isMutating, setIsMutating] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string>();
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const filteredListings = useMemo(() => {
     if (!searchTerm.trim()) return listings;
@@ -29,20 +31,27 @@ export default function AdminProductsPage() {
     );
   }, [listings, searchTerm]);
 
-  const fetchListings = async () => {
-    setLoading(true);
+  // One page per request; "Load more" appends the next one.
+  const fetchListings = async (cursor?: string) => {
+    if (cursor) {
+      setLoadingMore(true);
+    } else {
+      setLoading(true);
+    }
     setError('');
     try {
       const params: Record<string, string | number> = {};
       if (statusFilter !== 'all') {
         params.status = statusFilter;
       }
-      const data = await adminAPI.getListings(params);
-      setListings(data);
+      const page = await adminAPI.getListings(params, cursor);
+      setListings((prev) => (cursor ? [...prev, ...page.items] : page.items));
+      setNextCursor(page.nextCursor);
     } catch (err: any) {
       setError(err.message || 'Failed to fetch listings');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -55,7 +64,12 @@ export default function AdminProductsPage() {
     try {
       setIsMutating(true);
       await adminAPI.updateListing(id, data);
-      await fetchListings();
+      // Update the row in place so pages loaded so far stay on screen.
+      setListings((prev) =>
+        prev
+          .map((listing) => (listing.id === id ? { ...listing, ...data } : listing))
+          .filter((listing) => statusFilter === 'all' || listing.status === statusFilter)
+      );
     } catch (err: any) {
       alert(err.message || 'Failed to update listing');
     } finally {
@@ -130,7 +144,7 @@ export default function AdminProductsPage() {
 
             {loading ? (
               <div className="text-center py-12 text-gray-500">Loading listings...</div>
-            ) : filteredListings.length === 0 ? (
+            ) : filteredListings.length === 0 && !nextCursor ? (
               <div className="text-center py-12 text-gray-500">No listings found for the selected filters.</div>
             ) : (
               <div className="overflow-x-auto">
@@ -212,6 +226,17 @@ export default function AdminProductsPage() {
                 </table>
               </div>
             )}
+            {nextCursor && (
+              <div className="text-center">
+                <button
+                  onClick={() => fetchListings(nextCursor)}
+                  disabled={loadingMore}
+                  className="px-4 py-2 text-sm font-medium text-indigo-600 border border-indigo-200 rounded-md hover:bg-indigo-50 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -15,19 +15,25 @@ export default function AdminUsersPage() {
     const [users, setUsers] = useState<User[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
+    const [nextCursor, setNextCursor] = useState<string>();
+    const [loadingMore, setLoadingMore] = useState(false);
 
     useEffect(() => {
         fetchUsers();
     }, []);
 
-    const fetchUsers = async () => {
+    // One page per request; "Load more" appends the next one.
+    const fetchUsers = async (cursor?: string) => {
+        setLoadingMore(Boolean(cursor));
         try {
-            const data = await adminAPI.getUsers();
-            setUsers(data);
+            const page = await adminAPI.getUsers(cursor);
+            setUsers(prev => (cursor ? [...prev, ...page.items] : page.items));
+            setNextCursor(page.nextCursor);
         } catch (err: any) {
             setError(err.message || 'Failed to fetch users');
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
@@ -52,7 +58,7 @@ export default function AdminUsersPage() {
                         <div className="flex items-center justify-between mb-6">
                             <h1 className="text-3xl font-bold text-gray-900">Manage Users</h1>
                             <span className="px-3 py-1 text-sm bg-indigo-100 text-indigo-800 rounded-full font-medium">
-                                Total Users: {users.length}
+                                {nextCursor ? 'Loaded' : 'Total'} Users: {users.length}
                             </span>
                         </div>
 
@@ -115,6 +121,17 @@ export default function AdminUsersPage() {
                                         ))}
                                     </tbody>
                                 </table>
+                                {nextCursor && (
+                                    <div className="mt-6 text-center">
+                                        <button
+                                            onClick={() => fetchUsers(nextCursor)}
+                                            disabled={loadingMore}
+                                            className="px-4 py-2 text-sm font-medium text-indigo-600 border border-indigo-200 rounded-md hover:bg-indigo-50 disabled:opacity-50"
+                                        >
+                                            {loadingMore ? 'Loading...' : 'Load more'}
+                                        </button>
+                                    </div>
+                                )}
                             </div>
                         )}
                     </div>
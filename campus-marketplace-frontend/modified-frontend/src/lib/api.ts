@@ -287,6 +287,20 @@ export const chatAPI = {
   },
 };
 
+// Admin list endpoints return one page at a time; the next page's cursor
+// comes back in the X-Next-Cursor header until the last page. Views keep the
+// cursor and ask for the next page only when the admin wants more.
+export interface Page<T> {
+  items: T[];
+  nextCursor?: string;
+}
+
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+const getPage = async (url: string, params?: any, cursor?: string): Promise<Page<any>> => {
+  const response = await apiClient.get(url, { params: cursor ? { ...params, cursor } : params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || undefined };
+};
+
 // Admin API functions
 export const adminAPI = {
   getSummary: async () => {
@@ -300,10 +314,9 @@ export const adminAPI = {
     }
   },
 
-  getUsers: async () => {
+  getUsers: async (cursor?: string) => {
     try {
-      const response = await apiClient.get('/admin/users');
-      return response.data;
+      return await getPage('/admin/users', undefined, cursor);
     } catch (error: unknown) {
       // eslint-disable-next-line @typescript-eslint/no-explicit-any
       const err = error as any;
@@ -322,10 +335,9 @@ export const adminAPI = {
     }
   },
 
-  getPendingListings: async () => {
+  getPendingListings: async (cursor?: string) => {
     try {
-      const response = await apiClient.get('/admin/listings/pending');
-      return response.data;
+      return await getPage('/admin/listings/pending', undefined, cursor);
     } catch (error: unknown) {
       // eslint-disable-next-line @typescript-eslint/no-explicit-any
       const err = error as any;
@@ -355,10 +367,9 @@ export const adminAPI = {
     }
   },
 
-  getListings: async (params?: any) => {
+  getListings: async (params?: any, cursor?: string) => {
     try {
-      const response = await apiClient.get('/admin/listings', { params });
-      return response.data;
+      return await getPage('/admin/listings', params, cursor);
     } catch (error: unknown) {
       // eslint-disable-next-line @typescript-eslint/no-explicit-any
       const err = error as any;